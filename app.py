@@ -72,6 +72,22 @@ app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', os.environ.get('MAIL_USERNAME'))
 
+# Reservas de stock: agregar al carrito aparta las unidades durante un tiempo
+app.config['STOCK_RESERVATIONS'] = os.environ.get('STOCK_RESERVATIONS', 'False') == 'True'
+app.config['RESERVATION_TTL_MINUTES'] = int(os.environ.get('RESERVATION_TTL_MINUTES', 15))
+
+# Checkouts simultáneos entre todos los workers (0 = sin límite); el resto espera turno
+app.config['CHECKOUT_MAX_CONCURRENT'] = int(os.environ.get('CHECKOUT_MAX_CONCURRENT', 6))
+app.config['CHECKOUT_LOCK_DIR'] = os.environ.get('CHECKOUT_LOCK_DIR')
+
+# Matriz de "también compraron" (la genera scripts/build_co_purchase.py)
+app.config['CO_PURCHASE_PATH'] = os.environ.get('CO_PURCHASE_PATH', str(instance_path / 'co_purchase.bin'))
+
+# Avisos de la lista de deseos (scripts/notify_wishlist.py): URL pública para los enlaces y ritmo de envío
+app.config['SITE_URL'] = os.environ.get('SITE_URL', 'http://localhost:5000')
+app.config['WISHLIST_MAIL_RATE'] = float(os.environ.get('WISHLIST_MAIL_RATE', 5))     # Correos por segundo
+app.config['WISHLIST_MAIL_BATCH'] = int(os.environ.get('WISHLIST_MAIL_BATCH', 50))    # Correos por conexión SMTP
+
 # Configuración de seguridad para sesiones y cookies
 app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV') == 'production'  # Solo HTTPS en producción
 app.config['SESSION_COOKIE_HTTPONLY'] = True  # No accesible vía JavaScript
@@ -94,8 +110,14 @@ login_manager.init_app(app)
 from utils.rate_limiter import init_limiter
 from utils.security_headers import add_security_headers
 from utils.sentry_config import init_sentry
+from utils.idempotency import init_idempotency
+from utils.view_counter import init_view_counter
+from utils.trending import init_trending
 
 limiter = init_limiter(app)
+init_idempotency(app)
+init_view_counter(app)
+init_trending(app)
 add_security_headers(app)
 init_sentry(app)
 
@@ -103,6 +125,11 @@ init_sentry(app)
 # from utils.auto_migrate import init_auto_migrations
 # init_auto_migrations(app)
 
+# Fusionar el carrito de visitante (sesión) con el del usuario al iniciar sesión
+from flask_login import user_logged_in
+from utils.session_cart import fusionar_carrito_sesion
+user_logged_in.connect(fusionar_carrito_sesion, app)
+
 @login_manager.user_loader
 def load_user(user_id):
     from models.database_models import User
@@ -150,16 +177,19 @@ if not app.debug:
 @app.route('/')
 def index():
     """Página principal de la tienda"""
-    juegos = Game.get_all_games()
-    hardware = Hardware.get_all_hardware()
+    from utils.featured_products import destacados
+    from utils.trending import productos_en_tendencia
+    from utils.recently_viewed import productos_recientes
 
-    # Obtener algunos productos destacados
-    juegos_destacados = juegos[:3]
-    hardware_destacado = hardware[:3]
+    # Ranking cacheado (ventas, stock y novedad): no carga el catálogo completo
+    juegos_destacados = destacados('game')
+    hardware_destacado = destacados('hardware')
 
     return render_template('index.html', 
                          juegos_destacados=juegos_destacados, 
-                         hardware_destacado=hardware_destacado)
+                         hardware_destacado=hardware_destacado,
+                         en_tendencia=productos_en_tendencia(),
+                         vistos_recientemente=productos_recientes(limite=4))
 
 @app.route('/about')
 def about():
@@ -188,10 +218,12 @@ def forbidden(error):
 @app.context_processor
 def inject_user():
     """Inyectar información del usuario en todos los templates"""
-    cart_count = 0
     if current_user.is_authenticated:
-        from models.database_models import CartItem
-        cart_count = CartItem.query.filter_by(user_id=current_user.id).count()
+        # Contador desnormalizado: no requiere consultas adicionales
+        cart_count = current_user.cart_count or 0
+    else:
+        from utils.session_cart import contar
+        cart_count = contar()
     return {"cart_count": cart_count}
 
 if __name__ == '__main__':
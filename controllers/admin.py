@@ -1,17 +1,21 @@
 """
 Controlador del panel de administración
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, abort, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from functools import wraps
 from database import db
-from models.database_models import User, Game, Hardware, Order, OrderItem
+from models.database_models import User, Game, Hardware, Order, OrderItem, AdminStat, AdminDailyStat
+from sqlalchemy.orm import selectinload
 from werkzeug.utils import secure_filename
+from utils.catalog_version import invalidate_catalog_version
+from utils.sales_rollup import productos_mas_vendidos, ventas_por_categoria
 import os
 from datetime import datetime
 
 UPLOAD = 'static/uploads'
 ADMIN_JUEGOS = 'admin.juegos'
+DIAS_SERIE = 30  # Días de la serie de ventas del dashboard
 ADMIN_HARDWARE = 'admin.hardware'
 
 admin_bp = Blueprint('admin', __name__)
@@ -31,16 +35,22 @@ def admin_required(f):
 @admin_required
 def dashboard():
     """Panel principal de administración"""
-    # Estadísticas básicas
-    stats = {
-        'usuarios': User.query.count(),
-        'juegos': Game.query.count(),
-        'hardware': Hardware.query.count(),
-        'ordenes': Order.query.count(),
-        'ordenes_recientes': Order.query.order_by(Order.created_at.desc()).limit(5).all(),
-        'usuarios_recientes': User.query.order_by(User.created_at.desc()).limit(5).all()
-    }
-    return render_template('admin/dashboard.html', stats=stats)
+    # Contadores y series precalculados (catálogo por eventos; actividad por scripts/rollup_admin_stats.py)
+    stats = AdminStat.obtener()
+    serie = AdminDailyStat.serie(DIAS_SERIE)
+    stats.update({
+        'ingresos_periodo': sum(dia['ingresos'] for dia in serie),
+        'ordenes_periodo': sum(dia['ordenes'] for dia in serie),
+        'max_ingresos': max((dia['ingresos'] for dia in serie), default=0),
+        'ordenes_recientes': Order.query.options(selectinload(Order.user)).order_by(Order.id.desc()).limit(5).all(),
+        'usuarios_recientes': User.query.order_by(User.id.desc()).limit(5).all(),
+        # Más vendidos del periodo desde el acumulado de ventas (scripts/rollup_sales.py)
+        'juegos_mas_vendidos': productos_mas_vendidos('game', DIAS_SERIE, 5),
+        'hardware_mas_vendido': productos_mas_vendidos('hardware', DIAS_SERIE, 5),
+        'ventas_por_genero': ventas_por_categoria('game', DIAS_SERIE)[:5],
+        'ventas_por_tipo': ventas_por_categoria('hardware', DIAS_SERIE)[:5],
+    })
+    return render_template('admin/dashboard.html', stats=stats, serie=serie, dias_serie=DIAS_SERIE)
 
 @admin_bp.route('/admin/usuarios')
 @login_required
@@ -102,6 +112,7 @@ def nuevo_juego():
             )
             db.session.add(juego)
             db.session.commit()
+            invalidate_catalog_version()
             flash('Juego creado exitosamente', 'success')
             return redirect(url_for(ADMIN_JUEGOS))
         except Exception as e:
@@ -137,6 +148,7 @@ def editar_juego(game_id):
             game.stock = int(request.form['stock'])
             
             db.session.commit()
+            invalidate_catalog_version()
             flash('Juego actualizado exitosamente', 'success')
             return redirect(url_for(ADMIN_JUEGOS))
         except Exception as e:
@@ -180,6 +192,7 @@ def nuevo_hardware():
             )
             db.session.add(hardware)
             db.session.commit()
+            invalidate_catalog_version()
             flash('Componente creado exitosamente', 'success')
             return redirect(url_for(ADMIN_HARDWARE))
         except Exception as e:
@@ -213,6 +226,7 @@ def editar_hardware(hardware_id):
             component.stock = int(request.form['stock'])
             
             db.session.commit()
+            invalidate_catalog_version()
             flash('Componente actualizado exitosamente', 'success')
             return redirect(url_for(ADMIN_HARDWARE))
         except Exception as e:
@@ -225,7 +239,7 @@ def editar_hardware(hardware_id):
 @admin_required
 def ordenes():
     """Gestión de órdenes"""
-    orders = Order.query.order_by(Order.created_at.desc()).all()
+    orders = Order.query.options(selectinload(Order.user)).order_by(Order.created_at.desc()).all()
     return render_template('admin/ordenes.html', orders=orders)
 
 @admin_bp.route('/admin/orden/<int:order_id>')
@@ -233,7 +247,9 @@ def ordenes():
 @admin_required
 def ver_orden(order_id):
     """Ver detalles de una orden"""
-    order = Order.query.get_or_404(order_id)
+    order = Order.con_items(order_id)
+    if order is None:
+        abort(404)
     return render_template('admin/orden_detalle.html', order=order)
 
 @admin_bp.route('/admin/orden/<int:order_id>/estado', methods=['POST'])
@@ -267,6 +283,7 @@ def eliminar_juego(game_id):
         
         db.session.delete(game)
         db.session.commit()
+        invalidate_catalog_version()
         flash('Juego eliminado exitosamente', 'success')
     except Exception as e:
         flash(f'Error al eliminar juego: {str(e)}', 'danger')
@@ -288,6 +305,7 @@ def eliminar_hardware(hardware_id):
         
         db.session.delete(component)
         db.session.commit()
+        invalidate_catalog_version()
         flash('Componente eliminado exitosamente', 'success')
     except Exception as e:
         flash(f'Error al eliminar componente: {str(e)}', 'danger')
@@ -2,31 +2,34 @@
 """
 Controlador del carrito de compras
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, abort, current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from flask_wtf.csrf import CSRFProtect
 from database import db
-from models.database_models import CartItem, Game, Hardware, Order, OrderItem
+from models.database_models import CartItem, Game, Hardware, Order, StockReservation
+from utils.cart_loader import load_cart, cargar_productos, nombre_producto
+from utils import session_cart
+from utils.idempotency import idempotente
+from utils.checkout_admission import con_admision, estado_turno
+from utils.rate_limiter import limiter
+from utils.trending import registrar_evento
 
 PRODUCTO_ELIMINADO = 'Producto eliminado del carrito'
 STOCK_INSUFICIENTE = 'Stock insuficiente'
 VER_CARRITO = 'cart.ver_carrito'
+ORDENES_POR_PAGINA = 10
 
 cart_bp = Blueprint('cart', __name__)
 
 @cart_bp.route('/carrito')
-@login_required
 def ver_carrito():
-    """Ver el carrito de compras"""
-    cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
-    
-    # Calcular total
-    total = sum(item.get_subtotal() for item in cart_items)
+    """Ver el carrito de compras (en sesión para visitantes anónimos)"""
+    cart = cargar_carrito_actual()
     
-    return render_template('cart/carrito.html', cart_items=cart_items, total=total)
+    return render_template('cart/carrito.html', cart_items=cart.lines, faltantes=cart.faltantes, total=cart.total)
 
 @cart_bp.route('/carrito/agregar', methods=['POST'])
-@login_required
+@idempotente
 def agregar_al_carrito():
     """Agregar producto al carrito"""
     # CSRF está manejado automáticamente por Flask-WTF
@@ -47,13 +50,24 @@ def agregar_al_carrito():
     if not product:
         return responder_error('Producto no encontrado', 404)
 
-    # Validar stock
-    if product.stock < quantity:
+    # Validar stock (sin contar las unidades reservadas por otros)
+    if product.disponible < quantity:
         return responder_error(STOCK_INSUFICIENTE, 400)
+    registrar_evento('carrito', product_type, product_id)
+
+    # Visitantes anónimos: carrito en la sesión, sin escribir en la base de datos
+    if not current_user.is_authenticated:
+        try:
+            return responder_exito(session_cart.agregar(product_type, product_id, quantity, product.disponible))
+        except ValueError as e:
+            return responder_error(str(e), 400)
 
     # Agregar o actualizar carrito
     try:
-        message = actualizar_carrito(product_type, product_id, quantity)
+        message, cantidad = actualizar_carrito(product_type, product_id, quantity)
+        if not reservar_stock(product_type, product_id, cantidad):
+            db.session.rollback()
+            return responder_error(STOCK_INSUFICIENTE, 400)
         db.session.commit()
         return responder_exito(message)
     except Exception as e:
@@ -61,6 +75,125 @@ def agregar_al_carrito():
         print(f"Error al agregar al carrito: {e}")
         return responder_error(f'Error al agregar al carrito: {str(e)}', 500)
 
+# Líneas por petición de /carrito/agregar-varios como máximo
+MAX_ITEMS_LOTE = 20
+
+@cart_bp.route('/carrito/agregar-varios', methods=['POST'])
+@idempotente
+def agregar_varios_al_carrito():
+    """
+    Agregar varios productos al carrito en una sola transacción (p. ej. una
+    configuración completa del configurador de PC).
+
+    JSON: {"items": [{"product_type": "hardware", "product_id": 3, "quantity": 1}, ...]}
+    Si algún producto no existe o no tiene stock, no se agrega ninguno.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        cantidades = agrupar_items(data.get('items'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    # Una consulta por tipo de producto y una para el carrito actual
+    productos = cargar_productos(cantidades.keys())
+    if current_user.is_authenticated:
+        existentes = {
+            (item.product_type, item.product_id): item
+            for item in CartItem.query.filter_by(user_id=current_user.id).all()
+        }
+    else:
+        existentes = {(item.product_type, item.product_id): item for item in session_cart.obtener_items()}
+
+    errores = []
+    for clave, cantidad in cantidades.items():
+        product = productos.get(clave)
+        if not product:
+            errores.append(f'Producto no encontrado: {clave[0]} {clave[1]}')
+            continue
+        en_carrito = existentes[clave].quantity if clave in existentes else 0
+        if current_user.is_authenticated:
+            # Lo que ya está en el carrito está reservado por el propio usuario
+            sin_stock = product.stock < en_carrito + cantidad or product.disponible < cantidad
+        else:
+            sin_stock = product.disponible < en_carrito + cantidad
+        if sin_stock:
+            errores.append(f'{STOCK_INSUFICIENTE}: {nombre_producto(product)}')
+    if errores:
+        return jsonify({'success': False, 'message': errores[0], 'errores': errores}), 400
+
+    if not current_user.is_authenticated:
+        if len(existentes) + sum(1 for clave in cantidades if clave not in existentes) > session_cart.MAX_LINEAS_SESION:
+            return jsonify({'success': False, 'message': 'Tu carrito está lleno. Inicia sesión para agregar más productos.'}), 400
+        for (product_type, product_id), cantidad in cantidades.items():
+            session_cart.agregar(product_type, product_id, cantidad)
+        return jsonify({
+            'success': True,
+            'message': f'Productos agregados al carrito: {len(cantidades)}',
+            'cart_count': session_cart.contar()
+        })
+
+    try:
+        for (product_type, product_id), cantidad in sorted(cantidades.items()):
+            if (product_type, product_id) in existentes:
+                existentes[(product_type, product_id)].quantity += cantidad
+                cantidad = existentes[(product_type, product_id)].quantity
+            else:
+                db.session.add(CartItem(
+                    user_id=current_user.id,
+                    product_type=product_type,
+                    product_id=product_id,
+                    quantity=cantidad
+                ))
+            if not reservar_stock(product_type, product_id, cantidad):
+                db.session.rollback()
+                return jsonify({'success': False, 'message': STOCK_INSUFICIENTE}), 400
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al agregar al carrito: {e}")
+        return jsonify({'success': False, 'message': f'Error al agregar al carrito: {str(e)}'}), 500
+
+    nuevos = sum(1 for clave in cantidades if clave not in existentes)
+    return jsonify({
+        'success': True,
+        'message': f'Productos agregados al carrito: {len(cantidades)}',
+        'cart_count': len(existentes) + nuevos
+    })
+
+def agrupar_items(items):
+    """
+    Validar las líneas recibidas y sumar cantidades repetidas.
+
+    Returns:
+        dict (product_type, product_id) -> cantidad
+
+    Raises:
+        ValueError: si alguna línea es inválida
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError('No se recibieron productos')
+    if len(items) > MAX_ITEMS_LOTE:
+        raise ValueError(f'Máximo {MAX_ITEMS_LOTE} productos por petición')
+
+    cantidades = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('Formato de producto inválido')
+        product_type = item.get('product_type')
+        error = validar_tipo_producto(product_type)
+        if error:
+            raise ValueError(error)
+        try:
+            product_id = int(item.get('product_id'))
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise ValueError('Producto o cantidad inválidos')
+        if quantity <= 0:
+            raise ValueError('La cantidad debe ser mayor que cero')
+        clave = (product_type, product_id)
+        cantidades[clave] = cantidades.get(clave, 0) + quantity
+    return cantidades
+
 def validar_tipo_producto(product_type):
     """Valida que el tipo de producto sea válido."""
     if product_type not in ['game', 'hardware']:
@@ -76,7 +209,7 @@ def obtener_producto(product_type, product_id):
     return None
 
 def actualizar_carrito(product_type, product_id, quantity):
-    """Agrega o actualiza un producto en el carrito del usuario."""
+    """Agrega o actualiza un producto en el carrito del usuario (mensaje, cantidad total)."""
     existing_item = CartItem.query.filter_by(
         user_id=current_user.id,
         product_type=product_type,
@@ -85,7 +218,7 @@ def actualizar_carrito(product_type, product_id, quantity):
 
     if existing_item:
         existing_item.quantity += quantity
-        return 'Cantidad actualizada en el carrito'
+        return 'Cantidad actualizada en el carrito', existing_item.quantity
     
     nuevo_item = CartItem(
         user_id=current_user.id,
@@ -94,7 +227,20 @@ def actualizar_carrito(product_type, product_id, quantity):
         quantity=quantity
     )
     db.session.add(nuevo_item)
-    return 'Producto agregado al carrito'
+    return 'Producto agregado al carrito', quantity
+
+def reservar_stock(product_type, product_id, cantidad):
+    """
+    Fijar la reserva del usuario para un producto con la cantidad del carrito
+    (sólo si las reservas de stock están activadas).
+
+    Returns:
+        False si no hay unidades disponibles para reservar
+    """
+    if not current_app.config.get('STOCK_RESERVATIONS'):
+        return True
+    return StockReservation.ajustar(current_user.id, product_type, product_id, cantidad,
+                                    current_app.config['RESERVATION_TTL_MINUTES'])
 
 def responder_error(mensaje, codigo_http):
     """Devuelve respuesta de error en JSON o HTML según el tipo de petición"""
@@ -106,15 +252,28 @@ def responder_error(mensaje, codigo_http):
 def responder_exito(mensaje):
     """Devuelve respuesta de éxito en JSON o HTML según el tipo de petición"""
     if request.is_json:
-        cart_count = CartItem.query.filter_by(user_id=current_user.id).count()
-        return jsonify({'success': True, 'message': mensaje, 'cart_count': cart_count})
+        return jsonify({'success': True, 'message': mensaje, 'cart_count': contar_carrito()})
     flash(mensaje, 'success')
     return redirect(request.referrer or url_for('index'))
 
+def cargar_carrito_actual():
+    """CartView del usuario autenticado o del carrito en sesión"""
+    if current_user.is_authenticated:
+        return load_cart(current_user.id)
+    return load_cart(None, items=session_cart.obtener_items())
+
+def contar_carrito():
+    """Líneas del carrito actual (contador del usuario o carrito en sesión)"""
+    if current_user.is_authenticated:
+        return current_user.cart_count
+    return session_cart.contar()
+
 @cart_bp.route('/carrito/actualizar/<int:item_id>', methods=['POST'])
-@login_required
 def actualizar_cantidad(item_id):
     """Actualizar cantidad de un item en el carrito"""
+    if not current_user.is_authenticated:
+        return actualizar_cantidad_sesion(item_id)
+    
     cart_item = CartItem.query.get_or_404(item_id)
     
     # Verificar que el item pertenece al usuario
@@ -125,24 +284,55 @@ def actualizar_cantidad(item_id):
     quantity = int(request.form.get('quantity', 1))
     
     if quantity <= 0:
+        reservar_stock(cart_item.product_type, cart_item.product_id, 0)
         db.session.delete(cart_item)
         flash(PRODUCTO_ELIMINADO, 'info')
     else:
         # Verificar stock
         product = cart_item.get_product()
-        if product and product.stock >= quantity:
+        if product and product.stock >= quantity and reservar_stock(cart_item.product_type, cart_item.product_id, quantity):
             cart_item.quantity = quantity
             flash('Cantidad actualizada', 'success')
         else:
+            db.session.rollback()
             flash(STOCK_INSUFICIENTE, 'danger')
     
     db.session.commit()
     return redirect(url_for(VER_CARRITO))
 
+def actualizar_cantidad_sesion(item_id):
+    """Actualizar cantidad de un item del carrito en sesión"""
+    item = session_cart.obtener(item_id)
+    if item is None:
+        flash('Producto no encontrado en el carrito', 'danger')
+        return redirect(url_for(VER_CARRITO))
+    
+    quantity = int(request.form.get('quantity', 1))
+    
+    if quantity <= 0:
+        session_cart.eliminar(item_id)
+        flash(PRODUCTO_ELIMINADO, 'info')
+    else:
+        # Verificar stock
+        product = obtener_producto(item.product_type, item.product_id)
+        if product and product.disponible >= quantity:
+            session_cart.actualizar(item_id, quantity)
+            flash('Cantidad actualizada', 'success')
+        else:
+            flash(STOCK_INSUFICIENTE, 'danger')
+    
+    return redirect(url_for(VER_CARRITO))
+
 @cart_bp.route('/carrito/eliminar/<int:item_id>', methods=['POST'])
-@login_required
 def eliminar_del_carrito(item_id):
     """Eliminar un item del carrito"""
+    if not current_user.is_authenticated:
+        session_cart.eliminar(item_id)
+        if request.is_json:
+            return jsonify({'success': True, 'message': PRODUCTO_ELIMINADO, 'cart_count': session_cart.contar()})
+        flash(PRODUCTO_ELIMINADO, 'success')
+        return redirect(url_for(VER_CARRITO))
+    
     cart_item = CartItem.query.get_or_404(item_id)
     
     # Verificar que el item pertenece al usuario
@@ -152,6 +342,7 @@ def eliminar_del_carrito(item_id):
         flash('No tienes permiso para eliminar este item', 'danger')
         return redirect(url_for(VER_CARRITO))
     
+    reservar_stock(cart_item.product_type, cart_item.product_id, 0)
     db.session.delete(cart_item)
     db.session.commit()
     
@@ -159,86 +350,67 @@ def eliminar_del_carrito(item_id):
         return jsonify({
             'success': True,
             'message': PRODUCTO_ELIMINADO,
-            'cart_count': CartItem.query.filter_by(user_id=current_user.id).count()
+            'cart_count': current_user.cart_count
         })
     
     flash(PRODUCTO_ELIMINADO, 'success')
     return redirect(url_for(VER_CARRITO))
 
 @cart_bp.route('/carrito/vaciar', methods=['POST'])
-@login_required
 def vaciar_carrito():
     """Vaciar todo el carrito"""
-    CartItem.query.filter_by(user_id=current_user.id).delete()
-    db.session.commit()
+    if current_user.is_authenticated:
+        if current_app.config.get('STOCK_RESERVATIONS'):
+            StockReservation.liberar_usuario(current_user.id)
+        CartItem.vaciar_carrito(current_user.id)
+        db.session.commit()
+    else:
+        session_cart.vaciar()
     
     flash('Carrito vaciado', 'info')
     return redirect(url_for(VER_CARRITO))
 
 @cart_bp.route('/carrito/checkout', methods=['GET', 'POST'])
 @login_required
+@con_admision
+@idempotente
 def checkout():
     """Proceso de checkout"""
-    cart_items = CartItem.query.filter_by(user_id=current_user.id).all()
+    cart = load_cart(current_user.id)
     
-    if not cart_items:
+    if not cart:
         flash('Tu carrito está vacío', 'warning')
         return redirect(url_for(VER_CARRITO))
     
     if request.method == 'POST':
-        # Calcular total
-        total = sum(item.get_subtotal() for item in cart_items)
+        if cart.faltantes:
+            flash('Algunos productos de tu carrito ya no están disponibles', 'danger')
+            return redirect(url_for(VER_CARRITO))
         
-        # Crear orden
-        order = Order(
-            user_id=current_user.id,
-            total=total,
-            status='completed'
-        )
-        db.session.add(order)
-        db.session.flush()  # Para obtener el ID de la orden
-        
-        # Crear items de la orden y actualizar stock
-        for cart_item in cart_items:
-            product = cart_item.get_product()
-            
-            if not product or product.stock < cart_item.quantity:
-                db.session.rollback()
-                flash(f'Stock insuficiente para {product.nombre if hasattr(product, "nombre") else product.modelo}', 'danger')
-                return redirect(url_for(VER_CARRITO))
-            
-            # Crear item de orden
-            order_item = OrderItem(
-                order_id=order.id,
-                product_type=cart_item.product_type,
-                product_id=cart_item.product_id,
-                product_name=product.nombre if hasattr(product, 'nombre') else f"{product.marca} {product.modelo}",
-                quantity=cart_item.quantity,
-                price=product.precio
-            )
-            db.session.add(order_item)
-            
-            # Actualizar stock
-            product.stock -= cart_item.quantity
-        
-        # Vaciar carrito
-        CartItem.query.filter_by(user_id=current_user.id).delete()
-        
-        db.session.commit()
+        # Descontar stock con UPDATE condicionales y crear la orden en una transacción
+        order, error = Order.crear_desde_carrito(current_user.id, cart.lines)
+        if error:
+            flash(error, 'danger')
+            return redirect(url_for(VER_CARRITO))
         
         flash(f'¡Compra realizada con éxito! Orden #{order.id}', 'success')
         return redirect(url_for('cart.orden_confirmada', order_id=order.id))
     
-    # Calcular total para mostrar
-    total = sum(item.get_subtotal() for item in cart_items)
-    
-    return render_template('cart/checkout.html', cart_items=cart_items, total=total)
+    return render_template('cart/checkout.html', cart_items=cart.lines, total=cart.total)
+
+@cart_bp.route('/api/checkout/turno')
+@limiter.exempt
+def estado_sala_espera():
+    """Estado de la sala de espera del checkout (consultado periódicamente, sin base de datos)"""
+    return jsonify(estado_turno())
 
 @cart_bp.route('/orden/<int:order_id>')
 @login_required
 def orden_confirmada(order_id):
     """Página de confirmación de orden"""
-    order = Order.query.get_or_404(order_id)
+    order = Order.con_items(order_id)
+    if order is None:
+        abort(404)
     
     # Verificar que la orden pertenece al usuario
     if order.user_id != current_user.id:
@@ -251,9 +423,11 @@ def orden_confirmada(order_id):
 @login_required
 def mis_ordenes():
     """Ver historial de órdenes del usuario"""
+    page = request.args.get('page', 1, type=int)
     try:
-        orders = Order.query.filter_by(user_id=current_user.id).order_by(Order.created_at.desc()).all()
-        return render_template('cart/mis_ordenes.html', orders=orders)
+        # Una consulta para el total y otra para la página: el resumen evita leer los items
+        pagination = Order.historial(current_user.id, page=page, per_page=ORDENES_POR_PAGINA)
+        return render_template('cart/mis_ordenes.html', orders=pagination.items, pagination=pagination)
     except Exception as e:
         flash(f'Error al cargar órdenes: {str(e)}', 'danger')
         return redirect(url_for('index'))
@@ -262,5 +436,4 @@ def mis_ordenes():
 @login_required
 def cart_count():
     """API para obtener la cantidad de items en el carrito"""
-    count = CartItem.query.filter_by(user_id=current_user.id).count()
-    return jsonify({'count': count})
+    return jsonify({'count': current_user.cart_count})
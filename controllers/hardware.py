@@ -1,5 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
 from models.database_models import Hardware, Game
+from utils.search_index import get_search_index
+from utils.json_cache import descongelar
+from utils.hardware_comparison import comparar_componentes
+from utils.compatibility_graph import get_compatibility_graph
+from utils.build_solver import get_build_solver, objetivo_para_juegos
 
 hardware_bp = Blueprint('hardware', __name__)
 
@@ -33,21 +38,88 @@ def hardware_por_categoria(categoria):
 
     return render_template('hardware_category.html', componentes=componentes, categoria=categoria)
 
+# Secciones del configurador (tipo canónico -> clave usada en la página)
+TIPOS_CONFIGURADOR = {'CPU': 'CPU', 'GPU': 'GPU', 'RAM': 'RAM', 'MOTHERBOARD': 'Motherboard', 'PSU': 'PSU'}
+
 @hardware_bp.route('/configurador-pc')
 def configurador_pc():
     """Página del configurador de PC interactivo"""
-    hardware = Hardware.get_all_hardware()
+    grafo = get_compatibility_graph()
+    ids = [hardware_id for hardware_id, nodo in grafo.nodos.items() if nodo.tipo in TIPOS_CONFIGURADOR]
 
-    # Organizar por categorías para el configurador
-    categorias = {
-        'CPU': [h for h in hardware if h.tipo == 'CPU'],
-        'GPU': [h for h in hardware if h.tipo == 'GPU'],
-        'RAM': [h for h in hardware if h.tipo == 'RAM'],
-        'Motherboard': [h for h in hardware if h.tipo == 'Motherboard']
-    }
+    # Organizar por categorías para el configurador (una sola consulta)
+    categorias = {clave: [] for clave in TIPOS_CONFIGURADOR.values()}
+    for componente in Hardware.get_hardware_by_ids(ids):
+        categorias[TIPOS_CONFIGURADOR[grafo.nodos[componente.id].tipo]].append(componente)
 
     return render_template('pc_builder.html', categorias=categorias)
 
+@hardware_bp.route('/api/hardware/compatibles')
+def api_compatibles_hardware():
+    """
+    API con los componentes de un tipo compatibles con la configuración parcial
+
+    Ejemplo:
+        /api/hardware/compatibles?tipo=Motherboard&cpu=3&ram=7
+    """
+    tipo = request.args.get('tipo')
+    if not tipo:
+        return jsonify({'error': 'Parámetro tipo requerido', 'resultados': []}), 400
+
+    build = {}
+    for clave in ('cpu', 'gpu', 'ram', 'motherboard', 'psu'):
+        hardware_id = request.args.get(clave, type=int)
+        if hardware_id:
+            build[clave] = hardware_id
+
+    grafo = get_compatibility_graph()
+    ids = grafo.compatibles(tipo, build)
+    resultados = sorted(Hardware.get_hardware_by_ids(ids), key=lambda h: (h.precio, h.id))
+
+    return jsonify({
+        'resultados': [componente.to_dict() for componente in resultados],
+        'total': len(resultados),
+        'problemas': grafo.verificar(build)
+    })
+
+@hardware_bp.route('/api/hardware/mejor-configuracion')
+def api_mejor_configuracion():
+    """
+    API con las mejores configuraciones para un presupuesto
+
+    Ejemplo:
+        /api/hardware/mejor-configuracion?presupuesto=1200&juegos=3,5&nivel=recomendado
+    """
+    presupuesto = request.args.get('presupuesto', type=float)
+    if not presupuesto or presupuesto <= 0:
+        return jsonify({'error': 'Parámetro presupuesto requerido', 'configuraciones': []}), 400
+
+    try:
+        juego_ids = [int(j) for j in request.args.get('juegos', '').split(',') if j.strip()]
+        objetivo = objetivo_para_juegos(juego_ids, request.args.get('nivel', 'recomendado'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'configuraciones': []}), 400
+
+    builds = get_build_solver().solve(presupuesto, objetivo, limite=request.args.get('limite', 3, type=int))
+
+    # Cargar todas las piezas de todas las configuraciones con una sola consulta
+    ids = {build[tipo] for build in builds for tipo in TIPOS_CONFIGURADOR if build[tipo]}
+    componentes = {h.id: h.to_dict() for h in Hardware.get_hardware_by_ids(ids)}
+
+    configuraciones = [{
+        'componentes': {clave: componentes.get(build[tipo]) for tipo, clave in TIPOS_CONFIGURADOR.items()
+                        if build[tipo]},
+        'precio_total': build['precio_total'],
+        'puntuacion': build['puntuacion'],
+        'perdida_cuello_botella': build['perdida']
+    } for build in builds]
+
+    return jsonify({
+        'configuraciones': configuraciones,
+        'total': len(configuraciones),
+        'objetivo': objetivo._asdict()
+    })
+
 @hardware_bp.route('/api/hardware/tipos')
 def api_tipos_hardware():
     """API para obtener tipos de hardware disponibles"""
@@ -64,6 +136,12 @@ def api_buscar_hardware():
         current_app.logger.info('API buscar hardware llamado')
         
         resultados = Hardware.buscar_hardware(query)
+        if not resultados and query:
+            # Coincidencias aproximadas desde el índice ortográfico
+            claves = get_search_index().search(query)
+            resultados = Hardware.get_hardware_by_ids(
+                product_id for product_type, product_id in claves if product_type == 'hardware'
+            )
         current_app.logger.info(f'Resultados encontrados: {len(resultados)}')
 
         hardware_data = []
@@ -77,7 +155,7 @@ def api_buscar_hardware():
                     'precio': componente.precio,
                     'descripcion': componente.descripcion,
                     'imagen': componente.imagen,
-                    'especificaciones': componente.get_especificaciones(),
+                    'especificaciones': descongelar(componente.get_especificaciones()),
                     'stock': componente.stock
                 })
             except Exception as e:
@@ -90,49 +168,54 @@ def api_buscar_hardware():
         current_app.logger.error(f'Error en api_buscar_hardware: {str(e)}')
         return jsonify({'error': str(e), 'resultados': []}), 500
 
+# Parámetros de /api/hardware/filtrar que no son especificaciones
+FILTRO_PARAMS_RESERVADOS = {'tipo', 'precio_min', 'precio_max', 'en_stock', 'orden', 'limite'}
+
+@hardware_bp.route('/api/hardware/filtrar')
+def api_filtrar_hardware():
+    """
+    API para filtrar hardware por especificaciones tipadas
+
+    Ejemplos:
+        /api/hardware/filtrar?tipo=GPU&vram_min=12&precio_max=600
+        /api/hardware/filtrar?tipo=CPU&nucleos_min=8&socket=AM5&orden=-frecuencia_boost
+    """
+    filtros = []
+    for param, valor in request.args.items():
+        if param in FILTRO_PARAMS_RESERVADOS or valor == '':
+            continue
+        if param.endswith('_min'):
+            filtros.append((param[:-4], '>=', valor))
+        elif param.endswith('_max'):
+            filtros.append((param[:-4], '<=', valor))
+        else:
+            filtros.append((param, '=', valor))
+
+    try:
+        resultados = Hardware.filtrar_por_specs(
+            tipo=request.args.get('tipo'),
+            filtros=filtros,
+            precio_min=request.args.get('precio_min', type=float),
+            precio_max=request.args.get('precio_max', type=float),
+            en_stock=request.args.get('en_stock') in ('1', 'true'),
+            orden=request.args.get('orden'),
+            limite=min(request.args.get('limite', 50, type=int), 200)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e), 'resultados': []}), 400
+
+    return jsonify({
+        'resultados': [componente.to_dict() for componente in resultados],
+        'total': len(resultados)
+    })
+
 @hardware_bp.route('/comparar-hardware', methods=['POST'])
 def comparar_hardware():
     """Comparar componentes de hardware seleccionados"""
-    data = request.get_json()
-    componentes_ids = data.get('componentes', [])
-
-    componentes = []
-    for cid in componentes_ids:
-        componente = Hardware.get_hardware_by_id(cid)
-        if componente:
-            componentes.append(componente)
+    data = request.get_json(silent=True) or {}
+    comparacion = comparar_componentes(data.get('componentes', []))
 
-    if not componentes:
+    if not comparacion:
         return jsonify({'error': 'No se encontraron componentes para comparar'}), 400
 
-    # Crear tabla de comparación
-    comparacion = {
-        'componentes': [],
-        'caracteristicas': {}
-    }
-
-    caracteristicas_comunes = set()
-    for componente in componentes:
-        comp_data = {
-            'id': componente.id,
-            'tipo': componente.tipo,
-            'marca': componente.marca,
-            'modelo': componente.modelo,
-            'precio': componente.precio,
-            'imagen': componente.imagen
-        }
-        comparacion['componentes'].append(comp_data)
-
-        # Agregar especificaciones
-        caracteristicas_comunes.update(componente.get_especificaciones().keys())
-
-    caracteristicas_comunes = sorted(caracteristicas_comunes)
-
-    # Crear matriz de comparación
-    for caracteristica in caracteristicas_comunes:
-        comparacion['caracteristicas'][caracteristica] = {}
-        for componente in componentes:
-            valor = componente.get_especificaciones().get(caracteristica, 'N/A')
-            comparacion['caracteristicas'][caracteristica][componente.id] = valor
-
     return jsonify(comparacion)
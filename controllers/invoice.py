@@ -7,7 +7,9 @@ from flask_login import login_required, current_user
 from flask_mail import Message
 from extensions import db
 from models.database_models import Invoice, Order, User
+from sqlalchemy.orm import selectinload
 from utils.invoice_generator_colombia import InvoiceGeneratorColombia as InvoiceGenerator
+from utils.idempotency import idempotente
 import os
 from datetime import datetime
 
@@ -19,6 +21,7 @@ invoice_bp = Blueprint('invoice', __name__)
 
 @invoice_bp.route('/factura/solicitar/<int:order_id>', methods=['GET', 'POST'])
 @login_required
+@idempotente
 def solicitar_factura(order_id):
     """Solicitar factura para una orden"""
     order = Order.query.get_or_404(order_id)
@@ -149,7 +152,9 @@ def _traceback_log():
 @login_required
 def ver_factura(invoice_id):
     """Ver detalles de una factura"""
-    invoice = Invoice.query.get_or_404(invoice_id)
+    invoice = Invoice.query.options(
+        selectinload(Invoice.order).selectinload(Order.items)
+    ).filter_by(id=invoice_id).first_or_404()
     
     # Verificar que la factura pertenece al usuario
     if invoice.user_id != current_user.id and not current_user.is_admin:
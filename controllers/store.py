@@ -1,9 +1,28 @@
 from flask import Blueprint, render_template, request, jsonify
-from models.database_models import Game, Hardware
+from models.database_models import Game, Hardware, PriceHistory
 from models.compatibility import Compatibility
+from utils.search_index import get_search_index
+from utils.co_purchase import tambien_compraron
+from utils.view_counter import registrar_vista, vistas
+from utils.trending import registrar_evento
+from utils import recently_viewed
+
+DIAS_RANGO_PRECIO = 90   # Mínimo y máximo mostrados en el detalle
+DIAS_BAJADA_PRECIO = 30  # "Antes $X" si el precio bajó en este periodo
 
 store_bp = Blueprint('store', __name__)
 
+def resumen_precio(product_type, producto):
+    """Mínimo y máximo recientes y precio anterior si bajó (desde price_history)"""
+    minimo, maximo, antes = PriceHistory.resumen(product_type, producto.id, producto.precio,
+                                                 DIAS_RANGO_PRECIO, DIAS_BAJADA_PRECIO)
+    return {
+        'minimo': minimo,
+        'maximo': maximo,
+        'antes': antes,
+        'dias': DIAS_RANGO_PRECIO,
+    }
+
 @store_bp.route('/tienda')
 def tienda():
     """Página principal de la tienda con paginación"""
@@ -57,11 +76,19 @@ def juego_detalle(juego_id):
     juego = Game.get_game_by_id(juego_id)
     if not juego:
         return render_template('404.html'), 404
+    registrar_vista('game', juego.id)
+    registrar_evento('vista', 'game', juego.id)
+    vistos_recientemente = recently_viewed.productos_recientes(excluir=('game', juego.id), limite=4)
+    recently_viewed.registrar('game', juego.id)
 
     # Obtener juegos relacionados (mismo género)
     juegos_relacionados = [j for j in Game.get_all_games() if j.genero == juego.genero and j.id != juego.id][:3]
 
-    return render_template('game_detail.html', juego=juego, juegos_relacionados=juegos_relacionados)
+    return render_template('game_detail.html', juego=juego, juegos_relacionados=juegos_relacionados,
+                           tambien_comprados=tambien_compraron('game', juego.id),
+                           vistas=vistas('game', juego.id),
+                           vistos_recientemente=vistos_recientemente,
+                           precio=resumen_precio('game', juego))
 
 @store_bp.route('/hardware/<int:hardware_id>')
 def hardware_detalle(hardware_id):
@@ -69,11 +96,17 @@ def hardware_detalle(hardware_id):
     componente = Hardware.get_hardware_by_id(hardware_id)
     if not componente:
         return render_template('404.html'), 404
+    registrar_vista('hardware', componente.id)
+    registrar_evento('vista', 'hardware', componente.id)
+    recently_viewed.registrar('hardware', componente.id)
 
     # Obtener hardware relacionado (mismo tipo)
     hardware_relacionado = [h for h in Hardware.get_all_hardware() if h.tipo == componente.tipo and h.id != componente.id][:3]
 
-    return render_template('hardware_detail.html', componente=componente, hardware_relacionado=hardware_relacionado)
+    return render_template('hardware_detail.html', componente=componente, hardware_relacionado=hardware_relacionado,
+                           tambien_comprados=tambien_compraron('hardware', componente.id),
+                           vistas=vistas('hardware', componente.id),
+                           precio=resumen_precio('hardware', componente))
 
 @store_bp.route('/consultar-compatibilidad', methods=['POST'])
 def consultar_compatibilidad():
@@ -141,9 +174,22 @@ def buscar():
     # Buscar en hardware
     hardware_resultados = Hardware.buscar_hardware(query)
 
+    # Sin resultados exactos: corregir la consulta con el índice ortográfico
+    sugerencia = None
+    if not juegos_resultados and not hardware_resultados:
+        indice = get_search_index()
+        sugerencia = indice.suggest(query)
+        juegos_resultados, hardware_resultados = cargar_coincidencias(indice.search(query))
+
     resultados = {
         'juegos': juegos_resultados,
         'hardware': hardware_resultados
     }
 
-    return render_template('search.html', resultados=resultados, query=query)
+    return render_template('search.html', resultados=resultados, query=query, sugerencia=sugerencia)
+
+def cargar_coincidencias(claves):
+    """Cargar los productos de las claves del índice con una consulta por tipo"""
+    juegos_ids = [product_id for product_type, product_id in claves if product_type == 'game']
+    hardware_ids = [product_id for product_type, product_id in claves if product_type == 'hardware']
+    return Game.get_games_by_ids(juegos_ids), Hardware.get_hardware_by_ids(hardware_ids)
@@ -59,11 +59,10 @@ def agregar():
     )
     
     if success:
-        wishlist_count = Wishlist.query.filter_by(user_id=current_user.id).count()
         return jsonify({
             'success': True,
             'message': message,
-            'wishlist_count': wishlist_count
+            'wishlist_count': current_user.wishlist_count
         })
     else:
         return jsonify({
@@ -91,12 +90,10 @@ def remover():
         product_type
     )
     
-    wishlist_count = Wishlist.query.filter_by(user_id=current_user.id).count()
-    
     return jsonify({
         'success': success,
         'message': message,
-        'wishlist_count': wishlist_count
+        'wishlist_count': current_user.wishlist_count
     })
 
 @wishlist_bp.route('/check/<product_type>/<int:product_id>')
@@ -117,5 +114,4 @@ def check(product_type, product_id):
 @login_required
 def count():
     """Obtener cantidad de items en wishlist"""
-    count = Wishlist.query.filter_by(user_id=current_user.id).count()
-    return jsonify({'count': count})
+    return jsonify({'count': current_user.wishlist_count})
@@ -0,0 +1,44 @@
+"""
+Migración: Agregar tablas de estadísticas del panel de administración
+Agrega: admin_stats (contadores) y admin_daily_stats (serie diaria) y las inicializa
+Ejecutar: python migrations/add_admin_stats.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import AdminStat, AdminDailyStat
+
+def run_migration():
+    """Crear las tablas de estadísticas y calcular sus valores iniciales"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Estadísticas del Panel de Administración")
+            print("="*60)
+            
+            print("\n📝 Creando tablas...")
+            AdminStat.__table__.create(db.engine, checkfirst=True)
+            AdminDailyStat.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tablas 'admin_stats' y 'admin_daily_stats' listas")
+            
+            print("\n🔢 Calculando estadísticas actuales...")
+            valores = AdminStat.reconciliar()
+            print(f"  ✓ {valores}")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,46 @@
+"""
+Migración: Agregar tabla de pares de co-compras
+Agrega: co_purchase_pairs y genera la matriz de "también compraron" con las órdenes existentes
+Ejecutar: python migrations/add_co_purchase_pairs.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import JobCheckpoint, CoPurchasePair
+from utils.co_purchase import actualizar_matriz
+
+def run_migration():
+    """Crear la tabla de pares y procesar las órdenes existentes"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Matriz de Co-compras")
+            print("="*60)
+            
+            print("\n📝 Creando tablas...")
+            JobCheckpoint.__table__.create(db.engine, checkfirst=True)
+            CoPurchasePair.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla 'co_purchase_pairs' lista")
+            
+            print("\n🔢 Procesando órdenes existentes...")
+            procesadas, productos = actualizar_matriz()
+            print(f"  ✓ {procesadas} órdenes, {productos} productos con vecinos")
+            print(f"  ✓ Matriz guardada en {app.config['CO_PURCHASE_PATH']}")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
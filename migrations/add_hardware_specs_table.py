@@ -0,0 +1,47 @@
+"""
+Migración: Crear tabla hardware_specs (atributos tipados de especificaciones)
+y poblarla con el hardware existente
+Ejecutar: python migrations/add_hardware_specs_table.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import Hardware, HardwareSpec
+
+def run_migration():
+    """Crear la tabla hardware_specs con sus índices y poblarla"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Crear Tabla hardware_specs")
+            print("="*60)
+            print()
+            
+            print("📝 Creando tabla 'hardware_specs' e índices...")
+            HardwareSpec.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla lista")
+            
+            print("\n📝 Poblando atributos desde especificaciones existentes...")
+            componentes = Hardware.query.all()
+            with db.engine.begin() as connection:
+                for componente in componentes:
+                    HardwareSpec.sincronizar(connection, componente)
+            print(f"  ✓ {len(componentes)} componentes procesados")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,39 @@
+"""
+Migración: Agregar tabla de claves de idempotencia
+Agrega: tabla idempotency_keys (respuestas guardadas de checkout, carrito y facturas)
+Ejecutar: python migrations/add_idempotency_keys.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import IdempotencyKey
+
+def run_migration():
+    """Crear la tabla idempotency_keys"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Claves de Idempotencia")
+            print("="*60)
+            
+            print("\n📝 Creando tabla 'idempotency_keys'...")
+            IdempotencyKey.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla 'idempotency_keys' lista")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
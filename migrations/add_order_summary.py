@@ -0,0 +1,74 @@
+"""
+Migración: Agregar resumen desnormalizado a las órdenes
+Agrega: item_count, resumen_items a la tabla orders y los calcula para las órdenes existentes
+Ejecutar: python migrations/add_order_summary.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from sqlalchemy import text, inspect
+from sqlalchemy.orm import selectinload
+from models.database_models import Order
+
+COLUMNAS = {
+    'item_count': 'INTEGER NOT NULL DEFAULT 0',
+    'resumen_items': 'TEXT',
+}
+LOTE = 500
+
+def run_migration():
+    """Agregar las columnas del resumen y calcularlo por lotes"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Resumen de Órdenes")
+            print("="*60)
+            
+            existentes = {col['name'] for col in inspect(db.engine).get_columns('orders')}
+            
+            print("\n📝 Agregando columnas a la tabla 'orders'...")
+            for columna, tipo in COLUMNAS.items():
+                if columna in existentes:
+                    print(f"  ⏭️  Columna '{columna}' ya existe")
+                    continue
+                db.session.execute(text(f"ALTER TABLE orders ADD COLUMN {columna} {tipo}"))
+                print(f"  ✓ Columna '{columna}' agregada")
+            db.session.commit()
+            
+            print("\n🔢 Calculando resúmenes...")
+            ultimo_id, total = 0, 0
+            while True:
+                orders = (Order.query.options(selectinload(Order.items))
+                          .filter(Order.id > ultimo_id, Order.resumen_items.is_(None))
+                          .order_by(Order.id).limit(LOTE).all())
+                if not orders:
+                    break
+                filas = []
+                for order in orders:
+                    item_count, resumen_items = Order.calcular_resumen(order.items)
+                    # updated_at se conserva: el resumen no es una modificación de la orden
+                    filas.append({'id': order.id, 'item_count': item_count,
+                                  'resumen_items': resumen_items, 'updated_at': order.updated_at})
+                db.session.execute(db.update(Order), filas)
+                db.session.commit()
+                ultimo_id = orders[-1].id
+                total += len(orders)
+            print(f"  ✓ {total} órdenes actualizadas")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
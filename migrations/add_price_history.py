@@ -0,0 +1,38 @@
+"""
+Migración: Agregar tabla de historial de precios
+Agrega: price_history (una fila por cambio de precio de juegos y hardware)
+Ejecutar: python migrations/add_price_history.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import PriceHistory
+
+def run_migration():
+    """Crear la tabla del historial de precios"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Historial de Precios")
+            print("="*60)
+            
+            print("\n📝 Creando tabla...")
+            PriceHistory.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla 'price_history' lista (los cambios se registran desde ahora)")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
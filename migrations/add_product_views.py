@@ -0,0 +1,38 @@
+"""
+Migración: Agregar tabla de visitas de productos
+Agrega: product_views (visitas por producto, escritas en lote por utils/view_counter.py)
+Ejecutar: python migrations/add_product_views.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import ProductView
+
+def run_migration():
+    """Crear la tabla de visitas"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Visitas de Productos")
+            print("="*60)
+            
+            print("\n📝 Creando tabla...")
+            ProductView.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla 'product_views' lista")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
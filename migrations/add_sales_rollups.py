@@ -0,0 +1,47 @@
+"""
+Migración: Agregar tablas de ventas acumuladas
+Agrega: job_checkpoints (marcas de agua), product_sales_daily y category_sales_daily,
+y acumula las órdenes existentes
+Ejecutar: python migrations/add_sales_rollups.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import JobCheckpoint, ProductSalesDaily, CategorySalesDaily
+from utils.sales_rollup import acumular_ventas
+
+def run_migration():
+    """Crear las tablas del acumulado de ventas y procesar las órdenes existentes"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Acumulado de Ventas")
+            print("="*60)
+            
+            print("\n📝 Creando tablas...")
+            JobCheckpoint.__table__.create(db.engine, checkfirst=True)
+            ProductSalesDaily.__table__.create(db.engine, checkfirst=True)
+            CategorySalesDaily.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tablas 'job_checkpoints', 'product_sales_daily' y 'category_sales_daily' listas")
+            
+            print("\n🔢 Acumulando órdenes existentes...")
+            procesadas = acumular_ventas()
+            print(f"  ✓ {procesadas} órdenes acumuladas")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,58 @@
+"""
+Migración: Agregar reservas temporales de stock
+Agrega: columna reservado a games y hardware, y la tabla stock_reservations
+Ejecutar: python migrations/add_stock_reservations.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from sqlalchemy import text, inspect
+from models.database_models import StockReservation
+
+TABLAS = ('games', 'hardware')
+
+def run_migration():
+    """Agregar la columna reservado y crear la tabla de reservas"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Reservas de Stock")
+            print("="*60)
+            
+            inspector = inspect(db.engine)
+            
+            print("\n📝 Agregando columna 'reservado'...")
+            for tabla in TABLAS:
+                if 'reservado' in {col['name'] for col in inspector.get_columns(tabla)}:
+                    print(f"  ⏭️  Columna '{tabla}.reservado' ya existe")
+                    continue
+                db.session.execute(text(f"""
+                    ALTER TABLE {tabla} 
+                    ADD COLUMN reservado INTEGER NOT NULL DEFAULT 0
+                """))
+                print(f"  ✓ Columna '{tabla}.reservado' agregada")
+            db.session.commit()
+            
+            print("\n📝 Creando tabla 'stock_reservations'...")
+            StockReservation.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla 'stock_reservations' lista")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            print("\nActivar con STOCK_RESERVATIONS=True y programar")
+            print("scripts/release_expired_reservations.py")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,38 @@
+"""
+Migración: Agregar tabla de sketches de tendencias
+Agrega: trending_sketches (Count-Min sketch por intervalo y worker, ver utils/trending.py)
+Ejecutar: python migrations/add_trending_sketches.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from models.database_models import TrendingSketch
+
+def run_migration():
+    """Crear la tabla de sketches de tendencias"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Productos en Tendencia")
+            print("="*60)
+            
+            print("\n📝 Creando tabla...")
+            TrendingSketch.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tabla 'trending_sketches' lista")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,56 @@
+"""
+Migración: Agregar contadores desnormalizados de carrito y wishlist
+Agrega: cart_count, wishlist_count a la tabla users y los inicializa
+Ejecutar: python migrations/add_user_counters.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from sqlalchemy import text, inspect
+from models.database_models import User
+
+COLUMNAS = ('cart_count', 'wishlist_count')
+
+def run_migration():
+    """Agregar las columnas de contadores y calcular sus valores iniciales"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Contadores de Carrito y Wishlist")
+            print("="*60)
+            
+            existentes = {col['name'] for col in inspect(db.engine).get_columns('users')}
+            
+            print("\n📝 Agregando columnas a la tabla 'users'...")
+            for columna in COLUMNAS:
+                if columna in existentes:
+                    print(f"  ⏭️  Columna '{columna}' ya existe")
+                    continue
+                db.session.execute(text(f"""
+                    ALTER TABLE users 
+                    ADD COLUMN {columna} INTEGER NOT NULL DEFAULT 0
+                """))
+                print(f"  ✓ Columna '{columna}' agregada")
+            db.session.commit()
+            
+            print("\n🔢 Calculando contadores actuales...")
+            corregidos = User.reconciliar_contadores()
+            print(f"  ✓ {corregidos} usuarios actualizados")
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,75 @@
+"""
+Migración: Avisos de la lista de deseos
+Agrega: tabla stock_events, columna posicion en job_checkpoints e índice
+idx_wishlist_product, e inicia los cursores de avisos en el último evento
+(los cambios anteriores a la migración no se notifican)
+Ejecutar: python migrations/add_wishlist_notifications.py
+"""
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from sqlalchemy import text, inspect
+from models.database_models import JobCheckpoint, PriceHistory, StockEvent, Wishlist
+from utils.wishlist_notifier import FUENTES
+
+def run_migration():
+    """Crear las tablas, la columna y el índice, e iniciar los cursores"""
+    with app.app_context():
+        try:
+            print("="*60)
+            print("MIGRACIÓN: Avisos de la Lista de Deseos")
+            print("="*60)
+            
+            print("\n📝 Creando tablas...")
+            JobCheckpoint.__table__.create(db.engine, checkfirst=True)
+            PriceHistory.__table__.create(db.engine, checkfirst=True)
+            StockEvent.__table__.create(db.engine, checkfirst=True)
+            print("  ✓ Tablas 'stock_events', 'price_history' y 'job_checkpoints' listas")
+            
+            inspector = inspect(db.engine)
+            print("\n📝 Agregando columna 'posicion' a 'job_checkpoints'...")
+            if 'posicion' in {col['name'] for col in inspector.get_columns('job_checkpoints')}:
+                print("  ⏭️  Columna 'posicion' ya existe")
+            else:
+                db.session.execute(text("""
+                    ALTER TABLE job_checkpoints 
+                    ADD COLUMN posicion INTEGER NOT NULL DEFAULT 0
+                """))
+                db.session.commit()
+                print("  ✓ Columna 'posicion' agregada")
+            
+            print("\n📝 Creando índice de wishlist por producto...")
+            if 'idx_wishlist_product' in {idx['name'] for idx in inspector.get_indexes('wishlist')}:
+                print("  ⏭️  Índice 'idx_wishlist_product' ya existe")
+            else:
+                for indice in Wishlist.__table__.indexes:
+                    if indice.name == 'idx_wishlist_product':
+                        indice.create(db.engine)
+                print("  ✓ Índice 'idx_wishlist_product' creado")
+            
+            print("\n🔢 Iniciando cursores de avisos...")
+            for fuente, nombre in FUENTES.items():
+                modelo = PriceHistory if fuente == 'bajada' else StockEvent
+                checkpoint = JobCheckpoint.bloquear(nombre)
+                if checkpoint.ultimo_id == 0:
+                    checkpoint.ultimo_id = (db.session.query(db.func.max(modelo.id)).scalar() or 0) + 1
+                print(f"  ✓ {nombre}: desde el evento {checkpoint.ultimo_id}")
+            db.session.commit()
+            
+            print("\n" + "="*60)
+            print("✅ MIGRACIÓN COMPLETADA EXITOSAMENTE")
+            print("="*60)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ ERROR durante la migración: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == '__main__':
+    run_migration()
@@ -2,12 +2,15 @@
 Modelos de base de datos usando SQLAlchemy
 """
 from database import db
-from datetime import datetime
+from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, event, select
+from sqlalchemy.orm import selectinload
+from utils.json_cache import parse_json_field, descongelar, EMPTY
 import json
 
 CASCADE = 'all, delete-orphan'
+RESUMEN_ITEMS = 3  # Items guardados en el resumen de cada orden
 USERS_ID = 'users.id'
 
 class User(db.Model):
@@ -36,11 +39,34 @@ class User(db.Model):
     codigo_postal = db.Column(db.String(10), nullable=True)
     regimen_fiscal = db.Column(db.String(100), nullable=True)
     
+    # Contadores desnormalizados para el navbar (los mantienen los eventos de CartItem y Wishlist)
+    cart_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    wishlist_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relaciones
     cart_items = db.relationship('CartItem', backref='user', lazy='dynamic', cascade=CASCADE)
     orders = db.relationship('Order', backref='user', lazy='dynamic', cascade=CASCADE)
     invoices = db.relationship('Invoice', backref='user', lazy='dynamic', cascade=CASCADE)
     
+    @classmethod
+    def reconciliar_contadores(cls):
+        """
+        Recalcular cart_count y wishlist_count desde las tablas (repara desvíos).
+
+        Returns:
+            número de usuarios corregidos
+        """
+        carrito = select(db.func.count(CartItem.id)).where(CartItem.user_id == cls.id).scalar_subquery()
+        deseos = select(db.func.count(Wishlist.id)).where(Wishlist.user_id == cls.id).scalar_subquery()
+        resultado = db.session.execute(
+            db.update(cls)
+            .where(or_(cls.cart_count != carrito, cls.wishlist_count != deseos))
+            .values(cart_count=carrito, wishlist_count=deseos)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return resultado.rowcount
+    
     def set_password(self, password):
         """Establecer contraseña hasheada"""
         self.password_hash = generate_password_hash(password)
@@ -79,16 +105,19 @@ class Game(db.Model):
     requisitos_minimos = db.Column(db.Text)  # JSON string
     requisitos_recomendados = db.Column(db.Text)  # JSON string
     stock = db.Column(db.Integer, default=0)
+    reservado = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Reservas activas
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def get_requisitos_minimos(self):
-        """Obtener requisitos mínimos como dict"""
-        return json.loads(self.requisitos_minimos) if self.requisitos_minimos else {}
+        """Obtener requisitos mínimos como mapping de solo lectura (cacheado)"""
+        return parse_json_field('games', 'requisitos_minimos', self.id, self.updated_at,
+                                self.requisitos_minimos)
     
     def get_requisitos_recomendados(self):
-        """Obtener requisitos recomendados como dict"""
-        return json.loads(self.requisitos_recomendados) if self.requisitos_recomendados else {}
+        """Obtener requisitos recomendados como mapping de solo lectura (cacheado)"""
+        return parse_json_field('games', 'requisitos_recomendados', self.id, self.updated_at,
+                                self.requisitos_recomendados)
     
     @classmethod
     def get_all_games(cls):
@@ -100,27 +129,42 @@ class Game(db.Model):
         """Obtener un juego por id"""
         return cls.query.get(game_id)
     
+    @classmethod
+    def get_games_by_ids(cls, game_ids):
+        """Obtener varios juegos con una sola consulta, en el orden de los ids"""
+        game_ids = list(game_ids)
+        if not game_ids:
+            return []
+        juegos = {j.id: j for j in cls.query.filter(cls.id.in_(game_ids)).all()}
+        return [juegos[gid] for gid in game_ids if gid in juegos]
+    
+    @classmethod
+    def search_games(cls, query):
+        """Buscar juegos"""
+        search = f"%{query}%"
+        return cls.query.filter(
+            or_(
+                cls.nombre.ilike(search),
+                cls.descripcion.ilike(search),
+                cls.genero.ilike(search),
+                cls.desarrollador.ilike(search)
+            )
+        ).all()
+    
     @classmethod
     def get_games_by_hardware(cls, hardware_specs):
-        """Obtener juegos compatibles con el hardware especificado usando el sistema de compatibilidad"""
+        """
+        Obtener juegos compatibles con el hardware especificado usando el sistema de compatibilidad
+
+        Los valores de hardware_specs pueden ser dicts de especificaciones o
+        nombres libres ("RTX 4060", "16 GB"), que se resuelven contra el catálogo.
+        """
         from models.compatibility import Compatibility
 
-        juegos = cls.get_all_games()
+        componentes = Hardware.resolver_componentes(hardware_specs)
         juegos_compatibles = []
 
-        for juego in juegos:
-            # Convertir hardware_specs a objetos Hardware para compatibilidad
-            componentes = []
-            for tipo, specs in hardware_specs.items():
-                # Crear un objeto Hardware temporal para la comparación
-                componente = Hardware(
-                    tipo=tipo.upper(),
-                    marca=specs.get('marca', ''),
-                    modelo=specs.get('modelo', ''),
-                    especificaciones=json.dumps(specs)
-                )
-                componentes.append(componente)
-
+        for juego in cls.get_all_games():
             # Verificar compatibilidad usando el sistema existente
             resultado = Compatibility.verificar_compatibility_completa([juego], componentes)
             if resultado['compatible']:
@@ -139,11 +183,17 @@ class Game(db.Model):
             'genero': self.genero,
             'desarrollador': self.desarrollador,
             'fecha_lanzamiento': self.fecha_lanzamiento.isoformat() if self.fecha_lanzamiento else None,
-            'requisitos_minimos': self.get_requisitos_minimos(),
-            'requisitos_recomendados': self.get_requisitos_recomendados(),
-            'stock': self.stock
+            'requisitos_minimos': descongelar(self.get_requisitos_minimos()),
+            'requisitos_recomendados': descongelar(self.get_requisitos_recomendados()),
+            'stock': self.stock,
+            'disponible': self.disponible
         }
     
+    @property
+    def disponible(self):
+        """Stock menos las reservas activas"""
+        return max((self.stock or 0) - (self.reservado or 0), 0)
+    
     def __repr__(self):
         return f'<Game {self.nombre}>'
 
@@ -161,6 +211,7 @@ class Hardware(db.Model):
     imagen = db.Column(db.String(300))
     especificaciones = db.Column(db.Text)  # JSON string
     stock = db.Column(db.Integer, default=0)
+    reservado = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Reservas activas
     
     # Campos para análisis de rendimiento
     benchmark_score = db.Column(db.Integer, default=0)
@@ -177,14 +228,13 @@ class Hardware(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def get_especificaciones(self):
-        """Obtener especificaciones como dict"""
-        if not self.especificaciones:
-            return {}
+        """Obtener especificaciones como mapping de solo lectura (cacheado por fila y updated_at)"""
         try:
-            return json.loads(self.especificaciones)
+            return parse_json_field('hardware', 'especificaciones', self.id, self.updated_at,
+                                    self.especificaciones)
         except (TypeError, ValueError) as e:
             print(f"Error parsing especificaciones for {self.id}: {e}")
-            return {}
+            return EMPTY
     
     def get_ram_capacity_gb(self):
         """Extraer capacidad de RAM en GB"""
@@ -222,6 +272,51 @@ class Hardware(db.Model):
         """Obtener hardware por ID"""
         return cls.query.get(hardware_id)
     
+    @classmethod
+    def get_hardware_by_ids(cls, hardware_ids):
+        """Obtener varios componentes con una sola consulta, en el orden de los ids"""
+        hardware_ids = list(hardware_ids)
+        if not hardware_ids:
+            return []
+        componentes = {h.id: h for h in cls.query.filter(cls.id.in_(hardware_ids)).all()}
+        return [componentes[hid] for hid in hardware_ids if hid in componentes]
+    
+    @classmethod
+    def resolver_componentes(cls, hardware_specs):
+        """
+        Convertir especificaciones de usuario en objetos Hardware para compatibilidad.
+
+        Los nombres libres de CPU/GPU se resuelven contra el catálogo con el
+        índice de nombres en memoria; lo que no se resuelve se representa con
+        un objeto Hardware temporal (no se guarda en la base de datos).
+        """
+        from utils.hardware_resolver import resolve_hardware
+
+        componentes = []
+        resueltos = []
+        for tipo, specs in hardware_specs.items():
+            if not specs:
+                continue
+            tipo = tipo.upper()
+            if isinstance(specs, dict):
+                componentes.append(cls(
+                    tipo=tipo,
+                    marca=specs.get('marca', ''),
+                    modelo=specs.get('modelo', ''),
+                    especificaciones=json.dumps(specs)
+                ))
+            elif tipo == 'RAM':
+                componentes.append(cls(tipo=tipo, marca='', modelo=str(specs),
+                                       especificaciones=json.dumps({'capacidad': str(specs)})))
+            else:
+                match = resolve_hardware(specs, tipo)
+                if match:
+                    resueltos.append(match.hardware_id)
+                else:
+                    componentes.append(cls(tipo=tipo, marca='', modelo=str(specs)))
+
+        return cls.get_hardware_by_ids(resueltos) + componentes
+    
     @classmethod
     def buscar_hardware(cls, query):
         """Buscar hardware"""
@@ -235,6 +330,77 @@ class Hardware(db.Model):
             )
         ).all()
     
+    @classmethod
+    def filtrar_por_specs(cls, tipo=None, filtros=None, precio_min=None, precio_max=None,
+                          en_stock=False, orden=None, limite=None):
+        """
+        Filtrar hardware por atributos tipados de sus especificaciones.
+
+        Cada filtro se resuelve con una subconsulta sobre hardware_specs que
+        usa los índices (clave, valor_num) o (clave, valor_texto).
+
+        Args:
+            tipo: Tipo de componente ('GPU', 'CPU'...)
+            filtros: Lista de tuplas (clave, operador, valor); operadores
+                '>=', '<=', '>', '<' (numéricos) y '=' (número o texto)
+            orden: 'precio_asc', 'precio_desc', '<clave>' o '-<clave>'
+
+        Example:
+            Hardware.filtrar_por_specs('GPU', [('vram', '>=', 12)], precio_max=600)
+        """
+        from utils.spec_parser import normalizar_clave, normalizar_texto, parsear_valor
+
+        query = cls.query
+        if tipo:
+            query = query.filter(cls.tipo == tipo)
+        if precio_min is not None:
+            query = query.filter(cls.precio >= precio_min)
+        if precio_max is not None:
+            query = query.filter(cls.precio <= precio_max)
+        if en_stock:
+            query = query.filter(cls.stock > 0)
+
+        comparadores = {
+            '>=': lambda col, v: col >= v,
+            '<=': lambda col, v: col <= v,
+            '>': lambda col, v: col > v,
+            '<': lambda col, v: col < v,
+            '=': lambda col, v: col == v,
+        }
+        for clave, operador, valor in filtros or []:
+            if operador not in comparadores:
+                raise ValueError(f'Operador no soportado: {operador}')
+            clave = normalizar_clave(clave)
+            # Valores con unidad ("3600 MHz") se llevan a la unidad canónica guardada
+            numero, unidad, _ = parsear_valor(valor) if isinstance(valor, str) else (None, None, None)
+            try:
+                condicion = comparadores[operador](HardwareSpec.valor_num, numero if unidad else float(valor))
+            except (TypeError, ValueError):
+                if operador != '=':
+                    raise ValueError(f'Valor numérico inválido para {clave}: {valor}')
+                condicion = HardwareSpec.valor_texto == normalizar_texto(valor)
+            query = query.filter(cls.id.in_(
+                select(HardwareSpec.hardware_id).where(HardwareSpec.clave == clave, condicion)
+            ))
+
+        if orden == 'precio_asc':
+            query = query.order_by(cls.precio.asc())
+        elif orden == 'precio_desc':
+            query = query.order_by(cls.precio.desc())
+        elif orden:
+            descendente = orden.startswith('-')
+            clave = normalizar_clave(orden.lstrip('-'))
+            spec_orden = db.aliased(HardwareSpec)
+            query = query.outerjoin(
+                spec_orden, and_(spec_orden.hardware_id == cls.id, spec_orden.clave == clave)
+            )
+            columna = spec_orden.valor_num
+            query = query.order_by(columna.is_(None), columna.desc() if descendente else columna.asc())
+
+        if limite:
+            query = query.limit(limite)
+        return query.all()
+    
     def to_dict(self):
         """Convertir a diccionario"""
         return {
@@ -245,14 +411,80 @@ class Hardware(db.Model):
             'precio': self.precio,
             'descripcion': self.descripcion,
             'imagen': self.imagen,
-            'especificaciones': self.get_especificaciones(),
-            'stock': self.stock
+            'especificaciones': descongelar(self.get_especificaciones()),
+            'stock': self.stock,
+            'disponible': self.disponible
         }
     
+    @property
+    def disponible(self):
+        """Stock menos las reservas activas"""
+        return max((self.stock or 0) - (self.reservado or 0), 0)
+    
     def __repr__(self):
         return f'<Hardware {self.marca} {self.modelo}>'
 
 
+class HardwareSpec(db.Model):
+    """Atributo tipado de las especificaciones de un componente (para filtros numéricos)"""
+    __tablename__ = 'hardware_specs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hardware_id = db.Column(db.Integer, db.ForeignKey('hardware.id', ondelete='CASCADE'), nullable=False, index=True)
+    clave = db.Column(db.String(50), nullable=False)
+    valor_num = db.Column(db.Float)          # 2.5 para "2.5 GHz"
+    unidad = db.Column(db.String(20))        # GHz, GB, W...
+    valor_texto = db.Column(db.String(200))  # Texto normalizado ("lga1700")
+    
+    __table_args__ = (
+        db.Index('idx_hardware_specs_clave_num', 'clave', 'valor_num'),
+        db.Index('idx_hardware_specs_clave_texto', 'clave', 'valor_texto'),
+    )
+    
+    @classmethod
+    def sincronizar(cls, connection, hardware):
+        """Reemplazar los atributos de un componente usando la conexión de la transacción en curso"""
+        from utils.spec_parser import atributos_desde_hardware
+        
+        connection.execute(cls.__table__.delete().where(cls.hardware_id == hardware.id))
+        atributos = atributos_desde_hardware(hardware)
+        if atributos:
+            for atributo in atributos:
+                atributo['hardware_id'] = hardware.id
+            connection.execute(cls.__table__.insert(), atributos)
+    
+    def __repr__(self):
+        return f'<HardwareSpec {self.hardware_id} {self.clave}={self.valor_num or self.valor_texto}>'
+
+
+# Columnas de Hardware que alimentan hardware_specs
+_SPEC_SOURCE_COLUMNS = ('especificaciones', 'vram_gb', 'cores', 'threads', 'tdp_watts', 'socket')
+
+
+@event.listens_for(Hardware, 'after_insert')
+def _hardware_specs_insert(mapper, connection, target):
+    """Poblar hardware_specs al crear un componente"""
+    HardwareSpec.sincronizar(connection, target)
+
+
+@event.listens_for(Hardware, 'after_update')
+def _hardware_specs_update(mapper, connection, target):
+    """Actualizar hardware_specs sólo si cambió alguna columna de origen"""
+    estado = db.inspect(target)
+    if any(estado.attrs[col].history.has_changes() for col in _SPEC_SOURCE_COLUMNS):
+        HardwareSpec.sincronizar(connection, target)
+
+
+@event.listens_for(Hardware, 'before_delete')
+def _hardware_specs_delete(mapper, connection, target):
+    """Eliminar los atributos del componente (SQLite no aplica ON DELETE CASCADE por defecto)"""
+    connection.execute(HardwareSpec.__table__.delete().where(HardwareSpec.hardware_id == target.id))
+
+
+# Modelos de producto por product_type (carrito, órdenes, wishlist)
+PRODUCT_MODELS = {'game': Game, 'hardware': Hardware}
+
+
 class CartItem(db.Model):
     """Modelo de item en el carrito"""
     __tablename__ = 'cart_items'
@@ -272,6 +504,12 @@ class CartItem(db.Model):
             return Hardware.query.get(self.product_id)
         return None
     
+    @classmethod
+    def vaciar_carrito(cls, user_id):
+        """Eliminar todos los items del carrito del usuario y poner su contador a cero"""
+        cls.query.filter_by(user_id=user_id).delete()
+        User.query.filter_by(id=user_id).update({'cart_count': 0})
+    
     def get_subtotal(self):
         """Calcular subtotal"""
         product = self.get_product()
@@ -283,6 +521,131 @@ class CartItem(db.Model):
         return f'<CartItem {self.product_type}:{self.product_id}>'
 
 
+class StockReservation(db.Model):
+    """
+    Reserva temporal de stock de un producto del carrito.
+
+    La suma de las reservas de cada producto se mantiene en la columna
+    reservado de games/hardware, así la disponibilidad (stock - reservado)
+    se lee de la propia fila del producto.
+    """
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_type', 'product_id', name='uq_reserva_usuario_producto'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(USERS_ID), nullable=False, index=True)
+    product_type = db.Column(db.String(20), nullable=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def reservar_unidades(product_type, product_id, cantidad):
+        """Sumar unidades a reservado si hay disponibilidad (UPDATE condicional)"""
+        tabla = PRODUCT_MODELS[product_type].__table__
+        resultado = db.session.execute(
+            tabla.update()
+            .where(tabla.c.id == product_id, tabla.c.stock - tabla.c.reservado >= cantidad)
+            .values(reservado=tabla.c.reservado + cantidad, updated_at=tabla.c.updated_at)
+        )
+        return resultado.rowcount == 1
+    
+    @staticmethod
+    def liberar_unidades(cantidades):
+        """Restar unidades de reservado (dict (product_type, product_id) -> cantidad)"""
+        for product_type, modelo in sorted(PRODUCT_MODELS.items()):
+            filas = [{'b_id': product_id, 'b_cantidad': cantidad}
+                     for (tipo, product_id), cantidad in sorted(cantidades.items())
+                     if tipo == product_type and cantidad > 0]
+            if not filas:
+                continue
+            tabla = modelo.__table__
+            db.session.execute(
+                tabla.update()
+                .where(tabla.c.id == db.bindparam('b_id'))
+                .values(reservado=db.case((tabla.c.reservado > db.bindparam('b_cantidad'),
+                                           tabla.c.reservado - db.bindparam('b_cantidad')), else_=0),
+                        updated_at=tabla.c.updated_at),
+                filas
+            )
+    
+    @classmethod
+    def _tomar(cls, *criterios):
+        """
+        Eliminar reservas (DELETE ... RETURNING) y devolver las unidades por producto.
+
+        Sólo quien elimina la fila descuenta sus unidades, así el checkout, el
+        carrito y el barrido no pueden liberar dos veces la misma reserva.
+        """
+        tabla = cls.__table__
+        filas = db.session.execute(
+            tabla.delete().where(*criterios)
+            .returning(tabla.c.product_type, tabla.c.product_id, tabla.c.quantity)
+        ).all()
+        cantidades = {}
+        for product_type, product_id, quantity in filas:
+            clave = (product_type, product_id)
+            cantidades[clave] = cantidades.get(clave, 0) + quantity
+        return cantidades, len(filas)
+    
+    @classmethod
+    def ajustar(cls, user_id, product_type, product_id, cantidad, ttl_minutos):
+        """
+        Fijar la reserva del usuario para un producto y renovar su vencimiento.
+
+        Returns:
+            False si no hay disponibilidad (el llamador debe hacer rollback)
+        """
+        clave = (product_type, product_id)
+        reservadas, _ = cls._tomar(cls.user_id == user_id, cls.product_type == product_type,
+                                   cls.product_id == product_id)
+        diferencia = cantidad - reservadas.get(clave, 0)
+        if diferencia > 0 and not cls.reservar_unidades(product_type, product_id, diferencia):
+            return False
+        if diferencia < 0:
+            cls.liberar_unidades({clave: -diferencia})
+        if cantidad > 0:
+            db.session.add(cls(user_id=user_id, product_type=product_type, product_id=product_id,
+                               quantity=cantidad, expires_at=datetime.utcnow() + timedelta(minutes=ttl_minutos)))
+        return True
+    
+    @classmethod
+    def tomar_de_usuario(cls, user_id):
+        """Eliminar las reservas del usuario sin liberarlas (para convertirlas en venta)"""
+        cantidades, _ = cls._tomar(cls.user_id == user_id)
+        return cantidades
+    
+    @classmethod
+    def liberar_usuario(cls, user_id):
+        """Liberar todas las reservas del usuario"""
+        cls.liberar_unidades(cls.tomar_de_usuario(user_id))
+    
+    @classmethod
+    def liberar_vencidas(cls, lote=500):
+        """
+        Liberar un lote de reservas vencidas.
+
+        Returns:
+            número de reservas liberadas
+        """
+        ahora = datetime.utcnow()
+        ids = [fila.id for fila in db.session.query(cls.id).filter(cls.expires_at <= ahora)
+               .order_by(cls.expires_at).limit(lote).with_for_update(skip_locked=True)]
+        if not ids:
+            return 0
+        # expires_at se vuelve a comprobar: la reserva pudo renovarse entretanto
+        cantidades, liberadas = cls._tomar(cls.id.in_(ids), cls.expires_at <= ahora)
+        cls.liberar_unidades(cantidades)
+        db.session.commit()
+        return liberadas
+    
+    def __repr__(self):
+        return f'<StockReservation {self.product_type}:{self.product_id} x{self.quantity}>'
+
+
 class Order(db.Model):
     """Modelo de orden de compra"""
     __tablename__ = 'orders'
@@ -294,8 +657,151 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relaciones
-    items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade=CASCADE)
+    # Resumen desnormalizado (se escribe en el checkout) para los listados
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    resumen_items = db.Column(db.Text)  # JSON: primeros RESUMEN_ITEMS [nombre, cantidad, subtotal]
+    
+    # Relaciones (cargar con selectinload cuando se necesitan todos los items)
+    items = db.relationship('OrderItem', backref='order', lazy='select', cascade=CASCADE,
+                            order_by='OrderItem.id')
+    
+    @staticmethod
+    def calcular_resumen(items):
+        """
+        Resumen de los items de una orden.
+
+        Args:
+            items: dicts u objetos con product_name, quantity y price
+
+        Returns:
+            (item_count, resumen_items en JSON)
+        """
+        filas = [item if isinstance(item, dict) else
+                 {'product_name': item.product_name, 'quantity': item.quantity, 'price': item.price}
+                 for item in items]
+        resumen = [[f['product_name'], f['quantity'], round(f['price'] * f['quantity'], 2)]
+                   for f in filas[:RESUMEN_ITEMS]]
+        return len(filas), json.dumps(resumen)
+    
+    def get_resumen_items(self):
+        """Primeros items de la orden como tuplas (nombre, cantidad, subtotal) (cacheado)"""
+        return parse_json_field('orders', 'resumen_items', self.id, self.updated_at, self.resumen_items) or ()
+    
+    @classmethod
+    def historial(cls, user_id, page=1, per_page=10):
+        """Página del historial de órdenes de un usuario (sin cargar sus items)"""
+        return (cls.query.filter_by(user_id=user_id)
+                .order_by(cls.created_at.desc(), cls.id.desc())
+                .paginate(page=page, per_page=per_page, error_out=False))
+    
+    @classmethod
+    def con_items(cls, order_id):
+        """Orden con todos sus items cargados en una sola consulta adicional (o None)"""
+        return db.session.get(cls, order_id, options=[selectinload(cls.items)])
+    
+    @staticmethod
+    def descontar_stock(cantidades, reservas=None):
+        """
+        Descontar stock con UPDATE condicionales
+        (stock = stock - q WHERE stock - reservado + h >= q).
+
+        Se procesa por tipo de producto y en orden de id, de modo que todas
+        las transacciones bloquean las filas en el mismo orden (sin
+        interbloqueos). Cada tipo se envía como un único executemany; si
+        alguna fila no se actualiza se repite fila a fila dentro de un
+        savepoint para saber cuáles faltan. updated_at no se modifica: el
+        stock no invalida las cachés del catálogo.
+
+        Args:
+            cantidades: dict (product_type, product_id) -> cantidad
+            reservas: dict (product_type, product_id) -> unidades reservadas
+                por el comprador (h), que se convierten en venta
+
+        Returns:
+            lista de (product_type, product_id) sin stock suficiente; si no
+            está vacía el llamador debe hacer rollback
+        """
+        reservas = reservas or {}
+        sin_stock = []
+        for product_type, modelo in sorted(PRODUCT_MODELS.items()):
+            filas = [{'b_id': product_id, 'b_cantidad': cantidad,
+                      'b_reservado': min(reservas.get((tipo, product_id), 0), cantidad)}
+                     for (tipo, product_id), cantidad in sorted(cantidades.items()) if tipo == product_type]
+            if not filas:
+                continue
+            
+            tabla = modelo.__table__
+            stmt = (
+                tabla.update()
+                .where(tabla.c.id == db.bindparam('b_id'),
+                       tabla.c.stock - tabla.c.reservado + db.bindparam('b_reservado') >= db.bindparam('b_cantidad'))
+                .values(stock=tabla.c.stock - db.bindparam('b_cantidad'),
+                        reservado=tabla.c.reservado - db.bindparam('b_reservado'),
+                        updated_at=tabla.c.updated_at)
+            )
+            
+            if len(filas) > 1 and db.engine.dialect.supports_sane_multi_rowcount:
+                savepoint = db.session.begin_nested()
+                if db.session.execute(stmt, filas).rowcount == len(filas):
+                    savepoint.commit()
+                    continue
+                savepoint.rollback()
+            
+            for fila in filas:
+                if db.session.execute(stmt, fila).rowcount != 1:
+                    sin_stock.append((product_type, fila['b_id']))
+        return sin_stock
+    
+    @classmethod
+    def crear_desde_carrito(cls, user_id, lineas):
+        """
+        Crear una orden completada a partir de las líneas del carrito (CartLine),
+        convirtiendo las reservas del usuario, descontando stock y vaciando el
+        carrito en una sola transacción.
+
+        Returns:
+            (order, None) si se creó, o (None, mensaje de error)
+        """
+        cantidades = {}
+        for line in lineas:
+            clave = (line.product_type, line.product_id)
+            cantidades[clave] = cantidades.get(clave, 0) + line.quantity
+        
+        try:
+            reservas = StockReservation.tomar_de_usuario(user_id)
+            sin_stock = cls.descontar_stock(cantidades, reservas)
+            if sin_stock:
+                db.session.rollback()
+                nombres = {(l.product_type, l.product_id): l.nombre for l in lineas}
+                return None, 'Stock insuficiente para ' + ', '.join(nombres[clave] for clave in sin_stock)
+            
+            # Reservas de productos que ya no están en el carrito (o en exceso)
+            sobrantes = {clave: unidades - cantidades.get(clave, 0) for clave, unidades in reservas.items()
+                         if unidades > cantidades.get(clave, 0)}
+            StockReservation.liberar_unidades(sobrantes)
+            
+            filas = [{
+                'product_type': line.product_type,
+                'product_id': line.product_id,
+                'product_name': line.nombre,
+                'quantity': line.quantity,
+                'price': line.product.precio
+            } for line in lineas]
+            item_count, resumen_items = cls.calcular_resumen(filas)
+            
+            order = cls(user_id=user_id, total=sum(line.subtotal for line in lineas), status='completed',
+                        item_count=item_count, resumen_items=resumen_items)
+            db.session.add(order)
+            db.session.flush()  # Para obtener el ID de la orden
+            
+            db.session.execute(db.insert(OrderItem), [dict(fila, order_id=order.id) for fila in filas])
+            
+            CartItem.vaciar_carrito(user_id)
+            db.session.commit()
+            return order, None
+        except Exception:
+            db.session.rollback()
+            raise
     
     def __repr__(self):
         return f'<Order {self.id} - ${self.total}>'
@@ -535,6 +1041,10 @@ class Wishlist(db.Model):
     product_type = db.Column(db.String(20), nullable=False)  # 'game' or 'hardware'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_wishlist_product', 'product_id', 'product_type'),
+    )
+    
     def to_dict(self):
         """Convertir a diccionario"""
         return {
@@ -589,3 +1099,458 @@ class Wishlist(db.Model):
     
     def __repr__(self):
         return f'<Wishlist User:{self.user_id} Product:{self.product_id} Type:{self.product_type}>'
+
+
+class IdempotencyKey(db.Model):
+    """Respuesta guardada de una petición con clave de idempotencia"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'endpoint', 'clave', name='uq_idempotencia'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(USERS_ID), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    clave = db.Column(db.String(64), nullable=False)
+    huella = db.Column(db.String(64), nullable=False)  # SHA-256 del cuerpo de la petición
+    status_code = db.Column(db.Integer)  # NULL mientras la petición original está en curso
+    location = db.Column(db.String(500))
+    content_type = db.Column(db.String(100))
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    @classmethod
+    def purgar_vencidas(cls, minutos):
+        """Eliminar las claves más antiguas que la ventana de idempotencia"""
+        limite = datetime.utcnow() - timedelta(minutes=minutos)
+        eliminadas = cls.query.filter(cls.created_at < limite).delete(synchronize_session=False)
+        db.session.commit()
+        return eliminadas
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.endpoint}:{self.clave}>'
+
+
+class AdminStat(db.Model):
+    """
+    Contadores del panel de administración. Los del catálogo (juegos, hardware)
+    los mantienen los eventos de inserción y borrado; los de actividad
+    (usuarios, órdenes) los recalcula scripts/rollup_admin_stats.py para no
+    escribir en una fila compartida dentro de cada registro o compra.
+    """
+    __tablename__ = 'admin_stats'
+    
+    clave = db.Column(db.String(50), primary_key=True)  # usuarios, juegos, hardware, ordenes
+    valor = db.Column(db.Integer, nullable=False, default=0)
+    
+    @staticmethod
+    def modelos():
+        """Modelo contado por cada clave"""
+        return {'usuarios': User, 'juegos': Game, 'hardware': Hardware, 'ordenes': Order}
+    
+    # Claves que no mantienen los eventos
+    ACTIVIDAD = ('usuarios', 'ordenes')
+    
+    @classmethod
+    def obtener(cls):
+        """Todos los contadores en una consulta (0 si aún no existen)"""
+        valores = dict.fromkeys(cls.modelos(), 0)
+        valores.update(db.session.query(cls.clave, cls.valor).all())
+        return valores
+    
+    @classmethod
+    def reconciliar(cls, dias=None):
+        """
+        Recalcular los contadores y la serie diaria desde las tablas de origen.
+
+        Args:
+            dias: recalcular sólo los últimos N días de la serie (None = toda)
+
+        Returns:
+            dict con los contadores recalculados
+        """
+        valores = {clave: modelo.query.count() for clave, modelo in cls.modelos().items()}
+        db.session.execute(db.delete(cls))
+        db.session.execute(db.insert(cls), [{'clave': k, 'valor': v} for k, v in valores.items()])
+        AdminDailyStat.reconciliar(dias)
+        db.session.commit()
+        return valores
+    
+    @classmethod
+    def actualizar_actividad(cls, dias=2):
+        """
+        Recalcular los contadores de usuarios y órdenes y los últimos N días de
+        la serie (la ejecución periódica; los contadores del catálogo no se tocan).
+
+        Returns:
+            dict con los contadores recalculados
+        """
+        modelos = cls.modelos()
+        valores = {clave: modelos[clave].query.count() for clave in cls.ACTIVIDAD}
+        db.session.execute(db.delete(cls).where(cls.clave.in_(cls.ACTIVIDAD)))
+        db.session.execute(db.insert(cls), [{'clave': k, 'valor': v} for k, v in valores.items()])
+        AdminDailyStat.reconciliar(dias)
+        db.session.commit()
+        return valores
+    
+    def __repr__(self):
+        return f'<AdminStat {self.clave}={self.valor}>'
+
+
+class AdminDailyStat(db.Model):
+    """Órdenes, ingresos y registros por día (UTC) para las series del panel (los calcula el rollup)"""
+    __tablename__ = 'admin_daily_stats'
+    
+    fecha = db.Column(db.Date, primary_key=True)
+    ordenes = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)  # Sin órdenes canceladas
+    usuarios_nuevos = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def serie(cls, dias=30):
+        """Últimos N días en orden cronológico, con ceros en los días sin actividad"""
+        hoy = datetime.utcnow().date()
+        desde = hoy - timedelta(days=dias - 1)
+        filas = {f.fecha: f for f in cls.query.filter(cls.fecha >= desde)}
+        serie = []
+        for i in range(dias):
+            fecha = desde + timedelta(days=i)
+            fila = filas.get(fecha)
+            serie.append({
+                'fecha': fecha,
+                'ordenes': fila.ordenes if fila else 0,
+                'ingresos': fila.ingresos if fila else 0.0,
+                'usuarios_nuevos': fila.usuarios_nuevos if fila else 0,
+            })
+        return serie
+    
+    @classmethod
+    def reconciliar(cls, dias=None):
+        """Reconstruir la serie (o sus últimos N días) agrupando orders y users por fecha"""
+        desde = datetime.utcnow().date() - timedelta(days=dias - 1) if dias else None
+        
+        def por_dia(columna_fecha, *agregados):
+            dia = db.func.date(columna_fecha)
+            query = db.session.query(dia, *agregados)
+            if desde:
+                query = query.filter(columna_fecha >= datetime.combine(desde, datetime.min.time()))
+            return {_como_fecha(fecha): valores for fecha, *valores in query.group_by(dia)}
+        
+        ordenes = por_dia(Order.created_at, db.func.count(Order.id), db.func.sum(
+            db.case((Order.status != 'cancelled', Order.total), else_=0.0)))
+        usuarios = por_dia(User.created_at, db.func.count(User.id))
+        
+        borrar = db.delete(cls)
+        if desde:
+            borrar = borrar.where(cls.fecha >= desde)
+        db.session.execute(borrar)
+        filas = [{
+            'fecha': fecha,
+            'ordenes': ordenes.get(fecha, (0, 0.0))[0],
+            'ingresos': round(ordenes.get(fecha, (0, 0.0))[1] or 0.0, 2),
+            'usuarios_nuevos': usuarios.get(fecha, (0,))[0],
+        } for fecha in sorted(set(ordenes) | set(usuarios)) if fecha]
+        if filas:
+            db.session.execute(db.insert(cls), filas)
+    
+    def __repr__(self):
+        return f'<AdminDailyStat {self.fecha}>'
+
+
+def _como_fecha(valor):
+    """date desde el resultado de func.date (texto en SQLite, date en PostgreSQL)"""
+    if valor is None or not isinstance(valor, str):
+        return valor
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+class JobCheckpoint(db.Model):
+    """Marca de agua de un trabajo incremental (último id procesado)"""
+    __tablename__ = 'job_checkpoints'
+    
+    nombre = db.Column(db.String(50), primary_key=True)
+    ultimo_id = db.Column(db.Integer, nullable=False, default=0)
+    posicion = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Avance dentro de ultimo_id
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def bloquear(cls, nombre):
+        """
+        Checkpoint del trabajo bloqueado hasta el commit (SELECT ... FOR UPDATE),
+        para que dos ejecuciones simultáneas no procesen lo mismo. Se crea si no existe.
+        """
+        checkpoint = cls.query.filter_by(nombre=nombre).with_for_update().first()
+        if checkpoint is None:
+            checkpoint = cls(nombre=nombre, ultimo_id=0)
+            db.session.add(checkpoint)
+            db.session.flush()
+        return checkpoint
+    
+    def __repr__(self):
+        return f'<JobCheckpoint {self.nombre}={self.ultimo_id}>'
+
+
+class ProductSalesDaily(db.Model):
+    """Ventas por día (UTC) y producto, acumuladas por utils/sales_rollup.py"""
+    __tablename__ = 'product_sales_daily'
+    
+    fecha = db.Column(db.Date, primary_key=True)
+    product_type = db.Column(db.String(20), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)
+    ordenes = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('idx_ventas_producto', 'product_type', 'product_id'),
+    )
+
+
+class CategorySalesDaily(db.Model):
+    """Ventas por día (UTC) y categoría (género del juego o tipo de hardware)"""
+    __tablename__ = 'category_sales_daily'
+    
+    fecha = db.Column(db.Date, primary_key=True)
+    product_type = db.Column(db.String(20), primary_key=True)
+    categoria = db.Column(db.String(50), primary_key=True)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)
+
+
+
+class CoPurchasePair(db.Model):
+    """Veces que dos productos se compraron en la misma orden (se guardan ambos sentidos)"""
+    __tablename__ = 'co_purchase_pairs'
+    
+    product_type = db.Column(db.String(20), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    otro_type = db.Column(db.String(20), primary_key=True)
+    otro_id = db.Column(db.Integer, primary_key=True)
+    veces = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ProductView(db.Model):
+    """Visitas acumuladas a la página de detalle de cada producto (ver utils/view_counter.py)"""
+    __tablename__ = 'product_views'
+    
+    product_type = db.Column(db.String(20), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    vistas = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class TrendingSketch(db.Model):
+    """Sketch de eventos de un worker en un intervalo de tendencias (ver utils/trending.py)"""
+    __tablename__ = 'trending_sketches'
+    
+    bucket = db.Column(db.Integer, primary_key=True)         # Segundos epoch // duración del intervalo
+    worker = db.Column(db.String(80), primary_key=True)      # host:pid
+    sketch = db.Column(db.LargeBinary, nullable=False)       # Tabla del Count-Min sketch
+    candidatos = db.Column(db.Text, nullable=False)          # JSON con las claves del top-k
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PriceHistory(db.Model):
+    """Historial de precios: sólo se agrega una fila cuando el precio cambia"""
+    __tablename__ = 'price_history'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_type = db.Column(db.String(20), nullable=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    cambiado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    precio_anterior = db.Column(db.Float, nullable=False)
+    precio = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_historial_precio', 'product_type', 'product_id', 'cambiado_en'),
+    )
+    
+    @classmethod
+    def _del_producto(cls, product_type, product_id):
+        return cls.query.filter(cls.product_type == product_type, cls.product_id == product_id)
+    
+    @classmethod
+    def precio_en(cls, product_type, product_id, fecha, precio_actual):
+        """
+        Precio vigente en una fecha: el último cambio hasta esa fecha o, si no
+        hubo ninguno, el precio anterior al primer cambio posterior. Cada caso
+        es una búsqueda en el índice (O(log n)).
+        """
+        fila = cls._del_producto(product_type, product_id).filter(cls.cambiado_en <= fecha).order_by(
+            cls.cambiado_en.desc(), cls.id.desc()).first()
+        if fila:
+            return fila.precio
+        siguiente = cls._del_producto(product_type, product_id).filter(cls.cambiado_en > fecha).order_by(
+            cls.cambiado_en, cls.id).first()
+        return siguiente.precio_anterior if siguiente else precio_actual
+    
+    @classmethod
+    def resumen(cls, product_type, product_id, precio_actual, dias_rango, dias_bajada):
+        """
+        Mínimo y máximo de los últimos `dias_rango` días y precio de hace
+        `dias_bajada` días si el actual es menor, con una sola consulta: se
+        recorre el índice hacia atrás desde el cambio más reciente hasta el
+        primero anterior a la ventana. Sin historial es una búsqueda vacía.
+
+        Returns:
+            (mínimo, máximo, precio anterior o None)
+        """
+        ahora = datetime.utcnow()
+        desde = ahora - timedelta(days=dias_rango)
+        fecha_bajada = ahora - timedelta(days=dias_bajada)
+
+        en_ventana, inicial, en_bajada, mas_antigua = [], None, None, None
+        for cambiado_en, precio_anterior, precio in (
+                cls._del_producto(product_type, product_id)
+                .with_entities(cls.cambiado_en, cls.precio_anterior, cls.precio)
+                .order_by(cls.cambiado_en.desc(), cls.id.desc()).yield_per(50)):
+            if en_bajada is None and cambiado_en <= fecha_bajada:
+                en_bajada = precio
+            if cambiado_en <= desde:
+                inicial = precio
+                break
+            en_ventana.append(precio)
+            mas_antigua = precio_anterior
+        if inicial is None:
+            # Ningún cambio antes de la ventana: el precio era el anterior al primer cambio
+            inicial = mas_antigua if mas_antigua is not None else precio_actual
+        if en_bajada is None:
+            # Todos los cambios son posteriores a fecha_bajada: el precio de entonces es el inicial
+            en_bajada = inicial
+        valores = [inicial, precio_actual] + en_ventana
+        return min(valores), max(valores), (en_bajada if precio_actual < en_bajada else None)
+    
+    @classmethod
+    def serie(cls, product_type, product_id, dias):
+        """Cambios de los últimos N días en orden cronológico (para gráficos)"""
+        desde = datetime.utcnow() - timedelta(days=dias)
+        return cls._del_producto(product_type, product_id).filter(cls.cambiado_en > desde).order_by(
+            cls.cambiado_en, cls.id).all()
+    
+    def __repr__(self):
+        return f'<PriceHistory {self.product_type}:{self.product_id} {self.precio_anterior}->{self.precio}>'
+
+
+
+class StockEvent(db.Model):
+    """Reposiciones de stock (de 0 a más de 0), para avisar a quienes tienen el producto en su lista de deseos"""
+    __tablename__ = 'stock_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_type = db.Column(db.String(20), nullable=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    stock = db.Column(db.Integer, nullable=False)
+
+def _ajustar_contador(connection, user_id, columna, delta):
+    """Sumar delta a un contador del usuario en la misma transacción"""
+    usuarios = User.__table__
+    connection.execute(
+        usuarios.update()
+        .where(usuarios.c.id == user_id)
+        .values({columna: usuarios.c[columna] + delta})
+    )
+
+
+@event.listens_for(CartItem, 'after_insert')
+def _cart_count_insert(mapper, connection, target):
+    _ajustar_contador(connection, target.user_id, 'cart_count', 1)
+
+
+@event.listens_for(CartItem, 'after_delete')
+def _cart_count_delete(mapper, connection, target):
+    _ajustar_contador(connection, target.user_id, 'cart_count', -1)
+
+
+@event.listens_for(Wishlist, 'after_insert')
+def _wishlist_count_insert(mapper, connection, target):
+    _ajustar_contador(connection, target.user_id, 'wishlist_count', 1)
+
+
+@event.listens_for(Wishlist, 'after_delete')
+def _wishlist_count_delete(mapper, connection, target):
+    _ajustar_contador(connection, target.user_id, 'wishlist_count', -1)
+
+
+def upsert_sumando(connection, tabla, claves, filas):
+    """
+    INSERT ... ON CONFLICT DO UPDATE que suma las columnas no clave (SQLite y PostgreSQL).
+
+    Args:
+        claves: nombres de las columnas de la clave única
+        filas: dicts con las claves y los valores a sumar (mismas columnas en todas)
+    """
+    if not filas:
+        return
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(tabla)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=list(claves),
+        set_={columna: tabla.c[columna] + stmt.excluded[columna] for columna in filas[0] if columna not in claves}
+    ), filas)
+
+
+def _sumar_estadistica(connection, clave, delta):
+    upsert_sumando(connection, AdminStat.__table__, ['clave'], [{'clave': clave, 'valor': delta}])
+
+
+def _contar_en_panel(modelo, clave):
+    """Registrar eventos que mantienen el contador del panel de un modelo del catálogo"""
+    @event.listens_for(modelo, 'after_insert')
+    def _insertado(mapper, connection, target):
+        _sumar_estadistica(connection, clave, 1)
+
+    @event.listens_for(modelo, 'after_delete')
+    def _eliminado(mapper, connection, target):
+        _sumar_estadistica(connection, clave, -1)
+
+
+_contar_en_panel(Game, 'juegos')
+_contar_en_panel(Hardware, 'hardware')
+
+
+def _historial_de_precios(modelo, product_type):
+    """Registrar un evento que agrega una fila a price_history cuando cambia el precio"""
+    @event.listens_for(modelo.precio, 'set', active_history=True)
+    def _cargar_precio_anterior(target, valor, anterior, initiator):
+        # active_history carga el precio anterior aunque el objeto esté expirado
+        return valor
+
+    @event.listens_for(modelo, 'after_update')
+    def _precio_actualizado(mapper, connection, target):
+        historial = db.inspect(target).attrs.precio.history
+        if not historial.has_changes() or not historial.deleted:
+            return
+        anterior = historial.deleted[0]
+        if anterior is None or target.precio is None or float(anterior) == float(target.precio):
+            return
+        connection.execute(PriceHistory.__table__.insert().values(
+            product_type=product_type, product_id=target.id, cambiado_en=datetime.utcnow(),
+            precio_anterior=anterior, precio=target.precio))
+
+
+_historial_de_precios(Game, 'game')
+_historial_de_precios(Hardware, 'hardware')
+
+
+def _registrar_reposiciones(modelo, product_type):
+    """Registrar un evento que agrega una fila a stock_events cuando el stock pasa de 0 a más de 0"""
+    @event.listens_for(modelo.stock, 'set', active_history=True)
+    def _cargar_stock_anterior(target, valor, anterior, initiator):
+        return valor
+
+    @event.listens_for(modelo, 'after_update')
+    def _stock_actualizado(mapper, connection, target):
+        historial = db.inspect(target).attrs.stock.history
+        if not historial.has_changes() or not historial.deleted:
+            return
+        if (historial.deleted[0] or 0) <= 0 < (target.stock or 0):
+            connection.execute(StockEvent.__table__.insert().values(
+                product_type=product_type, product_id=target.id, creado_en=datetime.utcnow(),
+                stock=target.stock))
+
+
+_registrar_reposiciones(Game, 'game')
+_registrar_reposiciones(Hardware, 'hardware')
@@ -0,0 +1,33 @@
+"""
+Script para actualizar la matriz de "también compraron"
+Suma a co_purchase_pairs los pares de las órdenes posteriores a la marca de
+agua (job_checkpoints.co_purchase) y reescribe en CO_PURCHASE_PATH sólo las
+filas de los productos afectados (o la matriz entera desde co_purchase_pairs
+si el archivo no existe). Pensado para ejecutarse periódicamente
+(p. ej. un cron cada hora); --reconstruir recalcula todo desde order_items.
+
+Uso: python scripts/build_co_purchase.py [--reconstruir]
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from utils.co_purchase import actualizar_matriz, reconstruir
+
+def build_co_purchase(completo=False):
+    """Actualizar (o reconstruir) la matriz de co-compras"""
+    with app.app_context():
+        if completo:
+            print("🔁 Reconstruyendo la matriz de co-compras...")
+            procesadas, productos = reconstruir()
+        else:
+            print("🛍️  Actualizando la matriz de co-compras...")
+            procesadas, productos = actualizar_matriz()
+        print(f"✅ {procesadas} órdenes procesadas, {productos} productos actualizados")
+        print(f"   Matriz: {app.config['CO_PURCHASE_PATH']}")
+
+if __name__ == '__main__':
+    build_co_purchase('--reconstruir' in sys.argv[1:])
@@ -0,0 +1,35 @@
+"""
+Script para enviar los avisos de la lista de deseos
+Notifica las bajadas de precio (price_history) y las reposiciones de stock
+(stock_events) a los usuarios con el producto en su lista de deseos. Retoma
+desde el cursor guardado en job_checkpoints, así que se puede ejecutar
+periódicamente (p. ej. un cron cada 15 minutos) o relanzar tras una caída.
+
+Uso: python scripts/notify_wishlist.py [bajada|reposicion]
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from utils.wishlist_notifier import FUENTES, notificar
+
+def notify_wishlist(fuentes=tuple(FUENTES)):
+    """Enviar los avisos pendientes de cada fuente"""
+    if not app.config.get('MAIL_USERNAME') and not app.config.get('MAIL_SUPPRESS_SEND'):
+        print("❌ MAIL_USERNAME no configurado: no se pueden enviar los avisos")
+        return False
+    # Contexto de petición con la URL pública para los enlaces de los correos
+    with app.test_request_context(base_url=app.config['SITE_URL']):
+        for fuente in fuentes:
+            print(f"📬 Avisos de {fuente}...")
+            avisados, enviados = notificar(fuente)
+            print(f"   {avisados} productos, {enviados} correos enviados")
+    print("✅ Avisos enviados")
+    return True
+
+if __name__ == '__main__':
+    elegidas = [f for f in sys.argv[1:] if f in FUENTES] or list(FUENTES)
+    sys.exit(0 if notify_wishlist(elegidas) else 1)
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app, db
 from models.database_models import Hardware
+from utils.hardware_resolver import NameResolver, MIN_SCORE
 
 # Datos de benchmark reales (aproximados basados en PassMark y 3DMark)
 BENCHMARK_DATA = {
@@ -70,32 +71,71 @@ def update_hardware_benchmarks():
         not_found = []
 
         def update_hardware_properties(hardware, specs, tipo):
+            # (atributo del modelo, clave en BENCHMARK_DATA, valor por defecto)
             props_map = {
                 'CPU': [
-                    ('cores', 0), ('threads', 0),
-                    ('frequency_ghz', 0.0), ('tdp_watts', 0)
+                    ('cores', 'cores', 0), ('threads', 'threads', 0),
+                    ('frequency_ghz', 'freq', 0.0), ('tdp_watts', 'tdp', 0)
                 ],
                 'GPU': [
-                    ('vram_gb', 0), ('tdp_watts', 0)
+                    ('vram_gb', 'vram', 0), ('tdp_watts', 'tdp', 0)
                 ]
             }
-            for prop, default in props_map.get(tipo, []):
-                setattr(hardware, prop, specs.get(prop, default))
-
-        def process_component(tipo, model_name, specs):
-            hardware_items = Hardware.query.filter(
-                Hardware.tipo == tipo,
-                Hardware.modelo.ilike(f'%{model_name}%')
-            ).all()
-            if not hardware_items:
-                not_found.append(f"{tipo}: {model_name}")
-                print(f"  ⚠️  No encontrado: {model_name}")
-                return 0
+            for prop, key, default in props_map.get(tipo, []):
+                setattr(hardware, prop, specs.get(key, default))
+
+        def build_resolver(hardware_items, tipo):
+            # Índice en memoria de los nombres del catálogo (marca + modelo)
+            resolver = NameResolver()
+            for hardware in hardware_items:
+                resolver.add(hardware.id, f"{hardware.marca} {hardware.modelo}", tipo)
+            return resolver
+
+        def assign_models(hardware_items, tipo, components):
+            # Cada clave corta de BENCHMARK_DATA se resuelve contra los nombres
+            # completos del catálogo ("RTX 4060 Ti" -> "NVIDIA GeForce RTX 4060 Ti 8GB");
+            # cada componente se queda con la clave más parecida, así "RTX 4060"
+            # no pisa a un "RTX 4060 Ti"
+            resolver = build_resolver(hardware_items, tipo)
+            best = {}
+            for model_name in components:
+                for hardware_id, score, _ in resolver.candidates(model_name, tipo, limite=len(resolver)):
+                    if score >= MIN_SCORE and score > best.get(hardware_id, (0, None))[0]:
+                        best[hardware_id] = (score, model_name)
+            assigned = {hardware_id: model_name for hardware_id, (_, model_name) in best.items()}
+
+            # Respaldo para los nombres que no se resuelven: coincidencia por
+            # subcadena del modelo (como el ILIKE '%modelo%' anterior), la clave más larga
+            for hardware in hardware_items:
+                if hardware.id in assigned:
+                    continue
+                modelo = (hardware.modelo or '').lower()
+                matches = [model_name for model_name in components if model_name.lower() in modelo]
+                if matches:
+                    assigned[hardware.id] = max(matches, key=len)
+            return assigned
+
+        def process_tipo(tipo, components):
+            # Una consulta por tipo; las claves se resuelven en memoria
+            hardware_items = Hardware.query.filter_by(tipo=tipo).all()
+            assigned = assign_models(hardware_items, tipo, components)
+            matched = set()
+            count = 0
             for hardware in hardware_items:
+                model_name = assigned.get(hardware.id)
+                if model_name is None:
+                    continue
+                specs = components[model_name]
                 hardware.benchmark_score = specs['score']
                 update_hardware_properties(hardware, specs, tipo)
-                print(f"  ✅ {hardware.marca} {hardware.modelo} - Score: {specs['score']}")
-            return len(hardware_items)
+                matched.add(model_name)
+                count += 1
+                print(f"  ✅ {hardware.marca} {hardware.modelo} ({model_name}) - Score: {specs['score']}")
+            for model_name in components:
+                if model_name not in matched:
+                    not_found.append(f"{tipo}: {model_name}")
+                    print(f"  ⚠️  No encontrado: {model_name}")
+            return count
 
         print("=" * 60)
         print("POBLACIÓN DE BENCHMARKS DE HARDWARE")
@@ -104,8 +144,7 @@ def update_hardware_benchmarks():
 
         for tipo, components in BENCHMARK_DATA.items():
             print(f"\n🔧 Procesando {tipo}s...")
-            for model_name, specs in components.items():
-                updated_count += process_component(tipo, model_name, specs)
+            updated_count += process_tipo(tipo, components)
 
         try:
             db.session.commit()
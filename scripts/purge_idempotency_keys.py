@@ -0,0 +1,22 @@
+"""
+Script para eliminar las claves de idempotencia vencidas
+Borra de idempotency_keys las respuestas guardadas fuera de la ventana
+IDEMPOTENCY_TTL_MINUTES. Pensado para ejecutarse periódicamente (p. ej. un cron).
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models.database_models import IdempotencyKey
+
+def purge_idempotency_keys():
+    """Eliminar las claves vencidas"""
+    with app.app_context():
+        eliminadas = IdempotencyKey.purgar_vencidas(app.config['IDEMPOTENCY_TTL_MINUTES'])
+        print(f"🧹 {eliminadas} claves de idempotencia vencidas eliminadas")
+
+if __name__ == '__main__':
+    purge_idempotency_keys()
@@ -0,0 +1,26 @@
+"""
+Script para reparar los contadores de carrito y wishlist de los usuarios
+Recalcula users.cart_count y users.wishlist_count desde cart_items y wishlist.
+Pensado para ejecutarse periódicamente (p. ej. un cron diario).
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models.database_models import User
+
+def reconcile_user_counters():
+    """Corregir los contadores desviados"""
+    with app.app_context():
+        print("🔢 Reconciliando contadores de carrito y wishlist...")
+        corregidos = User.reconciliar_contadores()
+        if corregidos:
+            print(f"⚠️  {corregidos} usuarios tenían contadores desviados (corregidos)")
+        else:
+            print("✅ Todos los contadores están al día")
+
+if __name__ == '__main__':
+    reconcile_user_counters()
@@ -0,0 +1,47 @@
+"""
+Script para liberar las reservas de stock vencidas
+Elimina por lotes las reservas cuyo plazo expiró y devuelve sus unidades a la
+disponibilidad de cada producto. Sin argumentos hace una pasada (cron); con un
+intervalo en segundos queda ejecutándose como proceso en segundo plano.
+
+Uso: python scripts/release_expired_reservations.py [intervalo_segundos]
+"""
+import sys
+import os
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database import db
+from models.database_models import StockReservation
+
+LOTE = 500   # Reservas por transacción
+
+def release_expired_reservations():
+    """Liberar todas las reservas vencidas, un lote por transacción"""
+    total = 0
+    with app.app_context():
+        try:
+            while True:
+                liberadas = StockReservation.liberar_vencidas(LOTE)
+                total += liberadas
+                if liberadas < LOTE:
+                    break
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error al liberar reservas: {e}")
+    if total:
+        print(f"🔓 {total} reservas vencidas liberadas")
+    return total
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        intervalo = int(sys.argv[1])
+        print(f"⏱️  Liberando reservas vencidas cada {intervalo} s")
+        while True:
+            release_expired_reservations()
+            time.sleep(intervalo)
+    else:
+        release_expired_reservations()
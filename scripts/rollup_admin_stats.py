@@ -0,0 +1,38 @@
+"""
+Script para recalcular las estadísticas del panel de administración
+Por defecto recalcula los contadores de usuarios y órdenes y los últimos días
+de la serie de órdenes, ingresos y registros (no se mantienen en cada compra o
+registro). Pensado para ejecutarse periódicamente (p. ej. un cron cada 10
+minutos). --reconciliar reconstruye además los contadores del catálogo y
+corrige las desviaciones de escrituras masivas que no disparan los eventos.
+
+Uso: python scripts/rollup_admin_stats.py [dias]                  (por defecto 2 días)
+     python scripts/rollup_admin_stats.py --reconciliar [dias]    (sin días: toda la serie)
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models.database_models import AdminStat
+
+def rollup_admin_stats(dias=None, completo=False):
+    """Recalcular los contadores de actividad y la serie reciente (o todo con completo)"""
+    with app.app_context():
+        if completo:
+            alcance = f"últimos {dias} días" if dias else "toda la serie"
+            print(f"📊 Reconciliando estadísticas del panel ({alcance})...")
+            valores = AdminStat.reconciliar(dias)
+        else:
+            dias = dias or 2
+            print(f"📊 Actualizando estadísticas del panel (últimos {dias} días)...")
+            valores = AdminStat.actualizar_actividad(dias)
+        for clave, valor in valores.items():
+            print(f"   {clave}: {valor}")
+        print("✅ Estadísticas actualizadas")
+
+if __name__ == '__main__':
+    argumentos = [a for a in sys.argv[1:] if a != '--reconciliar']
+    rollup_admin_stats(int(argumentos[0]) if argumentos else None, '--reconciliar' in sys.argv[1:])
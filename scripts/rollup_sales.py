@@ -0,0 +1,35 @@
+"""
+Script para acumular las ventas nuevas en las tablas de ventas por día
+Suma a product_sales_daily y category_sales_daily sólo las órdenes posteriores
+a la marca de agua (job_checkpoints.sales_rollup). Pensado para ejecutarse
+cada pocos minutos (p. ej. un cron); --reconstruir recalcula desde order_items
+para corregir órdenes canceladas después de acumularse.
+
+Uso: python scripts/rollup_sales.py [--reconstruir [dias]]
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from utils.sales_rollup import acumular_ventas, reconstruir
+
+def rollup_sales(reconstruir_dias=None, completo=False):
+    """Acumular las órdenes nuevas (o reconstruir el acumulado)"""
+    with app.app_context():
+        if completo or reconstruir_dias:
+            alcance = f"últimos {reconstruir_dias} días" if reconstruir_dias else "todo el historial"
+            print(f"🔁 Reconstruyendo el acumulado de ventas ({alcance})...")
+            procesadas = reconstruir(reconstruir_dias)
+        else:
+            print("📈 Acumulando ventas nuevas...")
+            procesadas = acumular_ventas()
+        print(f"✅ {procesadas} órdenes procesadas")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--reconstruir':
+        rollup_sales(int(sys.argv[2]) if len(sys.argv) > 2 else None, completo=True)
+    else:
+        rollup_sales()
@@ -0,0 +1,94 @@
+"""
+Prueba de concurrencia del descuento de stock en el checkout
+Crea un producto de prueba con poco stock y muchos usuarios con ese producto
+en el carrito, lanza los checkouts en paralelo y comprueba que nunca se vende
+más de lo disponible. Usa la base de datos de DATABASE_URL: ejecutar contra
+una base de pruebas (SQLite o PostgreSQL).
+
+Uso: python scripts/stress_checkout_stock.py [compradores] [stock] [hilos]
+"""
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database import db
+from models.database_models import User, Hardware, CartItem, Order, OrderItem
+from utils.cart_loader import load_cart
+
+PREFIJO = 'stress_checkout_'
+
+def _preparar(compradores, stock):
+    """Crear el producto y los usuarios con el producto en el carrito"""
+    producto = Hardware(tipo='GPU', marca='Stress', modelo=f'{PREFIJO}sku', precio=100.0, stock=stock)
+    db.session.add(producto)
+    usuarios = []
+    for i in range(compradores):
+        usuario = User(username=f'{PREFIJO}{i}', email=f'{PREFIJO}{i}@example.com')
+        usuario.set_password(os.urandom(8).hex())
+        usuarios.append(usuario)
+    db.session.add_all(usuarios)
+    db.session.flush()
+    db.session.add_all(CartItem(user_id=u.id, product_type='hardware', product_id=producto.id, quantity=1)
+                       for u in usuarios)
+    db.session.commit()
+    return producto.id, [u.id for u in usuarios]
+
+def _comprar(user_id, resultados, lock):
+    """Checkout de un usuario en su propio contexto (sesión y conexión propias)"""
+    with app.app_context():
+        try:
+            order, error = Order.crear_desde_carrito(user_id, load_cart(user_id).lines)
+            clave = 'vendidas' if order else 'rechazadas'
+        except Exception as e:
+            db.session.rollback()
+            clave = 'errores'
+            print(f"   ❌ Usuario {user_id}: {e}")
+        with lock:
+            resultados[clave] += 1
+
+def _limpiar(producto_id, user_ids):
+    """Eliminar los datos de prueba"""
+    order_ids = [o.id for o in Order.query.filter(Order.user_id.in_(user_ids))]
+    OrderItem.query.filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+    Order.query.filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+    CartItem.query.filter(CartItem.user_id.in_(user_ids)).delete(synchronize_session=False)
+    User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+    Hardware.query.filter_by(id=producto_id).delete()
+    db.session.commit()
+
+def stress_checkout_stock(compradores=50, stock=10, hilos=16):
+    """Lanzar checkouts concurrentes sobre un único producto y verificar el stock"""
+    with app.app_context():
+        print(f"🛒 {compradores} compradores, stock {stock}, {hilos} hilos ({db.engine.dialect.name})")
+        producto_id, user_ids = _preparar(compradores, stock)
+
+    resultados = {'vendidas': 0, 'rechazadas': 0, 'errores': 0}
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        for user_id in user_ids:
+            executor.submit(_comprar, user_id, resultados, lock)
+
+    with app.app_context():
+        stock_final = db.session.get(Hardware, producto_id).stock
+        unidades = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).filter(
+            OrderItem.product_type == 'hardware', OrderItem.product_id == producto_id).scalar()
+        _limpiar(producto_id, user_ids)
+
+    print(f"   Vendidas: {resultados['vendidas']}  Rechazadas: {resultados['rechazadas']}  "
+          f"Errores: {resultados['errores']}")
+    print(f"   Stock final: {stock_final}  Unidades en órdenes: {unidades}")
+
+    if stock_final < 0 or unidades + stock_final != stock or unidades != resultados['vendidas']:
+        print("❌ Sobreventa o stock inconsistente")
+        return False
+    print("✅ Sin sobreventa")
+    return True
+
+if __name__ == '__main__':
+    argumentos = [int(a) for a in sys.argv[1:4]]
+    sys.exit(0 if stress_checkout_stock(*argumentos) else 1)
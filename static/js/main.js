@@ -149,13 +149,26 @@ function initializeShoppingCart() {
         addToCart(normalizedId, productType || 'hardware');
     });
 
+    // Claves de idempotencia de las peticiones en curso: un doble clic reutiliza la clave
+    const pendingCartKeys = {};
+
+    function newIdempotencyKey() {
+        if (globalThis.crypto?.randomUUID) {
+            return globalThis.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
     function addToCart(productId, productType) {
         // Obtener CSRF token
         const csrfToken = document.querySelector('meta[name="csrf-token"]')?.getAttribute('content');
+        const pendingKey = `${productType}:${productId}`;
+        pendingCartKeys[pendingKey] = pendingCartKeys[pendingKey] || newIdempotencyKey();
         
         // Hacer petición al servidor para agregar al carrito
         const headers = {
             'Content-Type': 'application/json',
+            'Idempotency-Key': pendingCartKeys[pendingKey],
         };
         
         // Agregar CSRF token si existe
@@ -194,6 +207,9 @@ function initializeShoppingCart() {
         .catch(error => {
             console.error('Error:', error);
             showToast('Error al agregar al carrito. Por favor, inicia sesión.', 'danger');
+        })
+        .finally(() => {
+            delete pendingCartKeys[pendingKey];
         });
     }
 
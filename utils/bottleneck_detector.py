@@ -36,6 +36,26 @@ class BottleneckDetector:
         BottleneckDetector._check_balanced(result)
         return result
 
+    @staticmethod
+    def estimate_loss(cpu_score, gpu_score):
+        """
+        Pérdida de rendimiento estimada (%) por desequilibrio CPU/GPU.
+        Usa los mismos umbrales que detect() pero sin generar textos,
+        para evaluar muchas combinaciones (p. ej. en el configurador).
+        """
+        if not cpu_score or not gpu_score:
+            return 0
+        if BottleneckDetector._is_cpu_bottleneck(gpu_score, cpu_score):
+            ratio, thresholds = gpu_score / cpu_score, BottleneckDetector._cpu_thresholds()
+        elif BottleneckDetector._is_gpu_bottleneck(gpu_score, cpu_score):
+            ratio, thresholds = cpu_score / gpu_score, BottleneckDetector._gpu_thresholds()
+        else:
+            return 0
+        for threshold_data in thresholds:
+            if ratio >= threshold_data[0]:
+                return threshold_data[2]
+        return 0
+
     # Métodos auxiliares sugeridos dentro de BottleneckDetector:
     @staticmethod
     def _has_valid_scores(cpu_score, gpu_score, result):
@@ -0,0 +1,245 @@
+"""
+Buscador de la mejor configuración de PC para un presupuesto
+Precalcula, por versión del catálogo, la frontera de Pareto precio/rendimiento
+de cada tipo de componente y combina sólo esas piezas respetando socket, DDR,
+consumo y el equilibrio CPU/GPU de BottleneckDetector. El stock no forma
+parte de la versión (las ventas no la cambian), así que las piezas agotadas se
+descartan al resolver con una consulta de los ids disponibles.
+"""
+import heapq
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from utils.bottleneck_detector import BottleneckDetector
+from utils.catalog_version import VersionedCache
+from utils.compatibility_graph import PSU_MARGIN, BASE_SYSTEM_WATTS, SOCKET_DDR, get_compatibility_graph
+from utils.json_cache import parse_json_field
+from utils.spec_parser import parsear_valor
+
+MAX_BUILDS = 10
+RAM_RECOMENDADA_GB = 16    # Por debajo BottleneckDetector marca cuello de botella de RAM
+RAM_PENALIZACION = 10      # % de rendimiento descontado con menos RAM de la recomendada
+
+# Columnas de GameRequirements por nivel de calidad
+NIVELES = {
+    'minimo': ('min_cpu_score', 'min_gpu_score', 'min_ram_gb', 'min_vram_gb'),
+    'recomendado': ('rec_cpu_score', 'rec_gpu_score', 'rec_ram_gb', 'rec_vram_gb'),
+    'ultra': ('ultra_cpu_score', 'ultra_gpu_score', 'ultra_ram_gb', 'ultra_vram_gb'),
+}
+
+Pieza = namedtuple('Pieza', ['id', 'precio', 'score', 'ram_gb', 'vram_gb', 'socket', 'ddr', 'tdp', 'potencia'])
+Objetivo = namedtuple('Objetivo', ['cpu', 'gpu', 'ram_gb', 'vram_gb'])
+
+SIN_OBJETIVO = Objetivo(0, 0, 0, 0)
+
+
+def frontera_pareto(piezas, clave=lambda p: p.score):
+    """
+    Piezas no dominadas en precio/rendimiento, ordenadas por precio.
+
+    Una pieza queda fuera si otra igual o más barata rinde al menos lo mismo,
+    así que en la frontera el rendimiento crece estrictamente con el precio.
+    """
+    frontera = []
+    for pieza in sorted(piezas, key=lambda p: (p.precio, -clave(p))):
+        if not frontera or clave(pieza) > clave(frontera[-1]):
+            frontera.append(pieza)
+    return frontera
+
+
+class BuildSolver:
+    """Fronteras de Pareto del catálogo y búsqueda de configuraciones"""
+
+    def __init__(self, piezas):
+        por_tipo = {}
+        for tipo, pieza in piezas:
+            por_tipo.setdefault(tipo, []).append(pieza)
+
+        # CPU por socket y RAM por generación DDR: sólo se combinan piezas compatibles
+        self.cpus = self._agrupar(p for p in por_tipo.get('CPU', []) if p.score)
+        self.rams = self._agrupar(por_tipo.get('RAM', []), atributo='ddr', clave=lambda p: p.ram_gb)
+        self.gpus = [p for p in por_tipo.get('GPU', []) if p.score]
+
+        # Placa más barata por (socket, DDR): todas las demás son equivalentes o peores
+        self.placas = {}
+        for placa in por_tipo.get('MOTHERBOARD', []):
+            clave = (placa.socket, placa.ddr)
+            if clave not in self.placas or placa.precio < self.placas[clave].precio:
+                self.placas[clave] = placa
+
+        # Fuentes por potencia con el mínimo precio de sufijo: la más barata con potencia >= W
+        fuentes = sorted((p for p in por_tipo.get('PSU', []) if p.potencia), key=lambda p: p.potencia)
+        self._potencias = [p.potencia for p in fuentes]
+        self._fuente_mas_barata = list(fuentes)
+        for i in range(len(fuentes) - 2, -1, -1):
+            if self._fuente_mas_barata[i + 1].precio < self._fuente_mas_barata[i].precio:
+                self._fuente_mas_barata[i] = self._fuente_mas_barata[i + 1]
+
+    @staticmethod
+    def _agrupar(piezas, atributo='socket', clave=lambda p: p.score):
+        """Frontera de Pareto por valor de atributo (socket o DDR)"""
+        grupos = {}
+        for pieza in piezas:
+            grupos.setdefault(getattr(pieza, atributo), []).append(pieza)
+        return {valor: frontera_pareto(grupo, clave) for valor, grupo in grupos.items()}
+
+    def _fuente(self, consumo):
+        """Fuente más barata que cubre el consumo con margen (None si ninguna)"""
+        inicio = bisect_right(self._potencias, consumo * PSU_MARGIN - 1e-9)
+        return self._fuente_mas_barata[inicio] if inicio < len(self._potencias) else None
+
+    def _generaciones(self, socket, ddr):
+        """Grupos de RAM combinables con una plataforma (los de DDR desconocida siempre)"""
+        admitidas = {ddr} if ddr else SOCKET_DDR.get(socket)
+        return [g for g in self.rams if g is None or not admitidas or g in admitidas]
+
+    def _plataformas(self):
+        """Combinaciones (socket, DDR, placa) disponibles"""
+        if not self.placas:
+            # Sin placas en el catálogo: sólo se combinan CPU, GPU y RAM
+            return [(socket, g, None) for socket in self.cpus for g in self._generaciones(socket, None)]
+        return [(socket, g, placa) for (socket, ddr), placa in self.placas.items()
+                if socket in self.cpus for g in self._generaciones(socket, ddr)]
+
+    @staticmethod
+    def puntuacion(cpu, gpu, ram):
+        """Rendimiento estimado de la combinación descontando cuellos de botella"""
+        perdida = BottleneckDetector.estimate_loss(cpu.score, gpu.score)
+        if ram.ram_gb < RAM_RECOMENDADA_GB:
+            perdida += RAM_PENALIZACION
+        return (cpu.score + gpu.score) * (100 - perdida) / 100
+
+    def solve(self, presupuesto, objetivo=SIN_OBJETIVO, limite=3):
+        """
+        Mejores configuraciones dentro del presupuesto.
+
+        Sólo se recorren piezas de las fronteras de Pareto que cumplen el
+        objetivo; para cada CPU y RAM, las GPU se acotan por búsqueda binaria
+        sobre el presupuesto restante. Se devuelve la mejor combinación de
+        cada par CPU/GPU.
+
+        Returns:
+            lista de dicts con ids, precio_total, puntuacion y perdida
+        """
+        gpus = [g for g in self.gpus if g.score >= objetivo.gpu and (g.vram_gb or 0) >= objetivo.vram_gb]
+        gpus = frontera_pareto(gpus)
+        precios_gpu = [g.precio for g in gpus]
+        incluir_fuente = bool(self._potencias)
+
+        # La RAM sólo influye en la puntuación por debajo de RAM_RECOMENDADA_GB:
+        # basta con la más barata que cumple el objetivo y la más barata recomendada
+        opciones_ram = {}
+        for ddr, rams in self.rams.items():
+            validas = [r for r in rams if r.ram_gb >= objetivo.ram_gb]
+            recomendadas = [r for r in validas if r.ram_gb >= RAM_RECOMENDADA_GB]
+            opciones_ram[ddr] = list(dict.fromkeys(validas[:1] + recomendadas[:1]))
+
+        mejores = {}  # (cpu, gpu) -> (puntuacion, -precio, build)
+        for socket, ddr, placa in self._plataformas():
+            base = placa.precio if placa else 0
+            for cpu in self.cpus[socket]:
+                if base + cpu.precio >= presupuesto:
+                    break  # Frontera ordenada por precio
+                if cpu.score < objetivo.cpu:
+                    continue
+                for ram in opciones_ram[ddr]:
+                    restante = presupuesto - base - cpu.precio - ram.precio
+                    if restante <= 0:
+                        break  # RAM ordenada por precio: las siguientes tampoco caben
+                    for gpu in gpus[:bisect_right(precios_gpu, restante)]:
+                        fuente = None
+                        precio = base + cpu.precio + ram.precio + gpu.precio
+                        if incluir_fuente:
+                            fuente = self._fuente(BASE_SYSTEM_WATTS + cpu.tdp + gpu.tdp)
+                            if fuente is None:
+                                continue
+                            precio += fuente.precio
+                            if precio > presupuesto:
+                                continue
+                        puntuacion = self.puntuacion(cpu, gpu, ram)
+                        candidato = (puntuacion, -precio)
+                        actual = mejores.get((cpu.id, gpu.id))
+                        if actual is None or candidato > actual[:2]:
+                            mejores[(cpu.id, gpu.id)] = candidato + ({
+                                'CPU': cpu.id,
+                                'GPU': gpu.id,
+                                'RAM': ram.id,
+                                'MOTHERBOARD': placa.id if placa else None,
+                                'PSU': fuente.id if fuente else None,
+                                'precio_total': round(precio, 2),
+                                'puntuacion': round(puntuacion, 1),
+                                'perdida': BottleneckDetector.estimate_loss(cpu.score, gpu.score)
+                            },)
+
+        top = heapq.nlargest(min(limite, MAX_BUILDS), mejores.values(), key=lambda m: m[:2])
+        return [build for _, _, build in top]
+
+
+def _construir_piezas():
+    """Leer del catálogo las piezas (con o sin stock) con sus atributos de compatibilidad"""
+    from database import db
+    from models.database_models import Hardware
+
+    grafo = get_compatibility_graph()
+    piezas = []
+    for hardware_id, precio, score, vram_gb, especificaciones, updated_at in db.session.query(
+            Hardware.id, Hardware.precio, Hardware.benchmark_score, Hardware.vram_gb,
+            Hardware.especificaciones, Hardware.updated_at):
+        nodo = grafo.nodos.get(hardware_id)
+        if nodo is None:
+            continue
+        ram_gb = 0
+        if nodo.tipo == 'RAM':
+            try:
+                specs = parse_json_field('hardware', 'especificaciones', hardware_id, updated_at, especificaciones)
+            except (TypeError, ValueError):
+                specs = {}
+            if specs.get('capacidad') is not None:
+                ram_gb = parsear_valor(specs['capacidad'])[0] or 0
+        piezas.append((nodo.tipo, Pieza(hardware_id, precio, score or 0, ram_gb, vram_gb or 0,
+                                        nodo.socket, nodo.ddr, nodo.tdp, nodo.potencia)))
+    return piezas
+
+
+_piezas_cache = VersionedCache(_construir_piezas)
+_lock = threading.Lock()
+_solver = {'piezas': None, 'disponibles': None, 'valor': None}
+
+
+def get_build_solver():
+    """
+    Obtener el buscador de configuraciones con las piezas de la versión actual
+    del catálogo que siguen disponibles (stock > reservado). Se reconstruye
+    sólo cuando cambia el catálogo o el conjunto de piezas disponibles.
+    """
+    from database import db
+    from models.database_models import Hardware
+
+    piezas = _piezas_cache.get()
+    disponibles = frozenset(hardware_id for hardware_id, in db.session.query(Hardware.id)
+                            .filter(Hardware.stock > Hardware.reservado))
+    with _lock:
+        if _solver['piezas'] is piezas and _solver['disponibles'] == disponibles:
+            return _solver['valor']
+    solver = BuildSolver([(tipo, pieza) for tipo, pieza in piezas if pieza.id in disponibles])
+    with _lock:
+        _solver.update(piezas=piezas, disponibles=disponibles, valor=solver)
+    return solver
+
+
+def objetivo_para_juegos(juego_ids, nivel='recomendado'):
+    """
+    Requisitos que debe cumplir la configuración para todos los juegos.
+
+    Raises:
+        ValueError: si el nivel no existe
+    """
+    if nivel not in NIVELES:
+        raise ValueError(f'Nivel inválido: {nivel}')
+    if not juego_ids:
+        return SIN_OBJETIVO
+
+    from models.database_models import GameRequirements
+    requisitos = GameRequirements.query.filter(GameRequirements.game_id.in_(juego_ids)).all()
+    columnas = NIVELES[nivel]
+    return Objetivo(*(max((getattr(r, columna) or 0 for r in requisitos), default=0) for columna in columnas))
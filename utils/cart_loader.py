@@ -0,0 +1,111 @@
+"""
+Carga del carrito con sus productos
+Resuelve todos los productos del carrito con una consulta por tipo y calcula
+subtotales y total una sola vez para las páginas del carrito y el checkout.
+"""
+
+
+class CartLine:
+    """Item del carrito con su producto ya resuelto"""
+
+    def __init__(self, item, product):
+        self.item = item
+        self.product = product
+        self.subtotal = product.precio * item.quantity
+
+    @property
+    def id(self):
+        return self.item.id
+
+    @property
+    def product_type(self):
+        return self.item.product_type
+
+    @property
+    def product_id(self):
+        return self.item.product_id
+
+    @property
+    def quantity(self):
+        return self.item.quantity
+
+    @property
+    def nombre(self):
+        """Nombre legible del producto"""
+        return nombre_producto(self.product)
+
+
+class CartView:
+    """Contenido del carrito de un usuario"""
+
+    def __init__(self, lines, faltantes=()):
+        self.lines = lines
+        self.faltantes = list(faltantes)  # Items cuyo producto ya no existe
+        self.total = sum(line.subtotal for line in lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    @property
+    def items(self):
+        """Todos los CartItem, incluidos los de productos eliminados"""
+        return [line.item for line in self.lines] + self.faltantes
+
+
+def nombre_producto(product):
+    """Nombre legible de un juego o componente"""
+    return product.nombre if hasattr(product, 'nombre') else f"{product.marca} {product.modelo}"
+
+
+def cargar_productos(claves):
+    """
+    Cargar productos con una consulta por tipo.
+
+    Args:
+        claves: iterable de (product_type, product_id)
+
+    Returns:
+        dict (product_type, product_id) -> Game o Hardware
+    """
+    from models.database_models import Game, Hardware
+
+    ids = {'game': set(), 'hardware': set()}
+    for product_type, product_id in claves:
+        if product_type in ids:
+            ids[product_type].add(product_id)
+    productos = {('game', j.id): j for j in Game.get_games_by_ids(ids['game'])}
+    productos.update({('hardware', h.id): h for h in Hardware.get_hardware_by_ids(ids['hardware'])})
+    return productos
+
+
+def load_cart(user_id, items=None):
+    """
+    Cargar el carrito de un usuario con todos sus productos.
+
+    Args:
+        user_id: id del usuario
+        items: CartItem ya consultados o items del carrito en sesión (opcional)
+
+    Returns:
+        CartView
+    """
+    from models.database_models import CartItem
+
+    if items is None:
+        items = CartItem.query.filter_by(user_id=user_id).order_by(CartItem.added_at, CartItem.id).all()
+    productos = cargar_productos((item.product_type, item.product_id) for item in items)
+
+    lines, faltantes = [], []
+    for item in items:
+        product = productos.get((item.product_type, item.product_id))
+        if product is None:
+            faltantes.append(item)
+        else:
+            lines.append(CartLine(item, product))
+    return CartView(lines, faltantes)
@@ -0,0 +1,76 @@
+"""
+Versión del catálogo (juegos + hardware)
+Permite invalidar índices y cachés en memoria cuando cambia el catálogo
+"""
+import threading
+import time
+from sqlalchemy import func, select
+from database import db
+
+# Segundos entre comprobaciones de la versión contra la base de datos
+CATALOG_VERSION_TTL = 5
+
+_lock = threading.Lock()
+_estado = {'version': None, 'comprobado': 0.0}
+
+
+def get_catalog_version():
+    """
+    Obtener la versión actual del catálogo.
+
+    La versión es la tupla (nº juegos, última actualización de juegos,
+    nº hardware, última actualización de hardware), leída con una sola
+    consulta y reutilizada durante CATALOG_VERSION_TTL segundos.
+    """
+    ahora = time.monotonic()
+    with _lock:
+        if _estado['version'] is not None and ahora - _estado['comprobado'] < CATALOG_VERSION_TTL:
+            return _estado['version']
+
+    from models.database_models import Game, Hardware
+    fila = db.session.execute(select(
+        select(func.count(Game.id)).scalar_subquery(),
+        select(func.max(Game.updated_at)).scalar_subquery(),
+        select(func.count(Hardware.id)).scalar_subquery(),
+        select(func.max(Hardware.updated_at)).scalar_subquery()
+    )).one()
+    version = tuple(str(valor) for valor in fila)
+
+    with _lock:
+        _estado['version'] = version
+        _estado['comprobado'] = ahora
+    return version
+
+
+def invalidate_catalog_version():
+    """Forzar la relectura de la versión en la próxima consulta (tras editar el catálogo)"""
+    with _lock:
+        _estado['comprobado'] = 0.0
+
+
+class VersionedCache:
+    """Valor calculado una vez por versión del catálogo"""
+
+    def __init__(self, builder):
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._version = None
+        self._valor = None
+
+    def get(self):
+        """Obtener el valor, reconstruyéndolo si cambió la versión del catálogo"""
+        version = get_catalog_version()
+        with self._lock:
+            if self._version == version:
+                return self._valor
+        valor = self._builder()
+        with self._lock:
+            self._version = version
+            self._valor = valor
+        return valor
+
+    def clear(self):
+        """Descartar el valor cacheado"""
+        with self._lock:
+            self._version = None
+            self._valor = None
@@ -0,0 +1,163 @@
+"""
+Control de admisión del checkout
+Limita los checkouts simultáneos entre todos los workers de gunicorn con un
+semáforo de archivos (un flock por cupo), de modo que una avalancha de compras
+no acapare el pool de conexiones y la navegación del catálogo siga atendida.
+Los compradores sin cupo reciben un turno y una sala de espera que consulta
+periódicamente si ya pueden pasar.
+"""
+import os
+import tempfile
+from functools import wraps
+from flask import current_app, render_template, request, session
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin control de admisión
+    fcntl = None
+
+CLAVE_TURNO = 'turno_checkout'
+REINTENTO_SEGUNDOS = 3
+
+
+class CheckoutSemaphore:
+    """Semáforo entre procesos: cada cupo es un archivo con flock exclusivo"""
+
+    def __init__(self, directorio, cupos):
+        self.directorio = directorio
+        self.cupos = cupos
+        os.makedirs(directorio, exist_ok=True)
+
+    def _abrir(self, nombre):
+        return os.open(os.path.join(self.directorio, nombre), os.O_RDWR | os.O_CREAT, 0o600)
+
+    def adquirir(self):
+        """
+        Ocupar un cupo libre sin bloquear.
+
+        Returns:
+            descriptor del cupo (para liberar) o None si están todos ocupados.
+            El sistema operativo libera el cupo si el worker muere.
+        """
+        for i in range(self.cupos):
+            fd = self._abrir(f'cupo_{i}.lock')
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def liberar(fd):
+        """Liberar un cupo"""
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def cupos_libres(self):
+        """Cupos libres en este momento (aproximado)"""
+        libres = 0
+        for i in range(self.cupos):
+            fd = self._abrir(f'cupo_{i}.lock')
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                libres += 1
+            except BlockingIOError:
+                pass
+            finally:
+                os.close(fd)
+        return libres
+
+    def _contador(self, nombre, funcion=None):
+        """Leer (y actualizar con funcion) un contador guardado en archivo"""
+        fd = self._abrir(nombre)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if funcion else fcntl.LOCK_SH)
+            contenido = os.pread(fd, 32, 0).strip()
+            valor = int(contenido) if contenido.isdigit() else 0
+            if funcion:
+                valor = funcion(valor)
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, str(valor).encode(), 0)
+            return valor
+        finally:
+            os.close(fd)  # Cerrar el descriptor libera el flock
+
+    def nuevo_turno(self):
+        """Número de turno para la sala de espera"""
+        return self._contador('turnos', lambda n: n + 1)
+
+    def registrar_atendido(self, turno):
+        """Anotar el último turno que entró al checkout"""
+        self._contador('atendido', lambda n: max(n, turno))
+
+    def atendido(self):
+        """Último turno que entró al checkout"""
+        return self._contador('atendido')
+
+
+_semaforos = {}
+
+
+def get_semaforo():
+    """Semáforo del checkout según la configuración (None si está desactivado)"""
+    cupos = current_app.config.get('CHECKOUT_MAX_CONCURRENT', 0)
+    if fcntl is None or not cupos:
+        return None
+    directorio = current_app.config.get('CHECKOUT_LOCK_DIR') or os.path.join(
+        tempfile.gettempdir(), 'gametech_checkout')
+    clave = (directorio, cupos)
+    if clave not in _semaforos:
+        _semaforos[clave] = CheckoutSemaphore(directorio, cupos)
+    return _semaforos[clave]
+
+
+def estado_turno():
+    """Estado de la sala de espera para el usuario actual (sin acceder a la base de datos)"""
+    semaforo = get_semaforo()
+    if semaforo is None:
+        return {'cupos_libres': 1, 'turno': None, 'atendido': None}
+    return {
+        'cupos_libres': semaforo.cupos_libres(),
+        'turno': session.get(CLAVE_TURNO),
+        'atendido': semaforo.atendido(),
+    }
+
+
+def con_admision(vista):
+    """
+    Decorador para el POST del checkout: entra sólo si hay un cupo libre; si
+    no, responde 503 con la sala de espera. Va antes de @idempotente para que
+    los rechazos no reserven la clave de idempotencia.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        semaforo = get_semaforo() if request.method == 'POST' else None
+        if semaforo is None:
+            return vista(*args, **kwargs)
+
+        fd = semaforo.adquirir()
+        if fd is None:
+            turno = session.get(CLAVE_TURNO)
+            if turno is None:
+                turno = session[CLAVE_TURNO] = semaforo.nuevo_turno()
+            respuesta = current_app.make_response((render_template(
+                'cart/sala_espera.html',
+                turno=turno,
+                atendido=semaforo.atendido(),
+                clave_idempotencia=request.form.get('idempotency_key'),
+                reintento=REINTENTO_SEGUNDOS
+            ), 503))
+            respuesta.headers['Retry-After'] = str(REINTENTO_SEGUNDOS)
+            return respuesta
+
+        try:
+            turno = session.pop(CLAVE_TURNO, None)
+            if turno is not None:
+                semaforo.registrar_atendido(turno)
+            return vista(*args, **kwargs)
+        finally:
+            semaforo.liberar(fd)
+
+    return envoltura
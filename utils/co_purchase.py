@@ -0,0 +1,299 @@
+"""
+"Quienes compraron esto también compraron"
+Las órdenes nuevas (posteriores a la marca de agua en job_checkpoints) suman
+sus pares de productos a co_purchase_pairs. Después se recalculan sólo los
+vecinos de los productos afectados y se reescribe en disco una matriz CSR con
+los k vecinos más frecuentes de cada producto. Los workers la cargan en
+arreglos compactos y la consultan en O(log n + k) desde las páginas de detalle.
+La tabla es la fuente de verdad: si el archivo falta o no se puede leer (p. ej.
+tras un deploy, o si el trabajo corre en otra máquina), el trabajo lo
+reconstruye entero y las páginas consultan en la tabla los vecinos del producto
+(por el prefijo de su clave primaria).
+"""
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from flask import current_app
+
+TRABAJO = 'co_purchase'
+K_VECINOS = 10
+LOTE_ORDENES = 500
+MAX_PRODUCTOS_POR_ORDEN = 30   # Acota los pares de órdenes muy grandes (n² pares)
+LOTE_CONSULTA = 500
+
+TIPOS = ('game', 'hardware')
+_MAGIA = b'CPM1'
+_CABECERA = struct.Struct('<4sIII')   # magia, nodos, aristas, k
+
+
+def _codificar(product_type, product_id):
+    return TIPOS.index(product_type) << 32 | product_id
+
+
+def _decodificar(clave):
+    return TIPOS[clave >> 32], clave & 0xFFFFFFFF
+
+
+class CoPurchaseMatrix:
+    """
+    Matriz dispersa en formato CSR: `claves` ordenadas (tipo y id codificados
+    en un entero), `indptr` con el inicio de la fila de cada clave y
+    `vecinos`/`pesos` con los índices de los vecinos y sus frecuencias.
+    """
+
+    def __init__(self, claves, indptr, vecinos, pesos, k):
+        self.claves = claves
+        self.indptr = indptr
+        self.vecinos = vecinos
+        self.pesos = pesos
+        self.k = k
+
+    @classmethod
+    def vacia(cls, k=K_VECINOS):
+        return cls(array('q'), array('i', [0]), array('i'), array('i'), k)
+
+    @classmethod
+    def desde_filas(cls, filas, k=K_VECINOS):
+        """Construir desde {clave: [(clave_vecino, veces), ...]} ordenadas por frecuencia"""
+        nodos = set(filas)
+        for fila in filas.values():
+            nodos.update(vecino for vecino, _ in fila)
+        claves = array('q', sorted(nodos))
+        posicion = {clave: i for i, clave in enumerate(claves)}
+        indptr, vecinos, pesos = array('i', [0]), array('i'), array('i')
+        for clave in claves:
+            for vecino, veces in filas.get(clave, ())[:k]:
+                vecinos.append(posicion[vecino])
+                pesos.append(veces)
+            indptr.append(len(vecinos))
+        return cls(claves, indptr, vecinos, pesos, k)
+
+    def filas(self):
+        """Contenido como {clave: [(clave_vecino, veces), ...]} (para actualizar algunas filas)"""
+        return {
+            clave: [(self.claves[self.vecinos[j]], self.pesos[j])
+                    for j in range(self.indptr[i], self.indptr[i + 1])]
+            for i, clave in enumerate(self.claves) if self.indptr[i + 1] > self.indptr[i]
+        }
+
+    def vecinos_de(self, product_type, product_id, limite=None):
+        """Vecinos más frecuentes: lista de (product_type, product_id, veces)"""
+        if product_type not in TIPOS:
+            return []
+        clave = _codificar(product_type, product_id)
+        i = bisect_left(self.claves, clave)
+        if i == len(self.claves) or self.claves[i] != clave:
+            return []
+        inicio, fin = self.indptr[i], self.indptr[i + 1]
+        if limite is not None:
+            fin = min(fin, inicio + limite)
+        return [(*_decodificar(self.claves[self.vecinos[j]]), self.pesos[j]) for j in range(inicio, fin)]
+
+    def guardar(self, ruta):
+        """Escribir la matriz de forma atómica (archivo temporal y rename)"""
+        temporal = f'{ruta}.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(_CABECERA.pack(_MAGIA, len(self.claves), len(self.vecinos), self.k))
+            for arreglo in (self.claves, self.indptr, self.vecinos, self.pesos):
+                arreglo.tofile(archivo)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Leer una matriz guardada con guardar()"""
+        with open(ruta, 'rb') as archivo:
+            magia, nodos, aristas, k = _CABECERA.unpack(archivo.read(_CABECERA.size))
+            if magia != _MAGIA:
+                raise ValueError(f'{ruta} no es una matriz de co-compras')
+            arreglos = []
+            for tipo, largo in (('q', nodos), ('i', nodos + 1), ('i', aristas), ('i', aristas)):
+                arreglo = array(tipo)
+                arreglo.fromfile(archivo, largo)
+                arreglos.append(arreglo)
+        return cls(*arreglos, k)
+
+
+_lock = threading.Lock()
+_cargada = {'mtime': None, 'matriz': None}
+
+
+def _cargar_archivo(ruta):
+    """Matriz guardada en `ruta`, o None si no existe o no se puede leer"""
+    try:
+        return CoPurchaseMatrix.cargar(ruta)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, struct.error) as e:
+        current_app.logger.warning(f'No se pudo cargar la matriz de co-compras: {e}')
+        return None
+
+
+def get_matriz():
+    """Matriz del disco, recargada cuando el trabajo la reescribe (None si no hay archivo válido)"""
+    ruta = current_app.config['CO_PURCHASE_PATH']
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        if _cargada['mtime'] == mtime:
+            return _cargada['matriz']
+    matriz = _cargar_archivo(ruta)
+    with _lock:
+        _cargada.update(mtime=mtime, matriz=matriz)
+    return matriz
+
+
+def vecinos(product_type, product_id, limite=K_VECINOS):
+    """
+    Vecinos más frecuentes de un producto: lista de (product_type, product_id, veces).
+    Sin matriz en disco se leen de co_purchase_pairs sólo los de este producto.
+    """
+    matriz = get_matriz()
+    if matriz is not None:
+        return matriz.vecinos_de(product_type, product_id, limite)
+    if product_type not in TIPOS:
+        return []
+    from database import db
+    from models.database_models import CoPurchasePair as Par
+
+    consulta = (Par.query.with_entities(Par.otro_type, Par.otro_id, Par.veces)
+                .filter(Par.product_type == product_type, Par.product_id == product_id)
+                .order_by(Par.veces.desc(), Par.otro_type, Par.otro_id))
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    try:
+        return [tuple(fila) for fila in consulta]
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'No se pudieron leer los vecinos de co-compras: {e}')
+        return []
+
+
+def tambien_compraron(product_type, product_id, limite=4):
+    """Productos comprados junto con este, más frecuentes primero (una consulta por tipo)"""
+    from utils.cart_loader import cargar_productos
+
+    claves = [(tipo, id_) for tipo, id_, _ in vecinos(product_type, product_id, limite)]
+    productos = cargar_productos(claves)
+    return [productos[clave] for clave in claves if clave in productos]
+
+
+def _contar_pares(order_ids):
+    """Pares (producto, otro producto) de las órdenes no canceladas, en ambos sentidos"""
+    from database import db
+    from models.database_models import Order, OrderItem
+
+    canastas = defaultdict(set)
+    for order_id, product_type, product_id in (
+            db.session.query(OrderItem.order_id, OrderItem.product_type, OrderItem.product_id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .filter(Order.id.in_(order_ids), Order.status != 'cancelled',
+                    OrderItem.product_type.in_(TIPOS))):
+        canastas[order_id].add((product_type, product_id))
+
+    pares = Counter()
+    for canasta in canastas.values():
+        productos = sorted(canasta)[:MAX_PRODUCTOS_POR_ORDEN]
+        for a in productos:
+            for b in productos:
+                if a != b:
+                    pares[a, b] += 1
+    return pares
+
+
+def _vecinos_desde_base(productos=None, k=K_VECINOS):
+    """
+    Top-k de co_purchase_pairs para los productos dados (todos si es None):
+    {clave: [(clave_vecino, veces), ...]}
+    """
+    from models.database_models import CoPurchasePair as Par
+
+    def consulta_base():
+        return (Par.query.with_entities(Par.product_type, Par.product_id, Par.otro_type, Par.otro_id, Par.veces)
+                .order_by(Par.product_type, Par.product_id, Par.veces.desc(), Par.otro_type, Par.otro_id))
+
+    if productos is None:
+        consultas = [consulta_base().yield_per(5000)]
+    else:
+        ids = defaultdict(list)
+        for product_type, product_id in productos:
+            ids[product_type].append(product_id)
+        consultas = [consulta_base().filter(Par.product_type == product_type,
+                                            Par.product_id.in_(lista[i:i + LOTE_CONSULTA]))
+                     for product_type, lista in ids.items()
+                     for i in range(0, len(lista), LOTE_CONSULTA)]
+
+    filas = {}
+    for consulta in consultas:
+        for product_type, product_id, otro_type, otro_id, veces in consulta:
+            fila = filas.setdefault(_codificar(product_type, product_id), [])
+            if len(fila) < k:
+                fila.append((_codificar(otro_type, otro_id), veces))
+    return filas
+
+
+def actualizar_matriz(lote=LOTE_ORDENES, k=K_VECINOS):
+    """
+    Sumar los pares de las órdenes nuevas y reescribir las filas afectadas de
+    la matriz en disco. Si el archivo falta o no se puede leer, se reconstruye
+    entero desde co_purchase_pairs.
+
+    Returns:
+        (órdenes procesadas, productos actualizados)
+    """
+    from database import db
+    from models.database_models import CoPurchasePair, JobCheckpoint, upsert_sumando
+    from utils.sales_rollup import ordenes_pendientes
+
+    ruta = current_app.config['CO_PURCHASE_PATH']
+    procesadas, tocados = 0, set()
+    while True:
+        try:
+            checkpoint = JobCheckpoint.bloquear(TRABAJO)
+            order_ids = ordenes_pendientes(checkpoint.ultimo_id, lote)
+            if not order_ids:
+                db.session.commit()
+                break
+            pares = _contar_pares(order_ids)
+            upsert_sumando(db.session.connection(), CoPurchasePair.__table__,
+                           ['product_type', 'product_id', 'otro_type', 'otro_id'],
+                           [{'product_type': a[0], 'product_id': a[1], 'otro_type': b[0], 'otro_id': b[1],
+                             'veces': veces} for (a, b), veces in pares.items()])
+            checkpoint.ultimo_id = order_ids[-1]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        procesadas += len(order_ids)
+        tocados.update(a for a, _ in pares)
+        if len(order_ids) < lote:
+            break
+
+    actual = _cargar_archivo(ruta)
+    if actual is None:
+        CoPurchaseMatrix.desde_filas(_vecinos_desde_base(k=k), k).guardar(ruta)
+    elif tocados:
+        filas = actual.filas()
+        filas.update(_vecinos_desde_base(tocados, k))
+        CoPurchaseMatrix.desde_filas(filas, k).guardar(ruta)
+    return procesadas, len(tocados)
+
+
+def reconstruir(k=K_VECINOS):
+    """Recalcular los pares y la matriz desde todas las órdenes (p. ej. tras cancelaciones)"""
+    from database import db
+    from models.database_models import CoPurchasePair, JobCheckpoint
+
+    checkpoint = JobCheckpoint.bloquear(TRABAJO)
+    db.session.execute(db.delete(CoPurchasePair))
+    checkpoint.ultimo_id = 0
+    db.session.commit()
+    ruta = current_app.config['CO_PURCHASE_PATH']
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    return actualizar_matriz(k=k)
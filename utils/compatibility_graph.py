@@ -0,0 +1,250 @@
+"""
+Grafo de compatibilidad entre componentes
+Precalcula, por versión del catálogo, los índices socket, generación DDR y
+consumo que relacionan CPU, placa base, RAM, GPU y fuente de poder, de modo
+que cada paso del configurador sea una búsqueda indexada.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from utils.catalog_version import VersionedCache
+from utils.json_cache import parse_json_field
+from utils.spec_parser import normalizar_clave, normalizar_texto, parsear_valor
+
+BASE_SYSTEM_WATTS = 100   # Placa, RAM, discos y ventiladores
+PSU_MARGIN = 1.3          # Holgura exigida sobre el consumo estimado
+
+# Generaciones DDR admitidas por socket cuando no hay placas que lo indiquen
+SOCKET_DDR = {
+    'am4': {4},
+    'am5': {5},
+    'lga1200': {4},
+    'lga1700': {4, 5},
+    'lga1851': {5},
+}
+
+# Tipos del catálogo (seed y panel de administración) -> tipo canónico
+TIPOS = {
+    'cpu': 'CPU',
+    'gpu': 'GPU',
+    'ram': 'RAM',
+    'motherboard': 'MOTHERBOARD',
+    'placa_base': 'MOTHERBOARD',
+    'psu': 'PSU',
+    'fuente': 'PSU',
+    'storage': 'STORAGE',
+    'case': 'CASE',
+}
+
+_DDR_RE = re.compile(r'ddr\s*(\d)', re.IGNORECASE)
+_WATTS_RE = re.compile(r'(\d{3,4})\s*w\b', re.IGNORECASE)
+_MODELO_PSU_RE = re.compile(r'(\d{3,4})')
+
+Nodo = namedtuple('Nodo', ['id', 'tipo', 'socket', 'ddr', 'tdp', 'potencia'])
+
+
+def normalizar_tipo(tipo):
+    """Tipo canónico en mayúsculas ('Motherboard' -> 'MOTHERBOARD')"""
+    clave = str(tipo or '').strip().lower().replace(' ', '_')
+    return TIPOS.get(clave, clave.upper())
+
+
+def _generacion_ddr(*textos):
+    """Generación DDR (4, 5...) mencionada en alguno de los textos"""
+    for texto in textos:
+        match = _DDR_RE.search(str(texto or ''))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _potencia_fuente(specs, modelo):
+    """Potencia nominal de una fuente en W, desde specs o desde el modelo ("RM750")"""
+    for clave in ('potencia', 'capacidad', 'tdp'):
+        numero, _, _ = parsear_valor(specs[clave]) if specs.get(clave) is not None else (None, None, None)
+        if numero:
+            return numero
+    match = _WATTS_RE.search(modelo or '') or _MODELO_PSU_RE.search(modelo or '')
+    return float(match.group(1)) if match else None
+
+
+def nodo_desde_fila(hardware_id, tipo, modelo, socket, tdp_watts, especificaciones, updated_at):
+    """Atributos de compatibilidad de un componente"""
+    try:
+        crudas = parse_json_field('hardware', 'especificaciones', hardware_id, updated_at, especificaciones)
+    except (TypeError, ValueError):
+        crudas = {}
+    specs = {normalizar_clave(k): v for k, v in crudas.items()}
+    tipo = normalizar_tipo(tipo)
+
+    socket = socket or specs.get('socket')
+    socket = normalizar_texto(socket) if socket else None
+
+    ddr = None
+    if tipo == 'RAM':
+        ddr = _generacion_ddr(specs.get('tipo'), modelo)
+    elif tipo == 'MOTHERBOARD':
+        ddr = _generacion_ddr(specs.get('memoria'), specs.get('tipo_memoria'), modelo)
+        if ddr is None and len(SOCKET_DDR.get(socket, ())) == 1:
+            ddr = next(iter(SOCKET_DDR[socket]))
+
+    tdp = tdp_watts or None
+    if not tdp and specs.get('tdp') is not None:
+        tdp, _, _ = parsear_valor(specs['tdp'])
+
+    potencia = _potencia_fuente(specs, modelo) if tipo == 'PSU' else None
+    return Nodo(hardware_id, tipo, socket, ddr, tdp or 0, potencia)
+
+
+class CompatibilityGraph:
+    """Índices de compatibilidad del catálogo de hardware"""
+
+    def __init__(self):
+        self.nodos = {}
+        self._por_tipo = {}      # tipo -> ids
+        self._por_socket = {}    # (tipo, socket) -> ids
+        self._por_ddr = {}       # (tipo, generación) -> ids
+        self._por_tdp = {}       # tipo -> lista ordenada de (tdp, id)
+        self._fuentes = []       # lista ordenada de (potencia, id)
+
+    def add(self, nodo):
+        """Agregar un componente a los índices"""
+        self.nodos[nodo.id] = nodo
+        self._por_tipo.setdefault(nodo.tipo, set()).add(nodo.id)
+        if nodo.socket:
+            self._por_socket.setdefault((nodo.tipo, nodo.socket), set()).add(nodo.id)
+        if nodo.ddr:
+            self._por_ddr.setdefault((nodo.tipo, nodo.ddr), set()).add(nodo.id)
+        self._por_tdp.setdefault(nodo.tipo, []).append((nodo.tdp, nodo.id))
+        if nodo.potencia:
+            self._fuentes.append((nodo.potencia, nodo.id))
+
+    def finalizar(self):
+        """Ordenar los índices por consumo/potencia (tras agregar todos los nodos)"""
+        for lista in self._por_tdp.values():
+            lista.sort()
+        self._fuentes.sort()
+        return self
+
+    def ddr_de_socket(self, socket):
+        """Generaciones DDR admitidas por un socket según las placas del catálogo"""
+        generaciones = {self.nodos[i].ddr for i in self._por_socket.get(('MOTHERBOARD', socket), ())
+                        if self.nodos[i].ddr}
+        return generaciones or SOCKET_DDR.get(socket, set())
+
+    def _otras_generaciones(self, tipo, generaciones):
+        """Ids del tipo con una generación DDR conocida fuera de las dadas"""
+        return set().union(*(ids for (tipo_ddr, generacion), ids in self._por_ddr.items()
+                             if tipo_ddr == tipo and generacion not in generaciones))
+
+    def _build(self, build):
+        """Nodos de la configuración parcial, indexados por tipo canónico"""
+        nodos = {}
+        for tipo, hardware_id in (build or {}).items():
+            nodo = self.nodos.get(hardware_id)
+            if nodo and nodo.tipo == normalizar_tipo(tipo):
+                nodos[nodo.tipo] = nodo
+        return nodos
+
+    def consumo_estimado(self, nodos, excluir=None):
+        """Consumo estimado en W de la configuración (sin el tipo excluido)"""
+        return BASE_SYSTEM_WATTS + sum(
+            nodo.tdp for tipo, nodo in nodos.items() if tipo not in ('PSU', excluir))
+
+    def compatibles(self, tipo, build=None):
+        """
+        Ids de los componentes de un tipo compatibles con la configuración parcial.
+
+        Args:
+            tipo: tipo de componente buscado
+            build: dict tipo -> id de los componentes ya elegidos
+
+        Returns:
+            conjunto de ids
+        """
+        tipo = normalizar_tipo(tipo)
+        nodos = self._build(build)
+        nodos.pop(tipo, None)
+        candidatos = set(self._por_tipo.get(tipo, ()))
+
+        cpu, placa, ram, fuente = (nodos.get(t) for t in ('CPU', 'MOTHERBOARD', 'RAM', 'PSU'))
+        socket = (placa or cpu).socket if (placa or cpu) else None
+
+        if tipo in ('CPU', 'MOTHERBOARD') and socket:
+            candidatos &= self._por_socket.get((tipo, socket), set())
+
+        if tipo == 'MOTHERBOARD' and ram and ram.ddr:
+            candidatos -= self._otras_generaciones('MOTHERBOARD', {ram.ddr})
+
+        if tipo == 'CPU' and ram and ram.ddr and not placa:
+            candidatos = {i for i in candidatos
+                          if not self.nodos[i].socket or ram.ddr in self.ddr_de_socket(self.nodos[i].socket)}
+
+        if tipo == 'RAM':
+            if placa and placa.ddr:
+                generaciones = {placa.ddr}
+            elif socket:
+                generaciones = self.ddr_de_socket(socket)
+            else:
+                generaciones = None
+            if generaciones:
+                candidatos -= self._otras_generaciones('RAM', generaciones)
+
+        consumo = self.consumo_estimado(nodos, excluir=tipo)
+        if tipo == 'PSU':
+            # Las fuentes sin potencia conocida no se descartan
+            inicio = bisect_left(self._fuentes, (consumo * PSU_MARGIN, -1))
+            candidatos -= {hardware_id for _, hardware_id in self._fuentes[:inicio]}
+        elif fuente and fuente.potencia and tipo in self._por_tdp:
+            disponible = fuente.potencia / PSU_MARGIN - consumo
+            fin = bisect_right(self._por_tdp[tipo], (disponible, float('inf')))
+            candidatos &= {hardware_id for _, hardware_id in self._por_tdp[tipo][:fin]}
+
+        return candidatos
+
+    def verificar(self, build):
+        """
+        Incompatibilidades de una configuración.
+
+        Returns:
+            lista de mensajes (vacía si todo es compatible)
+        """
+        nodos = self._build(build)
+        cpu, placa, ram, fuente = (nodos.get(t) for t in ('CPU', 'MOTHERBOARD', 'RAM', 'PSU'))
+        problemas = []
+        if cpu and placa and cpu.socket and placa.socket and cpu.socket != placa.socket:
+            problemas.append(f'El socket del procesador ({cpu.socket.upper()}) no coincide '
+                             f'con el de la placa base ({placa.socket.upper()})')
+        if ram and placa and ram.ddr and placa.ddr and ram.ddr != placa.ddr:
+            problemas.append(f'La placa base usa DDR{placa.ddr} y la memoria es DDR{ram.ddr}')
+        elif ram and cpu and not placa and ram.ddr and cpu.socket:
+            generaciones = self.ddr_de_socket(cpu.socket)
+            if generaciones and ram.ddr not in generaciones:
+                problemas.append(f'El socket {cpu.socket.upper()} no admite memoria DDR{ram.ddr}')
+        if fuente and fuente.potencia:
+            requerido = self.consumo_estimado(nodos) * PSU_MARGIN
+            if fuente.potencia < requerido:
+                problemas.append(f'La fuente ({fuente.potencia:.0f} W) es insuficiente; '
+                                 f'se recomiendan al menos {requerido:.0f} W')
+        return problemas
+
+
+def _construir_grafo():
+    """Construir el grafo leyendo sólo las columnas necesarias del catálogo"""
+    from database import db
+    from models.database_models import Hardware
+
+    grafo = CompatibilityGraph()
+    for fila in db.session.query(
+            Hardware.id, Hardware.tipo, Hardware.modelo, Hardware.socket,
+            Hardware.tdp_watts, Hardware.especificaciones, Hardware.updated_at):
+        grafo.add(nodo_desde_fila(*fila))
+    return grafo.finalizar()
+
+
+_grafo_cache = VersionedCache(_construir_grafo)
+
+
+def get_compatibility_graph():
+    """Obtener el grafo de compatibilidad de la versión actual del catálogo"""
+    return _grafo_cache.get()
@@ -0,0 +1,94 @@
+"""
+Productos destacados de la portada
+Mantiene en memoria un ranking top-k por tipo de producto que combina las
+ventas recientes (acumulado de utils/sales_rollup.py), la disponibilidad
+(stock libre > 0) y la antigüedad en el catálogo. El ranking se recalcula con
+consultas acotadas (candidatos más vendidos y más recientes, nunca el catálogo
+completo) cuando vence o cambia la versión del catálogo, así que la portada
+hace el mismo trabajo sin importar el tamaño del catálogo.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime
+
+from utils.catalog_version import get_catalog_version
+
+K_DESTACADOS = 12          # Tamaño del ranking cacheado
+CANDIDATOS = 200           # Más vendidos y más recientes que compiten por el ranking
+DIAS_VENTAS = 30
+PESO_VENTAS = 0.7          # El resto del puntaje es la novedad
+VIDA_MEDIA_DIAS = 60       # La novedad se reduce a la mitad cada VIDA_MEDIA_DIAS
+RANKING_TTL = 300          # Segundos; las ventas y el stock cambian sin cambiar la versión
+
+_lock = threading.Lock()
+_rankings = {}             # product_type -> (versión, vence, ids)
+
+
+def _con_stock(modelo):
+    return modelo.stock > modelo.reservado
+
+
+def calcular_ranking(product_type, k=K_DESTACADOS):
+    """
+    Ids de los k productos con stock libre y mejor puntaje:
+    PESO_VENTAS * ventas relativas + (1 - PESO_VENTAS) * novedad.
+    """
+    from models.database_models import PRODUCT_MODELS
+    from utils.sales_rollup import mas_vendidos
+
+    modelo = PRODUCT_MODELS[product_type]
+    ventas = {product_id: unidades for product_id, unidades, _ in
+              mas_vendidos(product_type, DIAS_VENTAS, CANDIDATOS)}
+    columnas = modelo.query.with_entities(modelo.id, modelo.created_at).filter(_con_stock(modelo))
+    candidatos = dict(columnas.order_by(modelo.id.desc()).limit(CANDIDATOS))
+    if ventas:
+        candidatos.update(columnas.filter(modelo.id.in_(ventas)))
+
+    ahora = datetime.utcnow()
+    max_ventas = max(ventas.values(), default=0) or 1
+
+    def puntaje(product_id):
+        created_at = candidatos[product_id]
+        edad_dias = (ahora - created_at).total_seconds() / 86400 if created_at else VIDA_MEDIA_DIAS * 10
+        novedad = 0.5 ** (max(edad_dias, 0) / VIDA_MEDIA_DIAS)
+        return (PESO_VENTAS * ventas.get(product_id, 0) / max_ventas + (1 - PESO_VENTAS) * novedad,
+                product_id)
+
+    return heapq.nlargest(k, candidatos, key=puntaje)
+
+
+def get_ranking(product_type):
+    """Ranking cacheado del tipo de producto, recalculado al vencer o al cambiar el catálogo"""
+    version = get_catalog_version()
+    ahora = time.monotonic()
+    with _lock:
+        cacheado = _rankings.get(product_type)
+        if cacheado and cacheado[0] == version and cacheado[1] > ahora:
+            return cacheado[2]
+    ids = calcular_ranking(product_type)
+    with _lock:
+        _rankings[product_type] = (version, ahora + RANKING_TTL, ids)
+    return ids
+
+
+def destacados(product_type, n=3):
+    """
+    Los n primeros productos del ranking que siguen con stock libre. Si el
+    ranking no alcanza (productos agotados desde el último cálculo), se
+    completa con una consulta LIMIT de los más recientes.
+    """
+    from models.database_models import PRODUCT_MODELS
+    from utils.cart_loader import cargar_productos
+
+    modelo = PRODUCT_MODELS[product_type]
+    ids = get_ranking(product_type)[:n * 2]
+    productos = cargar_productos((product_type, product_id) for product_id in ids)
+    elegidos = [producto for producto in (productos.get((product_type, product_id)) for product_id in ids)
+                if producto is not None and producto.disponible > 0][:n]
+    if len(elegidos) < n:
+        consulta = modelo.query.filter(_con_stock(modelo))
+        if elegidos:
+            consulta = consulta.filter(modelo.id.notin_([p.id for p in elegidos]))
+        elegidos += consulta.order_by(modelo.id.desc()).limit(n - len(elegidos)).all()
+    return elegidos
@@ -0,0 +1,139 @@
+"""
+Comparación de componentes de hardware
+Construye la matriz de características de varios componentes con una sola
+consulta y la guarda en caché por (ids ordenados, versión del catálogo).
+"""
+import threading
+from collections import OrderedDict
+from utils.catalog_version import VersionedCache
+from utils.json_cache import descongelar
+from utils.spec_parser import parsear_valor
+
+MAX_COMPARAR = 8          # Componentes por comparación como máximo
+COMPARISON_CACHE_SIZE = 256
+
+# Características en las que un valor menor es mejor
+MENOR_ES_MEJOR = {'precio', 'tdp', 'consumo', 'latencia', 'proceso', 'ruido'}
+
+
+def normalizar_ids(componentes_ids):
+    """Ids enteros sin repetir, en el orden recibido y acotados a MAX_COMPARAR"""
+    ids = []
+    for cid in componentes_ids or []:
+        try:
+            cid = int(cid)
+        except (TypeError, ValueError):
+            continue
+        if cid not in ids:
+            ids.append(cid)
+    return ids[:MAX_COMPARAR]
+
+
+def mejores_por_fila(caracteristicas):
+    """
+    Ids con el mejor valor de cada característica numérica.
+
+    Sólo se marcan filas donde al menos dos componentes tienen un valor
+    numérico con la misma unidad y no todos son iguales.
+
+    Returns:
+        dict caracteristica -> lista de ids
+    """
+    mejores = {}
+    for caracteristica, valores in caracteristicas.items():
+        numeros = {}
+        unidades = set()
+        for cid, valor in valores.items():
+            numero, unidad, _ = parsear_valor(valor) if valor != 'N/A' else (None, None, None)
+            if numero is not None:
+                numeros[cid] = numero
+                unidades.add(unidad)
+        if len(numeros) < 2 or len(unidades) > 1 or len(set(numeros.values())) == 1:
+            continue
+        elegir = min if caracteristica in MENOR_ES_MEJOR else max
+        objetivo = elegir(numeros.values())
+        mejores[caracteristica] = [cid for cid, numero in numeros.items() if numero == objetivo]
+    return mejores
+
+
+def construir_comparacion(ids):
+    """Tabla de comparación de los componentes con esos ids (una consulta, un parseo por componente)"""
+    from models.database_models import Hardware
+
+    componentes = Hardware.get_hardware_by_ids(ids)
+    especificaciones = {c.id: descongelar(c.get_especificaciones()) for c in componentes}
+
+    caracteristicas_comunes = sorted({clave for specs in especificaciones.values() for clave in specs})
+    caracteristicas = {
+        caracteristica: {c.id: especificaciones[c.id].get(caracteristica, 'N/A') for c in componentes}
+        for caracteristica in caracteristicas_comunes
+    }
+    caracteristicas['precio'] = {c.id: c.precio for c in componentes}
+
+    return {
+        'componentes': [{
+            'id': c.id,
+            'tipo': c.tipo,
+            'marca': c.marca,
+            'modelo': c.modelo,
+            'precio': c.precio,
+            'imagen': c.imagen
+        } for c in componentes],
+        'caracteristicas': {k: v for k, v in caracteristicas.items() if k != 'precio'},
+        'mejores': mejores_por_fila(caracteristicas)
+    }
+
+
+class _ComparacionesLRU:
+    """Comparaciones recientes de una versión del catálogo"""
+
+    def __init__(self, max_size=COMPARISON_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._datos = OrderedDict()
+
+    def get(self, clave):
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is not None:
+                self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_size:
+                self._datos.popitem(last=False)
+
+
+# Se crea una LRU vacía cada vez que cambia la versión del catálogo
+_comparaciones_cache = VersionedCache(_ComparacionesLRU)
+
+
+def comparar_componentes(componentes_ids):
+    """
+    Comparar componentes de hardware.
+
+    Returns:
+        dict con componentes (en el orden pedido), caracteristicas y mejores,
+        o None si no se encontró ningún componente
+    """
+    ids = normalizar_ids(componentes_ids)
+    if not ids:
+        return None
+
+    cache = _comparaciones_cache.get()
+    clave = tuple(sorted(ids))
+    comparacion = cache.get(clave)
+    if comparacion is None:
+        comparacion = construir_comparacion(clave)
+        cache.set(clave, comparacion)
+
+    if not comparacion['componentes']:
+        return None
+    orden = {cid: posicion for posicion, cid in enumerate(ids)}
+    return {
+        **comparacion,
+        'componentes': sorted(comparacion['componentes'], key=lambda c: orden[c['id']])
+    }
@@ -0,0 +1,167 @@
+"""
+Resolución de nombres de hardware escritos libremente
+Normaliza cadenas como "4060 Ti", "GeForce RTX4060" o "Core i5-12400F" y las
+resuelve contra el catálogo (o cualquier lista de nombres) con un índice
+en memoria de n-gramas de tokens.
+"""
+import math
+import re
+from collections import namedtuple
+from utils.catalog_version import VersionedCache
+from utils.search_index import normalizar
+
+MIN_SCORE = 0.5      # Similitud mínima para aceptar una coincidencia
+EXTRA_WEIGHT = 0.3   # Peso de los n-gramas del candidato ausentes en el texto
+
+# Palabras que no distinguen modelos y se descartan al normalizar
+# (los fabricantes de chips ya quedan implícitos en la serie: rtx, ryzen, i5...)
+STOPWORDS = {
+    'nvidia', 'amd', 'intel', 'geforce', 'radeon', 'graphics', 'grafica',
+    'tarjeta', 'procesador', 'processor', 'cpu', 'gpu', 'de', 'con', 'the',
+    'edition', 'gaming'
+}
+
+# Formas alternativas -> forma canónica (se aplican sobre el texto normalizado)
+ALIASES = [
+    (re.compile(r'\bcore\s+(i[3579])\b'), r'\1'),
+    (re.compile(r'\b(rtx|gtx|rx|gt)(?=\d)'), r'\1 '),
+    (re.compile(r'(?<=\d)(ti|xt|xtx|x3d|super)\b'), r' \1'),
+    (re.compile(r'\bi([3579])\s+(\d{4,5})'), r'i\1 \2'),
+]
+
+_PARTE_RE = re.compile(r'[a-z]+|[0-9]+')
+
+HardwareMatch = namedtuple('HardwareMatch', ['hardware_id', 'tipo', 'nombre', 'benchmark_score', 'score'])
+
+
+def normalizar_nombre(texto):
+    """Normalizar un nombre de hardware a su lista de tokens canónicos"""
+    texto = normalizar(texto)
+    for patron, reemplazo in ALIASES:
+        texto = patron.sub(reemplazo, texto)
+    tokens = []
+    for token in re.findall(r'[a-z0-9]+', texto):
+        if token in STOPWORDS:
+            continue
+        # "i5" y "12400f" se dividen en partes alfabéticas y numéricas
+        tokens.extend(_PARTE_RE.findall(token))
+    return tokens
+
+
+def caracteristicas(tokens):
+    """Unigramas y bigramas de tokens usados como claves del índice"""
+    feats = set(tokens)
+    feats.update(f'{a} {b}' for a, b in zip(tokens, tokens[1:]))
+    return feats
+
+
+class NameResolver:
+    """Índice de n-gramas de tokens sobre una lista de nombres"""
+
+    def __init__(self):
+        self._entradas = {}  # clave -> (tipo, caracteristicas, numeros, datos)
+        self._indice = {}    # caracteristica -> conjunto de claves
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def add(self, clave, texto, tipo=None, datos=None):
+        """Agregar un nombre identificado por clave"""
+        tokens = normalizar_nombre(texto)
+        feats = caracteristicas(tokens)
+        numeros = {t for t in tokens if t.isdigit()}
+        self._entradas[clave] = (tipo, feats, numeros, datos)
+        for feat in feats:
+            self._indice.setdefault(feat, set()).add(clave)
+
+    def _idf(self, feat):
+        """Peso de una característica: las poco frecuentes distinguen más"""
+        frecuencia = len(self._indice.get(feat, ())) or 1
+        return math.log(1 + len(self._entradas) / frecuencia)
+
+    def candidates(self, texto, tipo=None, limite=5):
+        """
+        Nombres más parecidos al texto.
+
+        La similitud es un índice de Tversky ponderado por IDF entre
+        n-gramas: lo que falta del texto penaliza por completo y lo que
+        sobra del candidato sólo con EXTRA_WEIGHT, de modo que "4060 Ti"
+        coincide con "RTX 4060 Ti". Se exige que todos los números del
+        texto (p. ej. "4060") aparezcan en el candidato para no confundir
+        modelos cercanos.
+
+        Returns:
+            lista de tuplas (clave, similitud, datos) ordenada por similitud
+        """
+        tokens = normalizar_nombre(texto)
+        feats = caracteristicas(tokens)
+        numeros = {t for t in tokens if t.isdigit()}
+        if not feats:
+            return []
+
+        pesos = {feat: self._idf(feat) for feat in feats if feat in self._indice}
+        claves = set()
+        for feat in pesos:
+            claves.update(self._indice[feat])
+
+        resultados = []
+        for clave in claves:
+            tipo_entrada, feats_entrada, numeros_entrada, datos = self._entradas[clave]
+            if tipo and tipo_entrada and tipo_entrada.upper() != tipo.upper():
+                continue
+            if not numeros <= numeros_entrada:
+                continue
+            comunes = sum(pesos[f] for f in feats & feats_entrada)
+            faltantes = sum(pesos[f] if f in pesos else self._idf(f) for f in feats - feats_entrada)
+            sobrantes = sum(self._idf(f) for f in feats_entrada - feats)
+            total = comunes + faltantes + EXTRA_WEIGHT * sobrantes
+            if total:
+                resultados.append((clave, comunes / total, datos))
+
+        resultados.sort(key=lambda r: (-r[1], str(r[0])))
+        return resultados[:limite]
+
+    def resolve(self, texto, tipo=None, min_score=MIN_SCORE):
+        """Mejor coincidencia (clave, similitud, datos) o None si ninguna supera min_score"""
+        resultados = self.candidates(texto, tipo, limite=1)
+        if resultados and resultados[0][1] >= min_score:
+            return resultados[0]
+        return None
+
+
+def _construir_resolver():
+    """Indexar marca + modelo de todo el catálogo de hardware"""
+    from database import db
+    from models.database_models import Hardware
+
+    resolver = NameResolver()
+    for hardware_id, tipo, marca, modelo, benchmark_score in db.session.query(
+            Hardware.id, Hardware.tipo, Hardware.marca, Hardware.modelo, Hardware.benchmark_score):
+        nombre = f'{marca} {modelo}'
+        resolver.add(hardware_id, nombre, tipo, datos=(tipo, nombre, benchmark_score or 0))
+    return resolver
+
+
+_resolver_cache = VersionedCache(_construir_resolver)
+
+
+def get_hardware_resolver():
+    """Obtener el resolvedor del catálogo de hardware de la versión actual"""
+    return _resolver_cache.get()
+
+
+def resolve_hardware(texto, tipo=None):
+    """
+    Resolver un nombre libre a un componente del catálogo.
+
+    Returns:
+        HardwareMatch con id, tipo, nombre y benchmark, o None
+    """
+    if not texto:
+        return None
+    resolver = get_hardware_resolver()
+    resultado = resolver.resolve(texto, tipo)
+    if not resultado:
+        return None
+    hardware_id, score, (tipo_entrada, nombre, benchmark_score) = resultado
+    return HardwareMatch(hardware_id, tipo_entrada, nombre, benchmark_score, round(score, 3))
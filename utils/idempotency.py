@@ -0,0 +1,180 @@
+"""
+Claves de idempotencia para peticiones POST con efectos secundarios
+La primera petición con una clave reserva una fila en idempotency_keys (la
+restricción única hace de cerrojo entre workers de gunicorn) y guarda su
+respuesta; las repeticiones dentro de la ventana reciben esa misma respuesta
+sin volver a ejecutar la vista.
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, request, Response
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+
+CABECERA = 'Idempotency-Key'
+CAMPO_FORMULARIO = 'idempotency_key'
+MAX_LONGITUD_CLAVE = 64
+ESPERA_MAXIMA = 5.0      # Segundos esperando a que termine la petición original
+INTERVALO_ESPERA = 0.1
+
+
+def nueva_clave():
+    """Clave nueva para un formulario (campo oculto idempotency_key)"""
+    return uuid.uuid4().hex
+
+
+def init_idempotency(app):
+    """Configurar la ventana de idempotencia y exponer nueva_clave a las plantillas"""
+    app.config.setdefault('IDEMPOTENCY_TTL_MINUTES', 60)
+    app.jinja_env.globals['idempotency_key'] = nueva_clave
+
+
+def _clave_peticion():
+    """Clave recibida en la cabecera o en el formulario (None si no hay o es inválida)"""
+    clave = request.headers.get(CABECERA) or request.form.get(CAMPO_FORMULARIO)
+    if not clave or len(clave) > MAX_LONGITUD_CLAVE:
+        return None
+    return clave
+
+
+def _huella():
+    """SHA-256 del cuerpo de la petición, sin el token CSRF ni la propia clave"""
+    if request.form:
+        campos = sorted((k, v) for k, v in request.form.items(multi=True)
+                        if k not in ('csrf_token', CAMPO_FORMULARIO))
+        datos = repr(campos).encode()
+    else:
+        datos = request.get_data()
+    return hashlib.sha256(request.path.encode() + b'\0' + datos).hexdigest()
+
+
+def _respuesta_guardada(registro):
+    """Reconstruir la respuesta original"""
+    respuesta = Response(registro.body or b'', status=registro.status_code, content_type=registro.content_type)
+    if registro.location:
+        respuesta.headers['Location'] = registro.location
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def _reservar(clave, huella):
+    """
+    Insertar la fila de la clave.
+
+    Returns:
+        (registro propio, None) si esta petición es la original, o
+        (None, registro existente) si la clave ya estaba en uso
+    """
+    from database import db
+    from models.database_models import IdempotencyKey
+
+    criterios = {'user_id': current_user.id, 'endpoint': request.endpoint, 'clave': clave}
+    for _ in range(2):
+        registro = IdempotencyKey(huella=huella, **criterios)
+        db.session.add(registro)
+        try:
+            db.session.commit()
+            return registro, None
+        except IntegrityError:
+            db.session.rollback()
+
+        existente = IdempotencyKey.query.filter_by(**criterios).first()
+        vencimiento = datetime.utcnow() - timedelta(minutes=current_app.config['IDEMPOTENCY_TTL_MINUTES'])
+        if existente is None or existente.created_at < vencimiento:
+            # Clave fuera de la ventana: se descarta y se vuelve a reservar
+            IdempotencyKey.query.filter_by(**criterios).filter(
+                IdempotencyKey.created_at < vencimiento).delete(synchronize_session=False)
+            db.session.commit()
+            continue
+        return None, existente
+    return None, existente
+
+
+def _esperar_resultado(registro):
+    """
+    Esperar a que la petición original guarde su respuesta.
+
+    Returns:
+        el registro con la respuesta, None si la original falló y liberó la
+        clave, o False si no terminó a tiempo
+    """
+    from database import db
+    from models.database_models import IdempotencyKey
+
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while registro is not None and registro.status_code is None and time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        db.session.expire_all()
+        registro = db.session.get(IdempotencyKey, registro.id)
+    if registro is None:
+        return None  # La petición original falló y liberó la clave
+    return registro if registro.status_code is not None else False
+
+
+def _responder_conflicto(mensaje, codigo_http):
+    if request.is_json or request.headers.get(CABECERA):
+        return jsonify({'success': False, 'message': mensaje}), codigo_http
+    return Response(mensaje, status=codigo_http, content_type='text/plain; charset=utf-8')
+
+
+def _guardar(registro, respuesta):
+    """Guardar la respuesta de la petición original, o liberar la clave si falló"""
+    from database import db
+    from models.database_models import IdempotencyKey
+
+    if respuesta is None:
+        db.session.rollback()  # La vista lanzó una excepción
+    filtro = IdempotencyKey.query.filter_by(id=registro.id)
+    if respuesta is None or respuesta.status_code >= 500 or respuesta.is_streamed:
+        # Los errores del servidor se pueden reintentar con la misma clave
+        filtro.delete(synchronize_session=False)
+    else:
+        filtro.update({
+            'status_code': respuesta.status_code,
+            'location': respuesta.headers.get('Location'),
+            'content_type': respuesta.content_type,
+            'body': respuesta.get_data(),
+        }, synchronize_session=False)
+    db.session.commit()
+
+
+def idempotente(vista):
+    """
+    Decorador para vistas POST: con una clave de idempotencia (cabecera
+    Idempotency-Key o campo idempotency_key) la vista se ejecuta una sola vez
+    por usuario y clave dentro de la ventana IDEMPOTENCY_TTL_MINUTES.
+
+    Sin clave, o para visitantes anónimos (cuyo carrito vive en la sesión), la
+    vista se ejecuta normalmente.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        clave = _clave_peticion() if request.method == 'POST' else None
+        if clave is None or not current_user.is_authenticated:
+            return vista(*args, **kwargs)
+
+        huella = _huella()
+        registro, existente = _reservar(clave, huella)
+        if registro is None and existente is None:
+            return vista(*args, **kwargs)
+        if registro is None:
+            if existente.huella != huella:
+                return _responder_conflicto('La clave de idempotencia ya se usó con otros datos', 422)
+            resultado = _esperar_resultado(existente)
+            if resultado is None:
+                return envoltura(*args, **kwargs)
+            if resultado is False:
+                return _responder_conflicto('La solicitud original todavía se está procesando', 409)
+            return _respuesta_guardada(resultado)
+
+        respuesta = None
+        try:
+            respuesta = current_app.make_response(vista(*args, **kwargs))
+            return respuesta
+        finally:
+            _guardar(registro, respuesta)
+
+    return envoltura
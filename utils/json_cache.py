@@ -0,0 +1,90 @@
+"""
+Caché de campos JSON ya parseados
+Evita repetir json.loads sobre las columnas de texto JSON (especificaciones,
+requisitos) en cada llamada desde plantillas, comparaciones y to_dict.
+"""
+import json
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Entradas máximas (una por fila y campo)
+JSON_CACHE_SIZE = 4096
+
+EMPTY = MappingProxyType({})
+
+
+def congelar(valor):
+    """Convertir dicts y listas en estructuras de solo lectura"""
+    if isinstance(valor, dict):
+        return MappingProxyType({k: congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def descongelar(valor):
+    """Copia mutable (dicts y listas) de un valor congelado, p. ej. para jsonify"""
+    if isinstance(valor, MappingProxyType):
+        return {k: descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [descongelar(v) for v in valor]
+    return valor
+
+
+class ParsedJSONCache:
+    """Caché LRU acotada de valores JSON parseados"""
+
+    def __init__(self, max_size=JSON_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._datos = OrderedDict()  # clave -> (texto original, valor congelado)
+
+    def get(self, clave, raw):
+        """
+        Obtener el valor parseado de raw.
+
+        El texto original se guarda junto al valor: si la fila cambió en la
+        sesión sin actualizar updated_at, la entrada no se reutiliza.
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] == raw:
+                self._datos.move_to_end(clave)
+                return entrada[1]
+
+        valor = congelar(json.loads(raw))
+
+        with self._lock:
+            self._datos[clave] = (raw, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_size:
+                self._datos.popitem(last=False)
+        return valor
+
+    def clear(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._datos.clear()
+
+
+_cache = ParsedJSONCache()
+
+
+def parse_json_field(tabla, campo, row_id, updated_at, raw):
+    """
+    Parsear un campo JSON de una fila usando la caché por (fila, updated_at).
+
+    Las filas sin id (objetos temporales) se parsean sin cachear.
+
+    Returns:
+        mapping de solo lectura (o EMPTY si el campo está vacío)
+
+    Raises:
+        ValueError: si el texto no es JSON válido
+    """
+    if not raw:
+        return EMPTY
+    if row_id is None:
+        return congelar(json.loads(raw))
+    return _cache.get((tabla, campo, row_id, updated_at), raw)
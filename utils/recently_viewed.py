@@ -0,0 +1,77 @@
+"""
+Productos vistos recientemente
+Se guardan en la cookie de sesión firmada (sin escrituras en la base de datos)
+como un búfer circular de MAX_RECIENTES pares (tipo, id), del más reciente al
+más antiguo. Para que la cookie siga siendo pequeña cada par se codifica como
+la letra del tipo y la diferencia con el id anterior en base 36
+('g1c.h-5.g3' -> juego 48, hardware 43, juego 46).
+"""
+from flask import session
+
+CLAVE_SESION = 'vistos'
+MAX_RECIENTES = 8
+TIPOS = {'game': 'g', 'hardware': 'h'}
+_TIPOS_POR_LETRA = {letra: tipo for tipo, letra in TIPOS.items()}
+_DIGITOS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _base36(numero):
+    signo = '-' if numero < 0 else ''
+    numero = abs(numero)
+    digitos = ''
+    while True:
+        numero, resto = divmod(numero, 36)
+        digitos = _DIGITOS[resto] + digitos
+        if not numero:
+            return signo + digitos
+
+
+def codificar(pares):
+    """Lista de (product_type, product_id) -> texto compacto"""
+    anterior, partes = 0, []
+    for product_type, product_id in pares:
+        partes.append(TIPOS[product_type] + _base36(product_id - anterior))
+        anterior = product_id
+    return '.'.join(partes)
+
+
+def decodificar(texto):
+    """Texto compacto -> lista de (product_type, product_id); vacía si es inválido"""
+    if not isinstance(texto, str) or not texto:
+        return []
+    anterior, pares = 0, []
+    try:
+        for parte in texto.split('.')[:MAX_RECIENTES]:
+            anterior += int(parte[1:], 36)
+            pares.append((_TIPOS_POR_LETRA[parte[0]], anterior))
+    except (KeyError, ValueError, IndexError):
+        return []
+    return pares
+
+
+def obtener():
+    """Productos vistos, del más reciente al más antiguo"""
+    return decodificar(session.get(CLAVE_SESION))
+
+
+def registrar(product_type, product_id):
+    """Poner un producto al frente; el más antiguo sale si el búfer está lleno"""
+    pares = obtener()
+    if pares[:1] == [(product_type, product_id)]:
+        return  # Sin cambios: no reescribir la cookie
+    pares = [(product_type, product_id)] + [par for par in pares if par != (product_type, product_id)]
+    session[CLAVE_SESION] = codificar(pares[:MAX_RECIENTES])
+
+
+def productos_recientes(excluir=None, limite=MAX_RECIENTES):
+    """
+    Productos vistos recientemente ya cargados (una consulta por tipo, como
+    máximo MAX_RECIENTES filas), omitiendo `excluir` (product_type, product_id).
+    """
+    from utils.cart_loader import cargar_productos
+
+    pares = [par for par in obtener() if par != excluir][:limite]
+    if not pares:
+        return []
+    productos = cargar_productos(pares)
+    return [productos[par] for par in pares if par in productos]
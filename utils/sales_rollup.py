@@ -0,0 +1,193 @@
+"""
+Acumulado incremental de ventas
+Suma las órdenes nuevas a las tablas product_sales_daily y category_sales_daily
+(ventas por día y producto, y por día y género/tipo). La marca de agua en
+job_checkpoints guarda el último orders.id procesado, de modo que cada
+ejecución lee sólo las órdenes posteriores. Los rankings de más vendidos de la
+portada y del panel leen estas tablas en lugar de agrupar order_items.
+"""
+from datetime import datetime, timedelta
+
+TRABAJO = 'sales_rollup'
+LOTE_ORDENES = 500
+MARGEN_MINUTOS = 5   # Las órdenes más recientes pueden tener transacciones aún abiertas
+
+
+def ordenes_pendientes(ultimo_id, lote):
+    """
+    Ids de las siguientes órdenes a procesar, en orden, hasta la primera
+    creada dentro del margen de seguridad.
+    """
+    from models.database_models import Order
+
+    corte = datetime.utcnow() - timedelta(minutes=MARGEN_MINUTOS)
+    ids = []
+    for order_id, created_at in (Order.query.with_entities(Order.id, Order.created_at)
+                                 .filter(Order.id > ultimo_id).order_by(Order.id).limit(lote)):
+        if created_at and created_at >= corte:
+            break
+        ids.append(order_id)
+    return ids
+
+
+def _agregar(order_ids):
+    """
+    Agrupar las líneas de las órdenes por día y producto (sin órdenes canceladas).
+
+    Returns:
+        (filas por producto, filas por categoría) listas para upsert_sumando
+    """
+    from database import db
+    from models.database_models import Order, OrderItem, _como_fecha
+    from utils.cart_loader import cargar_productos
+    from utils.compatibility_graph import normalizar_tipo
+
+    dia = db.func.date(Order.created_at)
+    consulta = (db.session.query(
+        dia, OrderItem.product_type, OrderItem.product_id,
+        db.func.sum(OrderItem.quantity),
+        db.func.sum(OrderItem.quantity * OrderItem.price),
+        db.func.count(db.distinct(Order.id)))
+        .join(Order, Order.id == OrderItem.order_id)
+        .filter(Order.id.in_(order_ids), Order.status != 'cancelled')
+        .group_by(dia, OrderItem.product_type, OrderItem.product_id))
+
+    productos = [{
+        'fecha': _como_fecha(fecha), 'product_type': product_type, 'product_id': product_id,
+        'unidades': int(unidades or 0), 'ingresos': round(ingresos or 0.0, 2), 'ordenes': ordenes,
+    } for fecha, product_type, product_id, unidades, ingresos, ordenes in consulta]
+
+    catalogo = cargar_productos((f['product_type'], f['product_id']) for f in productos)
+    categorias = {}
+    for fila in productos:
+        producto = catalogo.get((fila['product_type'], fila['product_id']))
+        if producto is None:
+            categoria = 'Otros'
+        elif fila['product_type'] == 'game':
+            categoria = producto.genero or 'Otros'
+        else:
+            categoria = normalizar_tipo(producto.tipo) or 'Otros'
+        clave = (fila['fecha'], fila['product_type'], categoria[:50])
+        acumulado = categorias.setdefault(clave, [0, 0.0])
+        acumulado[0] += fila['unidades']
+        acumulado[1] += fila['ingresos']
+    por_categoria = [{
+        'fecha': fecha, 'product_type': product_type, 'categoria': categoria,
+        'unidades': unidades, 'ingresos': round(ingresos, 2),
+    } for (fecha, product_type, categoria), (unidades, ingresos) in categorias.items()]
+    return productos, por_categoria
+
+
+def acumular_ventas(lote=LOTE_ORDENES):
+    """
+    Procesar las órdenes posteriores a la marca de agua, en lotes de `lote`
+    órdenes y una transacción por lote (acumulado y marca de agua juntos).
+
+    Returns:
+        número de órdenes procesadas
+    """
+    from database import db
+    from models.database_models import JobCheckpoint, ProductSalesDaily, CategorySalesDaily, upsert_sumando
+
+    procesadas = 0
+    while True:
+        try:
+            checkpoint = JobCheckpoint.bloquear(TRABAJO)
+            order_ids = ordenes_pendientes(checkpoint.ultimo_id, lote)
+            if not order_ids:
+                db.session.commit()
+                return procesadas
+            productos, categorias = _agregar(order_ids)
+            connection = db.session.connection()
+            upsert_sumando(connection, ProductSalesDaily.__table__,
+                           ['fecha', 'product_type', 'product_id'], productos)
+            upsert_sumando(connection, CategorySalesDaily.__table__,
+                           ['fecha', 'product_type', 'categoria'], categorias)
+            checkpoint.ultimo_id = order_ids[-1]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        procesadas += len(order_ids)
+        if len(order_ids) < lote:
+            return procesadas
+
+
+def mas_vendidos(product_type, dias=30, limite=10):
+    """
+    Productos más vendidos de los últimos N días según el acumulado.
+
+    Returns:
+        lista de (product_id, unidades, ingresos) ordenada por unidades
+    """
+    from database import db
+    from models.database_models import ProductSalesDaily as Ventas
+
+    desde = datetime.utcnow().date() - timedelta(days=dias - 1)
+    unidades = db.func.sum(Ventas.unidades)
+    return [(product_id, int(total), round(ingresos or 0.0, 2)) for product_id, total, ingresos in
+            db.session.query(Ventas.product_id, unidades, db.func.sum(Ventas.ingresos))
+            .filter(Ventas.product_type == product_type, Ventas.fecha >= desde)
+            .group_by(Ventas.product_id)
+            .order_by(unidades.desc(), Ventas.product_id)
+            .limit(limite)]
+
+
+def productos_mas_vendidos(product_type, dias=30, limite=10):
+    """Como mas_vendidos pero con los productos cargados: lista de (producto, unidades, ingresos)"""
+    from utils.cart_loader import cargar_productos
+
+    ranking = mas_vendidos(product_type, dias, limite)
+    catalogo = cargar_productos((product_type, product_id) for product_id, _, _ in ranking)
+    return [(catalogo[(product_type, product_id)], unidades, ingresos)
+            for product_id, unidades, ingresos in ranking if (product_type, product_id) in catalogo]
+
+
+def ventas_por_categoria(product_type, dias=30):
+    """Unidades e ingresos por género (juegos) o tipo (hardware) de los últimos N días"""
+    from database import db
+    from models.database_models import CategorySalesDaily as Ventas
+
+    desde = datetime.utcnow().date() - timedelta(days=dias - 1)
+    unidades = db.func.sum(Ventas.unidades)
+    return [(categoria, int(total), round(ingresos or 0.0, 2)) for categoria, total, ingresos in
+            db.session.query(Ventas.categoria, unidades, db.func.sum(Ventas.ingresos))
+            .filter(Ventas.product_type == product_type, Ventas.fecha >= desde)
+            .group_by(Ventas.categoria)
+            .order_by(unidades.desc())]
+
+
+def reconstruir(dias=None):
+    """
+    Recalcular el acumulado desde cero (o sus últimos N días) hasta la marca de
+    agua y después acumular las órdenes pendientes. Corrige las órdenes
+    canceladas después de acumularse; no hace falta en la operación normal.
+
+    Returns:
+        número de órdenes procesadas
+    """
+    from database import db
+    from models.database_models import (JobCheckpoint, Order, ProductSalesDaily,
+                                        CategorySalesDaily, upsert_sumando)
+
+    checkpoint = JobCheckpoint.bloquear(TRABAJO)
+    consulta = Order.query.with_entities(Order.id).filter(Order.id <= checkpoint.ultimo_id)
+    borrar_productos, borrar_categorias = db.delete(ProductSalesDaily), db.delete(CategorySalesDaily)
+    if dias:
+        desde = datetime.utcnow().date() - timedelta(days=dias - 1)
+        consulta = consulta.filter(Order.created_at >= datetime.combine(desde, datetime.min.time()))
+        borrar_productos = borrar_productos.where(ProductSalesDaily.fecha >= desde)
+        borrar_categorias = borrar_categorias.where(CategorySalesDaily.fecha >= desde)
+    db.session.execute(borrar_productos)
+    db.session.execute(borrar_categorias)
+
+    order_ids = [order_id for order_id, in consulta.order_by(Order.id)]
+    connection = db.session.connection()
+    for i in range(0, len(order_ids), LOTE_ORDENES):
+        productos, categorias = _agregar(order_ids[i:i + LOTE_ORDENES])
+        upsert_sumando(connection, ProductSalesDaily.__table__,
+                       ['fecha', 'product_type', 'product_id'], productos)
+        upsert_sumando(connection, CategorySalesDaily.__table__,
+                       ['fecha', 'product_type', 'categoria'], categorias)
+    db.session.commit()
+    return len(order_ids) + acumular_ventas()
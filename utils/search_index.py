@@ -0,0 +1,233 @@
+"""
+Índice de búsqueda tolerante a errores ortográficos
+Implementa SymSpell (borrado simétrico) sobre el vocabulario del catálogo
+para ofrecer correcciones ("¿Quisiste decir?") y coincidencias aproximadas
+sin recorrer la base de datos.
+"""
+import re
+import unicodedata
+from utils.catalog_version import VersionedCache
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7        # Sólo se indexan borrados sobre este prefijo (acota memoria y coste)
+MAX_QUERY_TOKENS = 6     # Tokens de la consulta que se procesan como máximo
+MAX_TOKEN_LENGTH = 30
+MAX_CANDIDATES = 200     # Candidatos verificados por token como máximo
+MIN_FUZZY_LENGTH = 4     # Tokens más cortos sólo admiten coincidencia exacta
+MAX_SUGGESTIONS = 3
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_SEGMENT_RE = re.compile(r'[a-z]+|[0-9]+')
+
+
+def normalizar(texto):
+    """Pasar a minúsculas y eliminar acentos"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return texto.encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def tokenizar(texto):
+    """Dividir un texto en tokens alfanuméricos normalizados"""
+    return _TOKEN_RE.findall(normalizar(texto))
+
+
+def distancia_edicion(a, b, max_distance):
+    """
+    Distancia Damerau-Levenshtein (alineamiento óptimo) con corte temprano.
+    Devuelve max_distance + 1 si la distancia supera el máximo.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = actual[0]
+        for j in range(1, len(b) + 1):
+            coste = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + coste)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+            minimo_fila = min(minimo_fila, actual[j])
+        if minimo_fila > max_distance:
+            return max_distance + 1
+        anterior2, anterior = anterior, actual
+    return anterior[len(b)]
+
+
+class SymSpellIndex:
+    """Diccionario de palabras con índice de borrados simétricos"""
+
+    def __init__(self, max_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._postings = {}  # palabra -> conjunto de claves de producto
+        self._deletes = {}   # variante con borrados -> conjunto de palabras
+
+    def __contains__(self, palabra):
+        return palabra in self._postings
+
+    def add(self, palabra, clave):
+        """Agregar una palabra del vocabulario asociada a un producto"""
+        if palabra not in self._postings:
+            self._postings[palabra] = set()
+            for variante in self._variantes(palabra[:self.prefix_length], self.max_distance):
+                self._deletes.setdefault(variante, set()).add(palabra)
+        self._postings[palabra].add(clave)
+
+    def postings(self, palabra):
+        """Productos que contienen la palabra"""
+        return self._postings.get(palabra, set())
+
+    @staticmethod
+    def _variantes(palabra, max_distance):
+        """Variantes de la palabra con hasta max_distance caracteres borrados"""
+        variantes = {palabra}
+        frontera = {palabra}
+        for _ in range(max_distance):
+            siguiente = set()
+            for variante in frontera:
+                if len(variante) <= 1:
+                    continue
+                for i in range(len(variante)):
+                    siguiente.add(variante[:i] + variante[i + 1:])
+            siguiente -= variantes
+            variantes |= siguiente
+            frontera = siguiente
+        return variantes
+
+    def lookup(self, palabra, limite=MAX_SUGGESTIONS):
+        """
+        Buscar palabras del vocabulario cercanas a la dada.
+
+        El coste depende sólo de la longitud de la palabra (número de
+        variantes) y de MAX_CANDIDATES, no del tamaño del catálogo.
+
+        Returns:
+            lista de tuplas (palabra, distancia) ordenada por cercanía
+        """
+        if palabra in self._postings:
+            return [(palabra, 0)]
+        if len(palabra) < MIN_FUZZY_LENGTH:
+            return []
+
+        max_distance = 1 if len(palabra) < 6 else self.max_distance
+        candidatos = set()
+        for variante in self._variantes(palabra[:self.prefix_length], max_distance):
+            candidatos.update(self._deletes.get(variante, ()))
+            if len(candidatos) >= MAX_CANDIDATES:
+                break
+
+        resultados = []
+        for candidato in candidatos:
+            distancia = distancia_edicion(palabra, candidato, max_distance)
+            if distancia <= max_distance:
+                resultados.append((candidato, distancia))
+
+        resultados.sort(key=lambda r: (r[1], -len(self._postings[r[0]]), r[0]))
+        return resultados[:limite]
+
+
+class SearchIndex:
+    """Índice del vocabulario del catálogo para correcciones y búsqueda aproximada"""
+
+    def __init__(self):
+        self.diccionario = SymSpellIndex()
+
+    def add_document(self, clave, *textos):
+        """Indexar los textos de un producto identificado por clave ('game'|'hardware', id)"""
+        for texto in textos:
+            for token in tokenizar(texto):
+                self.diccionario.add(token, clave)
+
+    def _segmentar(self, token):
+        """Separar tokens pegados como '4060ti' en partes conocidas ('4060', 'ti')"""
+        segmentos = _SEGMENT_RE.findall(token)
+        if len(segmentos) > 1 and all(s in self.diccionario for s in segmentos):
+            return segmentos
+        return None
+
+    def _analizar(self, query):
+        """
+        Resolver cada token de la consulta a palabras del vocabulario.
+
+        Returns:
+            lista de listas de (palabra, distancia); una lista vacía indica
+            un token desconocido
+        """
+        grupos = []
+        for token in tokenizar(query)[:MAX_QUERY_TOKENS]:
+            token = token[:MAX_TOKEN_LENGTH]
+            if token in self.diccionario:
+                grupos.append([(token, 0)])
+                continue
+            segmentos = self._segmentar(token)
+            if segmentos:
+                grupos.extend([(segmento, 0)] for segmento in segmentos)
+                continue
+            grupos.append(self.diccionario.lookup(token))
+        return grupos
+
+    def suggest(self, query):
+        """Consulta corregida para '¿Quisiste decir?', o None si no hay corrección"""
+        grupos = self._analizar(query)
+        palabras = [grupo[0][0] for grupo in grupos if grupo]
+        if not palabras:
+            return None
+        sugerencia = ' '.join(palabras)
+        if sugerencia == ' '.join(tokenizar(query)[:MAX_QUERY_TOKENS]):
+            return None
+        return sugerencia
+
+    def search(self, query, limite=24):
+        """
+        Productos que coinciden de forma aproximada con la consulta.
+
+        Cada token conocido aporta los productos de sus palabras cercanas;
+        se devuelven los que coinciden con más tokens, priorizando menor
+        distancia de edición.
+
+        Returns:
+            lista de claves ('game'|'hardware', id)
+        """
+        puntuaciones = {}
+        for grupo in self._analizar(query):
+            mejores = {}
+            for palabra, distancia in grupo:
+                for clave in self.diccionario.postings(palabra):
+                    if clave not in mejores or distancia < mejores[clave]:
+                        mejores[clave] = distancia
+            for clave, distancia in mejores.items():
+                coincidencias, distancia_total = puntuaciones.get(clave, (0, 0))
+                puntuaciones[clave] = (coincidencias + 1, distancia_total + distancia)
+
+        if not puntuaciones:
+            return []
+        max_coincidencias = max(c for c, _ in puntuaciones.values())
+        claves = [clave for clave, (c, _) in puntuaciones.items() if c == max_coincidencias]
+        claves.sort(key=lambda clave: (puntuaciones[clave][1], clave))
+        return claves[:limite]
+
+
+def _construir_indice():
+    """Construir el índice leyendo sólo las columnas de texto necesarias"""
+    from database import db
+    from models.database_models import Game, Hardware
+
+    indice = SearchIndex()
+    for juego_id, nombre, genero, desarrollador in db.session.query(
+            Game.id, Game.nombre, Game.genero, Game.desarrollador):
+        indice.add_document(('game', juego_id), nombre, genero, desarrollador)
+    for hardware_id, tipo, marca, modelo in db.session.query(
+            Hardware.id, Hardware.tipo, Hardware.marca, Hardware.modelo):
+        indice.add_document(('hardware', hardware_id), tipo, marca, modelo)
+    return indice
+
+
+_indice_cache = VersionedCache(_construir_indice)
+
+
+def get_search_index():
+    """Obtener el índice de búsqueda de la versión actual del catálogo"""
+    return _indice_cache.get()
@@ -0,0 +1,168 @@
+"""
+Carrito en sesión para visitantes anónimos
+Los productos se guardan en la cookie de sesión firmada (sin escrituras en la
+base de datos) y se fusionan con cart_items cuando el usuario inicia sesión.
+"""
+from collections import namedtuple
+from flask import session
+
+CLAVE_SESION = 'carrito'
+MAX_LINEAS_SESION = 25   # Acota el tamaño de la cookie
+STOCK_INSUFICIENTE = 'Stock insuficiente'
+
+# Mismos atributos que CartItem, para reutilizar load_cart y las plantillas
+SessionCartItem = namedtuple('SessionCartItem', ['id', 'product_type', 'product_id', 'quantity'])
+
+
+def _leer():
+    """Contenido del carrito en sesión: {'n': siguiente id, 'items': [[id, tipo, producto, cantidad], ...]}"""
+    datos = session.get(CLAVE_SESION)
+    if not isinstance(datos, dict) or not isinstance(datos.get('items'), list):
+        return {'n': 1, 'items': []}
+    return datos
+
+
+def _guardar(datos):
+    session[CLAVE_SESION] = datos
+    session.modified = True
+
+
+def obtener_items():
+    """Items del carrito en sesión"""
+    return [SessionCartItem(*fila) for fila in _leer()['items']]
+
+
+def contar():
+    """Número de líneas del carrito en sesión (badge del navbar)"""
+    return len(_leer()['items'])
+
+
+def cantidad_en_carrito(product_type, product_id):
+    """Cantidad de un producto que ya está en el carrito en sesión"""
+    for _, tipo, producto, cantidad in _leer()['items']:
+        if (tipo, producto) == (product_type, product_id):
+            return cantidad
+    return 0
+
+
+def agregar(product_type, product_id, quantity, disponible=None):
+    """
+    Agregar un producto al carrito en sesión.
+
+    Args:
+        disponible: unidades disponibles del producto; la cantidad total de la
+            línea no puede superarlas (None = sin límite)
+
+    Returns:
+        mensaje para el usuario
+
+    Raises:
+        ValueError: si el carrito alcanzó MAX_LINEAS_SESION o no hay stock suficiente
+    """
+    if disponible is not None and cantidad_en_carrito(product_type, product_id) + quantity > disponible:
+        raise ValueError(STOCK_INSUFICIENTE)
+    datos = _leer()
+    for fila in datos['items']:
+        if (fila[1], fila[2]) == (product_type, product_id):
+            fila[3] += quantity
+            _guardar(datos)
+            return 'Cantidad actualizada en el carrito'
+
+    if len(datos['items']) >= MAX_LINEAS_SESION:
+        raise ValueError('Tu carrito está lleno. Inicia sesión para agregar más productos.')
+    datos['items'].append([datos['n'], product_type, product_id, quantity])
+    datos['n'] += 1
+    _guardar(datos)
+    return 'Producto agregado al carrito'
+
+
+def obtener(item_id):
+    """Item del carrito en sesión por id, o None"""
+    for fila in _leer()['items']:
+        if fila[0] == item_id:
+            return SessionCartItem(*fila)
+    return None
+
+
+def actualizar(item_id, quantity):
+    """Cambiar la cantidad de un item (0 o menos lo elimina)"""
+    if quantity <= 0:
+        return eliminar(item_id)
+    datos = _leer()
+    for fila in datos['items']:
+        if fila[0] == item_id:
+            fila[3] = quantity
+            _guardar(datos)
+            return True
+    return False
+
+
+def eliminar(item_id):
+    """Eliminar un item del carrito en sesión"""
+    datos = _leer()
+    restantes = [fila for fila in datos['items'] if fila[0] != item_id]
+    if len(restantes) == len(datos['items']):
+        return False
+    datos['items'] = restantes
+    _guardar(datos)
+    return True
+
+
+def vaciar():
+    """Vaciar el carrito en sesión"""
+    session.pop(CLAVE_SESION, None)
+
+
+def fusionar_carrito_sesion(sender, user, **extra):
+    """
+    Receptor de la señal user_logged_in: mover el carrito en sesión a cart_items.
+
+    Lee el carrito del usuario una vez y aplica todos los cambios con un
+    INSERT masivo, un UPDATE masivo por clave primaria y el ajuste del
+    contador, en una sola transacción.
+    """
+    items = obtener_items()
+    if not items:
+        return
+
+    from database import db
+    from models.database_models import CartItem, User
+    from utils.cart_loader import cargar_productos
+
+    cantidades = {}
+    for item in items:
+        clave = (item.product_type, item.product_id)
+        cantidades[clave] = cantidades.get(clave, 0) + item.quantity
+
+    # Descartar productos que ya no existen
+    existentes_catalogo = cargar_productos(cantidades.keys())
+    cantidades = {clave: cantidad for clave, cantidad in cantidades.items() if clave in existentes_catalogo}
+
+    try:
+        en_carrito = {
+            (item.product_type, item.product_id): item
+            for item in CartItem.query.filter_by(user_id=user.id).all()
+        }
+        actualizaciones = [
+            {'id': en_carrito[clave].id, 'quantity': en_carrito[clave].quantity + cantidad}
+            for clave, cantidad in cantidades.items() if clave in en_carrito
+        ]
+        nuevos = [
+            {'user_id': user.id, 'product_type': tipo, 'product_id': producto, 'quantity': cantidad}
+            for (tipo, producto), cantidad in cantidades.items() if (tipo, producto) not in en_carrito
+        ]
+
+        if actualizaciones:
+            db.session.execute(db.update(CartItem), actualizaciones)
+        if nuevos:
+            # El INSERT masivo no dispara los eventos por fila: se ajusta el contador aquí
+            db.session.execute(db.insert(CartItem), nuevos)
+            User.query.filter_by(id=user.id).update(
+                {'cart_count': User.cart_count + len(nuevos)}, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al fusionar el carrito de sesión: {e}")
+        return
+
+    vaciar()
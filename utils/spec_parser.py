@@ -0,0 +1,103 @@
+"""
+Normalización de especificaciones de hardware
+Convierte valores como "2.5 GHz", "65W" u "8 GB GDDR6" en atributos tipados
+(clave, valor numérico, unidad, texto normalizado) filtrables con índices.
+"""
+import re
+
+# Alias aceptados en los filtros -> clave almacenada en especificaciones
+SPEC_ALIASES = {
+    'vram': 'memoria',
+    'cores': 'nucleos',
+    'threads': 'hilos',
+    'frecuencia_turbo': 'frecuencia_boost',
+    'boost': 'frecuencia_boost',
+    'watts': 'tdp',
+    'ram': 'capacidad',
+}
+
+# Unidades reconocidas (en minúsculas) -> (unidad canónica, factor). Cada
+# magnitud tiene una sola unidad canónica porque los filtros comparan valor_num
+# sin mirar la unidad ("3600 MHz" se guarda como 3.6 GHz)
+UNIDADES = {
+    'gb': ('GB', 1), 'mb': ('GB', 1 / 1024), 'tb': ('GB', 1024),
+    'ghz': ('GHz', 1), 'mhz': ('GHz', 1 / 1000),
+    'w': ('W', 1), 'nm': ('nm', 1),
+}
+
+# Columnas tipadas del modelo que completan las especificaciones si faltan
+COLUMNAS_SPEC = [
+    ('vram_gb', 'memoria', 'GB'),
+    ('cores', 'nucleos', None),
+    ('threads', 'hilos', None),
+    ('tdp_watts', 'tdp', 'W'),
+    ('socket', 'socket', None),
+]
+
+_VALOR_RE = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*([a-zA-Z]+)?')
+
+
+def normalizar_clave(clave):
+    """Clave de especificación en minúsculas, resolviendo alias"""
+    clave = str(clave).strip().lower().replace(' ', '_')
+    return SPEC_ALIASES.get(clave, clave)
+
+
+def normalizar_texto(valor):
+    """Texto comparable: minúsculas y sin espacios ni guiones ("LGA 1700" -> "lga1700")"""
+    return re.sub(r'[\s\-_]+', '', str(valor)).lower()[:200]
+
+
+def parsear_valor(valor):
+    """
+    Convertir un valor de especificación en (número, unidad, texto).
+
+    Examples:
+        "2.5 GHz" -> (2.5, 'GHz', '2.5ghz')
+        "65W"     -> (65.0, 'W', '65w')
+        "3600 MHz" -> (3.6, 'GHz', '3600mhz')
+        "AM5"     -> (None, None, 'am5')
+        6         -> (6.0, None, '6')
+    """
+    if isinstance(valor, bool):
+        return None, None, normalizar_texto(valor)
+    if isinstance(valor, (int, float)):
+        return float(valor), None, normalizar_texto(valor)
+
+    texto = str(valor)
+    numero, unidad = None, None
+    match = _VALOR_RE.match(texto)
+    if match:
+        numero = float(match.group(1).replace(',', '.'))
+        sufijo = (match.group(2) or '').lower()
+        if sufijo in UNIDADES:
+            unidad, factor = UNIDADES[sufijo]
+            numero *= factor
+    return numero, unidad, normalizar_texto(texto)
+
+
+def atributos_desde_hardware(hardware):
+    """
+    Atributos tipados de un componente a partir de su JSON y sus columnas.
+
+    Returns:
+        lista de dicts con clave, valor_num, unidad y valor_texto
+    """
+    specs = {normalizar_clave(k): v for k, v in hardware.get_especificaciones().items()}
+    for columna, clave, unidad in COLUMNAS_SPEC:
+        valor = getattr(hardware, columna, None)
+        if valor and clave not in specs:
+            specs[clave] = f'{valor} {unidad}' if unidad else valor
+
+    atributos = []
+    for clave, valor in specs.items():
+        if valor is None or isinstance(valor, (dict, list)):
+            continue
+        numero, unidad, texto = parsear_valor(valor)
+        atributos.append({
+            'clave': clave[:50],
+            'valor_num': numero,
+            'unidad': unidad,
+            'valor_texto': texto
+        })
+    return atributos
@@ -0,0 +1,267 @@
+"""
+Productos en tendencia
+Cuenta visitas y productos agregados al carrito en una ventana deslizante sin
+guardar una fila por evento: cada intervalo (bucket) tiene un Count-Min sketch
+de tamaño fijo y un min-heap con los k productos más frecuentes. Cada worker
+guarda periódicamente sus sketches en trending_sketches y el ranking suma los
+de todos los workers, con más peso para los intervalos recientes. La memoria
+no depende del tamaño del catálogo.
+"""
+import atexit
+import hashlib
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+from array import array
+
+from flask import current_app
+
+BUCKET_SEGUNDOS = 300        # Duración de cada intervalo
+VENTANA_BUCKETS = 12         # Ventana de una hora
+VIDA_MEDIA_BUCKETS = 3       # El peso de un intervalo se reduce a la mitad cada 15 minutos
+ANCHO = 2048
+PROFUNDIDAD = 4
+K_CANDIDATOS = 50
+PERSISTIR_SEGUNDOS = 30
+CACHE_SEGUNDOS = 30
+
+PESOS = {'vista': 1, 'carrito': 3}
+
+
+def _clave(product_type, product_id):
+    return f'{product_type}:{product_id}'
+
+
+class CountMinSketch:
+    """Frecuencias aproximadas (sólo sobreestima) en una tabla fija de PROFUNDIDAD x ANCHO"""
+
+    def __init__(self, tabla=None):
+        self.tabla = tabla if tabla is not None else array('I', bytes(4 * ANCHO * PROFUNDIDAD))
+
+    @staticmethod
+    def posiciones(clave):
+        """Una celda por fila (doble hashing sobre un blake2b de 64 bits, igual en todos los procesos)"""
+        h = int.from_bytes(hashlib.blake2b(clave.encode(), digest_size=8).digest(), 'little')
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [fila * ANCHO + (h1 + fila * h2) % ANCHO for fila in range(PROFUNDIDAD)]
+
+    def sumar(self, clave, n=1):
+        """Sumar n a la clave y devolver su nueva estimación"""
+        posiciones = self.posiciones(clave)
+        for p in posiciones:
+            self.tabla[p] += n
+        return min(self.tabla[p] for p in posiciones)
+
+    def estimar(self, posiciones):
+        return min(self.tabla[p] for p in posiciones)
+
+    def fusionar(self, otro):
+        """Sumar otro sketch de las mismas dimensiones"""
+        for i, valor in enumerate(otro.tabla):
+            if valor:
+                self.tabla[i] += valor
+
+    def a_bytes(self):
+        return self.tabla.tobytes()
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        tabla = array('I')
+        tabla.frombytes(datos)
+        if len(tabla) != ANCHO * PROFUNDIDAD:
+            raise ValueError('Sketch con dimensiones distintas')
+        return cls(tabla)
+
+
+class TopK:
+    """Las k claves con mayor estimación, con un min-heap de entradas perezosas"""
+
+    def __init__(self, k=K_CANDIDATOS):
+        self.k = k
+        self.valores = {}
+        self._heap = []
+
+    def ofrecer(self, clave, valor):
+        if clave in self.valores or len(self.valores) < self.k:
+            self.valores[clave] = valor
+            heapq.heappush(self._heap, (valor, clave))
+        else:
+            # Descartar entradas viejas hasta dar con el mínimo vigente
+            while self._heap and self.valores.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if self._heap and valor > self._heap[0][0]:
+                _, expulsada = heapq.heappop(self._heap)
+                del self.valores[expulsada]
+                self.valores[clave] = valor
+                heapq.heappush(self._heap, (valor, clave))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(v, c) for c, v in self.valores.items()]
+            heapq.heapify(self._heap)
+
+
+class TrendingBucket:
+    """Eventos de un intervalo: sketch más candidatos"""
+
+    def __init__(self):
+        self.sketch = CountMinSketch()
+        self.top = TopK()
+
+    def registrar(self, clave, peso):
+        self.top.ofrecer(clave, self.sketch.sumar(clave, peso))
+
+
+class TrendingTracker:
+    """Intervalos de la ventana de este proceso y su persistencia periódica"""
+
+    def __init__(self, app):
+        self.app = app
+        self.buckets = {}
+        self._sucios = set()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.worker = None
+        self._cache = (0.0, [])
+
+    def registrar(self, evento, product_type, product_id):
+        """Registrar un evento en el intervalo actual (sin acceder a la base de datos)"""
+        self._iniciar_hilo()
+        indice = int(time.time() // BUCKET_SEGUNDOS)
+        with self._lock:
+            bucket = self.buckets.get(indice)
+            if bucket is None:
+                bucket = self.buckets[indice] = TrendingBucket()
+                for viejo in [i for i in self.buckets if i <= indice - VENTANA_BUCKETS]:
+                    del self.buckets[viejo]
+                    self._sucios.discard(viejo)
+            bucket.registrar(_clave(product_type, product_id), PESOS[evento])
+            self._sucios.add(indice)
+
+    def _iniciar_hilo(self):
+        """Arrancar el hilo de persistencia en este proceso (tras un fork el del padre no existe)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self.worker = f'{socket.gethostname()}:{pid}'[:80]
+            threading.Thread(target=self._bucle, name='trending-persist', daemon=True).start()
+
+    def _bucle(self):
+        while True:
+            time.sleep(PERSISTIR_SEGUNDOS)
+            self.persistir()
+
+    def persistir(self):
+        """Guardar los intervalos modificados de este worker y borrar los que salieron de la ventana"""
+        with self._lock:
+            filas = [{
+                'bucket': indice, 'worker': self.worker,
+                'sketch': self.buckets[indice].sketch.a_bytes(),
+                'candidatos': json.dumps(list(self.buckets[indice].top.valores)),
+            } for indice in self._sucios if indice in self.buckets]
+            self._sucios.clear()
+        if not filas:
+            return 0
+
+        from database import db
+        from models.database_models import TrendingSketch
+
+        tabla = TrendingSketch.__table__
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                if connection.dialect.name == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert
+                stmt = insert(tabla)
+                connection.execute(stmt.on_conflict_do_update(
+                    index_elements=['bucket', 'worker'],
+                    set_={'sketch': stmt.excluded.sketch, 'candidatos': stmt.excluded.candidatos,
+                          'updated_at': db.func.now()}
+                ), filas)
+                limite = int(time.time() // BUCKET_SEGUNDOS) - VENTANA_BUCKETS
+                connection.execute(tabla.delete().where(tabla.c.bucket <= limite))
+        except Exception as e:
+            self.app.logger.warning(f'No se pudieron guardar los sketches de tendencias: {e}')
+            with self._lock:
+                self._sucios.update(fila['bucket'] for fila in filas)
+            return 0
+        return len(filas)
+
+    def ranking(self, limite):
+        """
+        Claves con mayor puntaje en la ventana, sumando los sketches guardados
+        por los demás workers y los de este proceso. Se recalcula cada
+        CACHE_SEGUNDOS.
+
+        Returns:
+            lista de (product_type, product_id, puntaje)
+        """
+        vence, resultado = self._cache
+        if time.monotonic() < vence:
+            return resultado[:limite]
+
+        from models.database_models import TrendingSketch
+
+        actual = int(time.time() // BUCKET_SEGUNDOS)
+        desde = actual - VENTANA_BUCKETS + 1
+        por_bucket = {}
+
+        def acumular(indice, sketch, candidatos):
+            sketch_total, candidatos_total = por_bucket.setdefault(indice, (CountMinSketch(), set()))
+            sketch_total.fusionar(sketch)
+            candidatos_total.update(candidatos)
+
+        consulta = TrendingSketch.query.filter(TrendingSketch.bucket >= desde)
+        if self.worker:
+            consulta = consulta.filter(TrendingSketch.worker != self.worker)
+        for fila in consulta:
+            try:
+                acumular(fila.bucket, CountMinSketch.desde_bytes(fila.sketch), json.loads(fila.candidatos))
+            except ValueError:
+                continue
+        with self._lock:
+            for indice, bucket in self.buckets.items():
+                if indice >= desde:
+                    acumular(indice, bucket.sketch, bucket.top.valores)
+
+        puntajes = {}
+        for indice, (sketch, candidatos) in por_bucket.items():
+            peso = 0.5 ** ((actual - indice) / VIDA_MEDIA_BUCKETS)
+            for clave in candidatos:
+                puntajes[clave] = puntajes.get(clave, 0.0) + peso * sketch.estimar(CountMinSketch.posiciones(clave))
+
+        resultado = []
+        for clave, puntaje in heapq.nlargest(K_CANDIDATOS, puntajes.items(), key=lambda par: (par[1], par[0])):
+            product_type, _, product_id = clave.partition(':')
+            resultado.append((product_type, int(product_id), round(puntaje, 2)))
+        self._cache = (time.monotonic() + CACHE_SEGUNDOS, resultado)
+        return resultado[:limite]
+
+
+def init_trending(app):
+    """Crear el registro de tendencias del proceso y guardarlo al terminar el worker"""
+    tracker = TrendingTracker(app)
+    app.extensions['trending'] = tracker
+    atexit.register(tracker.persistir)
+    return tracker
+
+
+def registrar_evento(evento, product_type, product_id):
+    """Registrar una visita ('vista') o un producto agregado al carrito ('carrito')"""
+    current_app.extensions['trending'].registrar(evento, product_type, product_id)
+
+
+def productos_en_tendencia(limite=4):
+    """Productos en tendencia ya cargados (una consulta por tipo)"""
+    from utils.cart_loader import cargar_productos
+
+    claves = [(product_type, product_id) for product_type, product_id, _ in
+              current_app.extensions['trending'].ranking(limite)]
+    productos = cargar_productos(claves)
+    return [productos[clave] for clave in claves if clave in productos]
@@ -0,0 +1,155 @@
+"""
+Contador de visitas con escritura diferida
+Cada worker acumula en memoria las visitas a las páginas de detalle y las
+escribe en product_views con un único upsert masivo cada pocos segundos (o al
+llegar a VIEW_COUNTER_FLUSH_EVENTS visitas), en lugar de una escritura por
+página vista. El buffer tiene un tope de claves distintas y se vacía al
+terminar el worker; las lecturas suman lo persistido y lo aún no escrito.
+"""
+import atexit
+import os
+import threading
+from collections import Counter
+
+from flask import current_app
+
+
+class ViewCounterBuffer:
+    """Buffer de visitas de un proceso con un hilo que lo vacía periódicamente"""
+
+    def __init__(self, app, intervalo, max_eventos, max_claves):
+        self.app = app
+        self.intervalo = intervalo
+        self.max_eventos = max_eventos
+        self.max_claves = max_claves
+        self.descartadas = 0             # Visitas perdidas por buffer lleno
+        self._pendientes = Counter()
+        self._en_vuelo = Counter()       # Lote que se está escribiendo
+        self._eventos = 0
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._pid = None
+
+    def registrar(self, product_type, product_id):
+        """Sumar una visita (sin acceder a la base de datos)"""
+        clave = (product_type, product_id)
+        with self._lock:
+            if clave not in self._pendientes and len(self._pendientes) >= self.max_claves:
+                self.descartadas += 1
+                self._despertar.set()
+                return
+            self._pendientes[clave] += 1
+            self._eventos += 1
+            if self._eventos >= self.max_eventos:
+                self._despertar.set()
+        self._iniciar_hilo()
+
+    def _iniciar_hilo(self):
+        """Arrancar el hilo de escritura en este proceso (tras un fork el del padre no existe)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            threading.Thread(target=self._bucle, name='view-counter-flush', daemon=True).start()
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            self.flush()
+
+    def sin_escribir(self, product_type, product_id):
+        """Visitas de este worker aún no persistidas"""
+        clave = (product_type, product_id)
+        with self._lock:
+            return self._pendientes.get(clave, 0) + self._en_vuelo.get(clave, 0)
+
+    def flush(self):
+        """
+        Escribir las visitas pendientes con un upsert masivo en su propia
+        transacción. Si falla, vuelven al buffer (respetando el tope).
+
+        Returns:
+            número de productos escritos
+        """
+        with self._lock:
+            if not self._pendientes:
+                return 0
+            lote, self._pendientes, self._eventos = self._pendientes, Counter(), 0
+            self._en_vuelo.update(lote)
+
+        from database import db
+        from models.database_models import ProductView, upsert_sumando
+
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                upsert_sumando(connection, ProductView.__table__, ['product_type', 'product_id'], [
+                    {'product_type': product_type, 'product_id': product_id, 'vistas': vistas}
+                    for (product_type, product_id), vistas in sorted(lote.items())
+                ])
+        except Exception as e:
+            self.app.logger.warning(f'No se pudieron guardar {len(lote)} contadores de visitas: {e}')
+            with self._lock:
+                self._en_vuelo.subtract(lote)
+                self._en_vuelo += Counter()   # Quitar las claves en cero
+                for clave, vistas in lote.items():
+                    if clave in self._pendientes or len(self._pendientes) < self.max_claves:
+                        self._pendientes[clave] += vistas
+                    else:
+                        self.descartadas += vistas
+            return 0
+
+        with self._lock:
+            self._en_vuelo.subtract(lote)
+            self._en_vuelo += Counter()
+        return len(lote)
+
+
+def init_view_counter(app):
+    """Configurar el buffer de visitas del proceso y vaciarlo al terminar el worker"""
+    app.config.setdefault('VIEW_COUNTER_FLUSH_SECONDS', 5)
+    app.config.setdefault('VIEW_COUNTER_FLUSH_EVENTS', 500)
+    app.config.setdefault('VIEW_COUNTER_MAX_KEYS', 5000)
+    buffer = ViewCounterBuffer(
+        app,
+        app.config['VIEW_COUNTER_FLUSH_SECONDS'],
+        app.config['VIEW_COUNTER_FLUSH_EVENTS'],
+        app.config['VIEW_COUNTER_MAX_KEYS'],
+    )
+    app.extensions['view_counter'] = buffer
+    atexit.register(buffer.flush)
+    return buffer
+
+
+def registrar_vista(product_type, product_id):
+    """Contar una visita a la página de detalle de un producto"""
+    current_app.extensions['view_counter'].registrar(product_type, product_id)
+
+
+def vistas(product_type, product_id):
+    """Visitas totales de un producto: persistidas más las aún no escritas de este worker"""
+    from database import db
+    from models.database_models import ProductView
+
+    persistidas = db.session.query(ProductView.vistas).filter_by(
+        product_type=product_type, product_id=product_id).scalar() or 0
+    return persistidas + current_app.extensions['view_counter'].sin_escribir(product_type, product_id)
+
+
+def mas_vistos(product_type, limite=10):
+    """
+    Productos más visitados: lista de (product_id, vistas), sumando lo aún no
+    escrito de este worker a los candidatos persistidos.
+    """
+    from models.database_models import ProductView
+
+    buffer = current_app.extensions['view_counter']
+    filas = (ProductView.query.with_entities(ProductView.product_id, ProductView.vistas)
+             .filter_by(product_type=product_type)
+             .order_by(ProductView.vistas.desc(), ProductView.product_id)
+             .limit(limite))
+    ranking = [(product_id, total + buffer.sin_escribir(product_type, product_id)) for product_id, total in filas]
+    return sorted(ranking, key=lambda fila: (-fila[1], fila[0]))
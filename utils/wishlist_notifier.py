@@ -0,0 +1,182 @@
+"""
+Avisos de la lista de deseos
+Recorre los cambios de producto posteriores a su cursor (bajadas de precio en
+price_history y reposiciones en stock_events), los cruza con wishlist en una
+sola consulta por lote y envía un correo a cada interesado. La plantilla se
+renderiza una vez por producto y los correos salen en lotes por una misma
+conexión SMTP, a WISHLIST_MAIL_RATE correos por segundo. El cursor
+(evento, último usuario avisado) se guarda en job_checkpoints después de
+cada lote, así que una caída no reenvía lo ya enviado.
+"""
+import time
+from itertools import groupby
+
+from flask import current_app, render_template, url_for
+from flask_mail import Message
+
+LOTE_EVENTOS = 20
+
+FUENTES = {
+    'bajada': 'wishlist_bajadas',          # price_history
+    'reposicion': 'wishlist_reposiciones',  # stock_events
+}
+
+
+def _modelo_eventos(fuente):
+    from models.database_models import PriceHistory, StockEvent
+    return PriceHistory if fuente == 'bajada' else StockEvent
+
+
+def _eventos_pendientes(fuente, checkpoint):
+    """
+    Eventos desde el cursor, quedándose con el último de cada producto (un
+    cambio posterior reemplaza al anterior) y, para precios, sólo si es una bajada.
+
+    Returns:
+        (eventos a avisar, id del último evento leído)
+    """
+    modelo = _modelo_eventos(fuente)
+    filas = modelo.query.filter(modelo.id >= checkpoint.ultimo_id).order_by(modelo.id).limit(LOTE_EVENTOS).all()
+    if not filas:
+        return [], None
+    ultimos = {(fila.product_type, fila.product_id): fila for fila in filas}
+    eventos = sorted(ultimos.values(), key=lambda fila: fila.id)
+    if fuente == 'bajada':
+        eventos = [fila for fila in eventos if fila.precio < fila.precio_anterior]
+    return eventos, filas[-1].id
+
+
+def _destinatarios(fuente, eventos, checkpoint):
+    """
+    Interesados de todos los eventos con una consulta (índice idx_wishlist_product),
+    sin los ya avisados según el cursor.
+
+    Returns:
+        lista de (id del evento, user_id, email) ordenada por evento y usuario
+    """
+    from database import db
+    from models.database_models import User, Wishlist
+
+    modelo = _modelo_eventos(fuente)
+    return (db.session.query(modelo.id, User.id, User.email)
+            .join(Wishlist, db.and_(Wishlist.product_type == modelo.product_type,
+                                    Wishlist.product_id == modelo.product_id))
+            .join(User, User.id == Wishlist.user_id)
+            .filter(modelo.id.in_([evento.id for evento in eventos]),
+                    User.email_verified.is_(True),
+                    db.or_(modelo.id > checkpoint.ultimo_id, User.id > checkpoint.posicion))
+            .order_by(modelo.id, User.id)
+            .all())
+
+
+def _renderizar(fuente, evento, producto):
+    """Asunto, HTML y texto del aviso de un producto (una vez por producto)"""
+    from utils.cart_loader import nombre_producto
+
+    nombre = nombre_producto(producto)
+    if evento.product_type == 'game':
+        url = url_for('store.juego_detalle', juego_id=producto.id, _external=True)
+    else:
+        url = url_for('store.hardware_detalle', hardware_id=producto.id, _external=True)
+    if fuente == 'bajada':
+        asunto = f'{nombre} bajó de precio - GameTech Store'
+        texto = f'{nombre}, de tu lista de deseos, bajó de ${evento.precio_anterior:.2f} a ${evento.precio:.2f}.'
+    else:
+        asunto = f'{nombre} está disponible de nuevo - GameTech Store'
+        texto = f'{nombre}, de tu lista de deseos, volvió a estar disponible.'
+    html = render_template('emails/wishlist_aviso.html', fuente=fuente, evento=evento,
+                           producto=producto, nombre=nombre, url=url)
+    return asunto, html, f'{texto}\n\nVer producto: {url}\n\nEl equipo de GameTech Store'
+
+
+def _vigente(fuente, evento, producto):
+    """El cambio sigue vigente (el precio no volvió a subir, sigue habiendo stock)"""
+    if producto is None:
+        return False
+    if fuente == 'bajada':
+        return producto.precio <= evento.precio
+    return producto.disponible > 0
+
+
+class _Ritmo:
+    """Espaciar los envíos para no superar `por_segundo` correos por segundo"""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self.siguiente = time.monotonic()
+
+    def esperar(self):
+        ahora = time.monotonic()
+        if self.siguiente > ahora:
+            time.sleep(self.siguiente - ahora)
+        self.siguiente = max(ahora, self.siguiente) + self.intervalo
+
+
+def _guardar_cursor(checkpoint, evento_id, user_id):
+    from database import db
+
+    checkpoint.ultimo_id, checkpoint.posicion = evento_id, user_id
+    db.session.commit()
+
+
+def notificar(fuente):
+    """
+    Enviar los avisos pendientes de una fuente ('bajada' o 'reposicion').
+    Requiere un contexto de petición (para url_for externos).
+
+    Returns:
+        (eventos avisados, correos enviados)
+    """
+    from database import db
+    from extensions import mail
+    from models.database_models import JobCheckpoint
+    from utils.cart_loader import cargar_productos
+
+    nombre_trabajo = FUENTES[fuente]
+    tamano_lote = current_app.config['WISHLIST_MAIL_BATCH']
+    remitente = current_app.config['MAIL_DEFAULT_SENDER']
+    ritmo = _Ritmo(current_app.config['WISHLIST_MAIL_RATE'])
+    avisados = enviados = 0
+
+    while True:
+        checkpoint = JobCheckpoint.bloquear(nombre_trabajo)
+        eventos, ultimo_leido = _eventos_pendientes(fuente, checkpoint)
+        if ultimo_leido is None:
+            db.session.commit()
+            return avisados, enviados
+
+        productos = cargar_productos((evento.product_type, evento.product_id) for evento in eventos)
+        por_id = {evento.id: evento for evento in eventos}
+        for evento_id, filas in groupby(_destinatarios(fuente, eventos, checkpoint), key=lambda fila: fila[0]):
+            evento = por_id[evento_id]
+            producto = productos.get((evento.product_type, evento.product_id))
+            if not _vigente(fuente, evento, producto):
+                continue
+            asunto, html, texto = _renderizar(fuente, evento, producto)
+            filas = list(filas)
+            for inicio in range(0, len(filas), tamano_lote):
+                ultimo_user_id = None
+                try:
+                    with mail.connect() as conexion:
+                        for _, user_id, email in filas[inicio:inicio + tamano_lote]:
+                            ritmo.esperar()
+                            conexion.send(Message(subject=asunto, sender=remitente, recipients=[email],
+                                                  html=html, body=texto))
+                            ultimo_user_id = user_id
+                            enviados += 1
+                finally:
+                    # Guardar el avance incluso si el lote falló a la mitad
+                    if ultimo_user_id is not None:
+                        _guardar_cursor(checkpoint, evento_id, ultimo_user_id)
+                    else:
+                        db.session.rollback()
+                # Recuperar el bloqueo; si otra ejecución avanzó el cursor, dejarle el trabajo
+                actual = JobCheckpoint.bloquear(nombre_trabajo)
+                if (actual.ultimo_id, actual.posicion) != (evento_id, ultimo_user_id):
+                    db.session.commit()
+                    return avisados, enviados
+            avisados += 1
+
+        # Lote de eventos terminado: el cursor pasa al último evento leído
+        checkpoint = JobCheckpoint.bloquear(nombre_trabajo)
+        _guardar_cursor(checkpoint, ultimo_leido + 1, 0)